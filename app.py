@@ -1,237 +1,632 @@
-from flask import Flask, render_template, request, jsonify
+import time
+
+# Cold-start clock: started before Flask and the scoring modules are imported
+IMPORT_STARTED = time.perf_counter()
+
+import codecs
+import json
+import os
+from collections import Counter
+from itertools import repeat
+
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+
+# NumPy and pandas are only needed by the batch endpoint and DTI derivation;
+# they are imported there (and by warm_up) so a new process starts serving
+# /api/predict without loading them.
+from metrics import CONTENT_TYPE, NullStageTimer, Registry, RequestMetrics, StageTimer
+from result_cache import ResultCache
+from schema import MISSING, ValidationError, schema_for, to_number
+from scorecard import FIELD_DEFAULTS
+from scorecard_store import ScorecardStore
+from startup import FirstRequestTimer, StartupReport
+from what_if import what_if
+
+STARTUP = StartupReport(IMPORT_STARTED)
+os.register_at_fork(after_in_child=STARTUP.after_fork)
 
 app = Flask(__name__)
 
+# Records scored per vectorized pass by /api/predict/batch
+BATCH_CHUNK_SIZE = 1000
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+# Set CREDIT_RISK_DERIVE_DTI=1 to always derive the debt-to-income ratio from
+# loanAmount, interestRate and loanTenure instead of trusting the client's value.
+# Individual requests can opt in with "deriveDti": true.
+DERIVE_DTI = os.environ.get('CREDIT_RISK_DERIVE_DTI', '').lower() in ('1', 'true', 'yes')
+
+# /api/predict response cache keyed on band-quantized inputs (size 0 disables it)
+RESULT_CACHE = ResultCache(
+    maxsize=int(os.environ.get('CREDIT_RISK_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('CREDIT_RISK_CACHE_TTL', 300))
+)
+
+# Set CREDIT_RISK_AUDIT_DIR to record every scored request (inputs as scored,
+# result and scorecard version) to Arrow segments there; replay with audit.py.
+AUDIT_DIR = os.environ.get('CREDIT_RISK_AUDIT_DIR')
+if AUDIT_DIR:
+    from audit import AuditLog
+    AUDIT = AuditLog(AUDIT_DIR, segment_rows=int(os.environ.get('CREDIT_RISK_AUDIT_SEGMENT_ROWS', 1_000_000)))
+else:
+    AUDIT = None
+
+# Prometheus-style metrics at /metrics. CREDIT_RISK_METRICS=0 turns them off:
+# no middleware runs, and /api/predict's stage calls go to a no-op timer
+# (about 0.4µs a request, not zero).
+METRICS_ENABLED = os.environ.get('CREDIT_RISK_METRICS', '1').lower() not in ('0', 'false', 'no')
+METRICS = Registry()
+REQUESTS = METRICS.counter('credit_risk_requests_total', 'HTTP requests by path and status', ('path', 'status'))
+REQUEST_SECONDS = METRICS.histogram('credit_risk_request_seconds', 'Request latency by path', ('path',))
+PREDICT_STAGE_SECONDS = METRICS.histogram('credit_risk_predict_stage_seconds', '/api/predict latency by stage', ('stage',))
+if METRICS_ENABLED:
+    PREDICT_TIMER = StageTimer(PREDICT_STAGE_SECONDS, ('decode', 'coerce', 'cache', 'score', 'assess', 'serialize'))
+else:
+    PREDICT_TIMER = NullStageTimer()
+ERRORS = METRICS.counter('credit_risk_errors_total', 'Rejected requests by endpoint and exception type', ('endpoint', 'exception'))
+RATINGS = METRICS.counter('credit_risk_ratings_total', 'Predictions by rating', ('rating',))
+
 # Mathematical Credit Risk Calculator (Indian Standards)
 def calculate_credit_risk(input_data):
     """
     Calculate credit risk using mathematical formulas based on Indian banking standards.
-    Uses RBI guidelines and common Indian credit scoring metrics.
+    Uses RBI guidelines and common Indian credit scoring metrics; the bands and
+    points live in scorecard.SCORECARD_DEFINITION.
     """
-    
-    # Extract data
-    age = input_data.get('age', 0)
-    income = input_data.get('income', 0)
-    credit_rating = input_data.get('creditRating', 'Average')  # Changed from creditScore
-    debt_to_income = input_data.get('debtToIncomeRatio', 0)
-    employment_years = input_data.get('employmentLength', 0)
-    num_accounts = input_data.get('numAccounts', 0)
-    late_payments = input_data.get('latePayments', 0)
-    loan_amount = input_data.get('loanAmount', 0)
-    interest_rate = input_data.get('interestRate', 0)
-    savings_balance = input_data.get('savingsBalance', 0)
-    
-    # Initialize risk score (0 to 100, higher = more risk)
-    risk_score = 0
-    
-    # 1. Age Factor (25-40 is ideal for Indians, age risk: 10 points)
-    if age < 25 or age > 60:
-        risk_score += 10
-    elif age < 30 or age > 55:
-        risk_score += 5
-    
-    # 2. Income Stability (Based on Indian income levels)
-    # Minimum income threshold for loan eligibility in India: ~₹150,000/year
-    if income < 150000:
-        risk_score += 25  # Very high risk
-    elif income < 300000:
-        risk_score += 15  # High risk
-    elif income < 500000:
-        risk_score += 8   # Medium risk
-    elif income < 1000000:
-        risk_score += 3   # Low risk
-    # Above 1000000 - minimal risk (0 points)
-    
-    # 3. Credit Rating (Indian-specific categories)
-    credit_rating_weight = {
-        'Excellent': 0,      # CIBIL 750-900
-        'Good': 5,           # CIBIL 700-749
-        'Average': 15,       # CIBIL 650-699
-        'Fair': 25,          # CIBIL 600-649
-        'Poor': 40,          # CIBIL <600
-        'No History': 30     # First-time borrower
+    scorecard = SCORECARDS.current
+    return (grid_for(scorecard) or scorecard).score(input_data)
+
+# Assessment shown for each rating produced by the scorecard
+ASSESSMENTS = {
+    'Excellent': {
+        'rating': 'Excellent',
+        'risk_level': 'EXCELLENT',
+        'color': '#27ae60',
+        'description': '✅ आपका क्रेडिट प्रोफाइल उत्कृष्ट है। आप सभी बैंकों से सर्वोत्तम दरों पर ऋण प्राप्त कर सकते हैं।',
+        'english_desc': '✅ Your credit profile is excellent. You can get loans from all banks at the best rates.'
+    },
+    'Good': {
+        'rating': 'Good',
+        'risk_level': 'GOOD',
+        'color': '#2ecc71',
+        'description': '👍 आपका क्रेडिट प्रोफाइल अच्छा है। आप आसानी से ऋण अनुमोदन प्राप्त कर सकते हैं।',
+        'english_desc': '👍 Your credit profile is good. You can easily get loan approval.'
+    },
+    'Average': {
+        'rating': 'Average',
+        'risk_level': 'AVERAGE',
+        'color': '#f39c12',
+        'description': '⚠️ आपका क्रेडिट प्रोफाइल औसत है। आपको उच्च ब्याज दर पर ऋण मिल सकता है।',
+        'english_desc': '⚠️ Your credit profile is average. You may get loans at higher interest rates.'
+    },
+    'Fair': {
+        'rating': 'Fair',
+        'risk_level': 'FAIR',
+        'color': '#e67e22',
+        'description': '⚠️ आपका क्रेडिट प्रोफाइल कमजोर है। आपको अधिक ब्याज दर और सख्त शर्तें मिल सकती हैं।',
+        'english_desc': '⚠️ Your credit profile is weak. You may get higher rates and stricter conditions.'
+    },
+    'Poor': {
+        'rating': 'Poor',
+        'risk_level': 'POOR',
+        'color': '#e74c3c',
+        'description': '❌ आपका क्रेडिट प्रोफाइल खराब है। आपको ऋण मिलना मुश्किल हो सकता है। अपने क्रेडिट प्रोफाइल में सुधार करें।',
+        'english_desc': '❌ Your credit profile is poor. You may face difficulty getting loans. Improve your profile.'
     }
-    risk_score += credit_rating_weight.get(credit_rating, 15)
-    
-    # 4. Debt-to-Income Ratio (Critical in India)
-    # RBI guideline: Should be <50% for most lenders
-    if debt_to_income > 0.70:
-        risk_score += 25
-    elif debt_to_income > 0.50:
-        risk_score += 20
-    elif debt_to_income > 0.35:
-        risk_score += 10
-    elif debt_to_income > 0.20:
-        risk_score += 3
-    # Below 0.20 is excellent (0 points)
-    
-    # 5. Employment Stability (Indian employment patterns)
-    if employment_years < 1:
-        risk_score += 15  # Unstable/new employment
-    elif employment_years < 2:
-        risk_score += 10
-    elif employment_years < 5:
-        risk_score += 5
-    # 5+ years = minimal risk (0 points)
-    
-    # 6. Payment History (Late Payments - Critical)
-    # Each late payment adds significant risk in India
-    if late_payments == 0:
-        payment_penalty = 0
-    elif late_payments <= 2:
-        payment_penalty = 10
-    elif late_payments <= 5:
-        payment_penalty = 20
-    else:
-        payment_penalty = 35
-    risk_score += payment_penalty
-    
-    # 7. Number of Active Accounts (Too many = higher risk in India)
-    if num_accounts > 10:
-        risk_score += 12
-    elif num_accounts > 7:
-        risk_score += 8
-    elif num_accounts > 4:
-        risk_score += 3
-    # Less than 4 accounts = 0 points
-    
-    # 8. Savings Buffer (Emergency fund)
-    savings_to_monthly_income = (savings_balance / (income / 12)) if income > 0 else 0
-    if savings_to_monthly_income < 1:  # Less than 1 month salary
-        risk_score += 10
-    elif savings_to_monthly_income < 3:  # Less than 3 months
-        risk_score += 5
-    elif savings_to_monthly_income < 6:  # 6 months
-        risk_score += 2
-    # 6+ months savings = 0 points
-    
-    # 9. Loan-to-Value Ratio (Loan amount vs income)
-    ltv = (loan_amount / income * 100) if income > 0 else 0
-    if ltv > 500:  # Loan > 5x annual income
-        risk_score += 20
-    elif ltv > 350:  # Loan > 3.5x annual income
-        risk_score += 15
-    elif ltv > 200:  # Loan > 2x annual income
-        risk_score += 8
-    elif ltv > 100:  # Loan > 1x annual income
-        risk_score += 3
-    # Less than 1x annual income = 0 points
-    
-    # 10. Interest Rate Acceptance (Higher rate = higher risk perception)
-    if interest_rate > 15:
-        risk_score += 8
-    elif interest_rate > 12:
-        risk_score += 4
-    elif interest_rate > 9:
-        risk_score += 1
-    # Below 9% = 0 points
+}
+
+def get_indian_credit_assessment(risk_score, scorecard=None):
+    """Convert risk score to Indian credit assessment"""
+    return ASSESSMENTS[(scorecard or SCORECARDS.current).rating(risk_score)]
+
+def check_ratings(scorecard):
+    """Refuse a scorecard whose ratings have no assessment to show"""
+    unknown = set(scorecard.rating_labels) - set(ASSESSMENTS)
+    if unknown:
+        raise ValueError(f"Scorecard {scorecard.version} has ratings without an assessment: {', '.join(sorted(unknown))}")
+
+# Set CREDIT_RISK_SCORECARD to a JSON scorecard file (`python scorecard_store.py
+# export` writes the built-in one) to serve it instead of scorecard.py's table.
+# The file is re-read when it changes (polled every CREDIT_RISK_SCORECARD_POLL
+# seconds, 0 disables) and swapped in atomically: each request scores with the
+# version it started on. CREDIT_RISK_SHADOW_SCORECARD names a candidate file
+# that scores the same traffic in the background; see /api/shadow.
+SCORECARD_POLL = float(os.environ.get('CREDIT_RISK_SCORECARD_POLL', 2))
+SCORECARDS = ScorecardStore(os.environ.get('CREDIT_RISK_SCORECARD'), prepare=check_ratings)
+SCORECARDS.on_swap(lambda old, new: RESULT_CACHE.clear())
+if AUDIT is not None:
+    # Rows carry the version that scored them; stats() reports the one in force
+    AUDIT.version = SCORECARDS.current.version
+    SCORECARDS.on_swap(lambda old, new: setattr(AUDIT, 'version', new.version))
+SCORECARDS.watch(SCORECARD_POLL)
+
+SHADOW_PATH = os.environ.get('CREDIT_RISK_SHADOW_SCORECARD')
+if SHADOW_PATH:
+    from shadow import ShadowScorer
+    CANDIDATES = ScorecardStore(SHADOW_PATH)
+    CANDIDATES.watch(SCORECARD_POLL)
+    SHADOW = ShadowScorer(CANDIDATES, SCORECARDS)
+else:
+    CANDIDATES = SHADOW = None
+
+# Set CREDIT_RISK_PD_MODEL to a model fitted by pd_model.py to add a calibrated
+# probability of default ("pd") to predictions. The model belongs to one
+# scorecard (version and definition): after a swap to another, "pd" is left out.
+PD_MODEL_PATH = os.environ.get('CREDIT_RISK_PD_MODEL')
+if PD_MODEL_PATH:
+    from pd_model import load_model
+    PD_MODEL = load_model(PD_MODEL_PATH, SCORECARDS.current)
     
-    # Cap the risk score at 100
-    risk_score = min(risk_score, 100)
+    def refit_pd_model(old, new):
+        global PD_MODEL
+        try:
+            PD_MODEL = load_model(PD_MODEL_PATH, new)
+        except ValueError:
+            PD_MODEL = None
+    SCORECARDS.on_swap(refit_pd_model)
+else:
+    PD_MODEL = None
+
+def pd_model_for(scorecard):
+    """The PD model if it was loaded for this scorecard, else None"""
+    model = PD_MODEL
+    return model if model is not None and model.scorecard is scorecard else None
+
+# Decisions are handed to the audit log and shadow scorer only when one is on
+RECORDING = AUDIT is not None or SHADOW is not None
+
+# Optional O(1) mode: set CREDIT_RISK_GRID=1 to score /api/predict and
+# /api/predict/batch from the memory-mapped full-grid lookup table
+# (risk_grid.py). Scores and breakdowns are identical either way.
+if os.environ.get('CREDIT_RISK_GRID', '').lower() in ('1', 'true', 'yes'):
+    from risk_grid import load_grid
+    scorer = load_grid(SCORECARDS.current)
     
-    return risk_score
+    def use_grid(old, new):
+        global scorer
+        scorer = load_grid(new)
+    SCORECARDS.on_swap(use_grid)
+else:
+    scorer = None
 
-def get_indian_credit_assessment(risk_score):
-    """Convert risk score to Indian credit assessment"""
-    if risk_score < 20:
-        return {
-            'rating': 'Excellent',
-            'risk_level': 'EXCELLENT',
-            'color': '#27ae60',
-            'description': '✅ आपका क्रेडिट प्रोफाइल उत्कृष्ट है। आप सभी बैंकों से सर्वोत्तम दरों पर ऋण प्राप्त कर सकते हैं।',
-            'english_desc': '✅ Your credit profile is excellent. You can get loans from all banks at the best rates.'
-        }
-    elif risk_score < 35:
-        return {
-            'rating': 'Good',
-            'risk_level': 'GOOD',
-            'color': '#2ecc71',
-            'description': '👍 आपका क्रेडिट प्रोफाइल अच्छा है। आप आसानी से ऋण अनुमोदन प्राप्त कर सकते हैं।',
-            'english_desc': '👍 Your credit profile is good. You can easily get loan approval.'
-        }
-    elif risk_score < 50:
-        return {
-            'rating': 'Average',
-            'risk_level': 'AVERAGE',
-            'color': '#f39c12',
-            'description': '⚠️ आपका क्रेडिट प्रोफाइल औसत है। आपको उच्च ब्याज दर पर ऋण मिल सकता है।',
-            'english_desc': '⚠️ Your credit profile is average. You may get loans at higher interest rates.'
-        }
-    elif risk_score < 70:
-        return {
-            'rating': 'Fair',
-            'risk_level': 'FAIR',
-            'color': '#e67e22',
-            'description': '⚠️ आपका क्रेडिट प्रोफाइल कमजोर है। आपको अधिक ब्याज दर और सख्त शर्तें मिल सकती हैं।',
-            'english_desc': '⚠️ Your credit profile is weak. You may get higher rates and stricter conditions.'
-        }
-    else:
-        return {
-            'rating': 'Poor',
-            'risk_level': 'POOR',
-            'color': '#e74c3c',
-            'description': '❌ आपका क्रेडिट प्रोफाइल खराब है। आपको ऋण मिलना मुश्किल हो सकता है। अपने क्रेडिट प्रोफाइल में सुधार करें।',
-            'english_desc': '❌ Your credit profile is poor. You may face difficulty getting loans. Improve your profile.'
-        }
+def grid_for(scorecard):
+    """The lookup grid if grid mode is on and it was built for this scorecard, else None"""
+    grid = scorer
+    return grid if grid is not None and grid.scorecard is scorecard else None
+
+def evaluate_columns(columns, scorecard):
+    """(points, scores, ratings) for a batch of validated columns, from the grid in grid mode"""
+    grid = grid_for(scorecard)
+    if grid is not None:
+        return grid.evaluate_batch(columns)
+    from batch_scoring import evaluate_batch
+    return evaluate_batch(columns, scorecard)
+
+def record_decision(scorecard, input_data, risk_score, rating):
+    """Hand one /api/predict decision to the audit log and shadow scorer (both queue and return)"""
+    if AUDIT is not None:
+        AUDIT.record('api_predict', input_data, risk_score, rating, scorecard.version)
+    if SHADOW is not None:
+        SHADOW.submit(scorecard, input_data, risk_score, rating)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def wants_derived_dti(data):
+    """Whether debtToIncomeRatio should be derived server-side from the loan terms"""
+    return DERIVE_DTI or bool(data.get('deriveDti'))
+
+def extract_input(data, derive_dti=True, scorecard=None):
+    """
+    Validate and coerce a request payload into the input dict calculate_credit_risk
+    expects (the scorecard's request schema; raises ValidationError with per-field errors).
+    In DTI derivation mode the payload's loanTenure (years) is kept and, unless
+    derive_dti is False (batch callers derive a whole chunk at once), the
+    debt-to-income ratio is replaced by EMI ÷ monthly income.
+    """
+    schema = schema_for(scorecard or SCORECARDS.current)
+    input_data = schema.validate(data)
+    if wants_derived_dti(data):
+        input_data['loanTenure'] = schema.validate_tenure(data)
+        if derive_dti:
+            from emi import derived_dti
+            input_data['debtToIncomeRatio'] = float(derived_dti(
+                input_data['loanAmount'], input_data['interestRate'], input_data['loanTenure'], input_data['income']))
+    return input_data
+
+def error_body(e):
+    """Error response body; validation failures also list what is wrong with each field"""
+    if isinstance(e, ValidationError):
+        return {'error': str(e), 'errors': e.errors}
+    return {'error': str(e)}
+
+def build_prediction(risk_score, assessment, factor_points, scorecard=None, probability=None):
+    """Response body shared by the single and batch prediction endpoints"""
+    body = {
+        'risk_score': round(risk_score, 1),
+        'rating': assessment['rating'],
+        'risk_level': assessment['risk_level'],
+        'risk_color': assessment['color'],
+        'description_hindi': assessment['description'],
+        'description_english': assessment['english_desc'],
+        # Points each factor contributed, and their sum before the cap
+        'breakdown': dict(zip((scorecard or SCORECARDS.current).factor_names, factor_points)),
+        'total_points': sum(factor_points)
+    }
+    if probability is not None:
+        # Calibrated probability of default (pd_model.py)
+        body['pd'] = round(probability, 6)
+    return body
+
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
+    timer = PREDICT_TIMER
     try:
+        mark = timer.start()
         data = request.json
+        # One scorecard for the whole request, even if a new version is swapped in meanwhile
+        scorecard = SCORECARDS.current
+        mark = timer.end('decode', mark)
         
         # Extract input data
-        input_data = {
-            'age': float(data.get('age', 0)),
-            'income': float(data.get('income', 0)),
-            'creditRating': data.get('creditRating', 'Average'),
-            'debtToIncomeRatio': float(data.get('debtToIncomeRatio', 0)),
-            'employmentLength': float(data.get('employmentLength', 0)),
-            'numAccounts': float(data.get('numAccounts', 0)),
-            'latePayments': float(data.get('latePayments', 0)),
-            'loanAmount': float(data.get('loanAmount', 0)),
-            'interestRate': float(data.get('interestRate', 0)),
-            'savingsBalance': float(data.get('savingsBalance', 0))
-        }
+        input_data = extract_input(data, scorecard=scorecard)
+        mark = timer.end('coerce', mark)
+        
+        # Same bands always give the same response, so serve it from the cache
+        if RESULT_CACHE.enabled:
+            band_key = scorecard.band_key(input_data)
+            cache_key = (scorecard, band_key)
+            body = RESULT_CACHE.get(cache_key)
+            mark = timer.end('cache', mark)
+            if body is not None:
+                if METRICS_ENABLED or RECORDING:
+                    risk_score = scorecard.score_bands(band_key)
+                    rating = scorecard.rating(risk_score)
+                    if METRICS_ENABLED:
+                        RATINGS.inc((rating,))
+                    if RECORDING:
+                        record_decision(scorecard, input_data, risk_score, rating)
+                return app.response_class(body, mimetype=app.json.mimetype)
+        
+        # Calculate risk and every factor's points in one pass
+        breakdown = (grid_for(scorecard) or scorecard).evaluate(input_data)
+        mark = timer.end('score', mark)
+        
+        assessment = get_indian_credit_assessment(breakdown.score, scorecard)
+        pd_model = pd_model_for(scorecard)
+        probability = None
+        if pd_model is not None:
+            probability = pd_model.predict_bands(band_key if RESULT_CACHE.enabled else scorecard.band_key(input_data))
+        mark = timer.end('assess', mark)
         
-        # Calculate risk using mathematical formula
-        risk_score = calculate_credit_risk(input_data)
-        assessment = get_indian_credit_assessment(risk_score)
+        response = jsonify(build_prediction(breakdown.score, assessment, breakdown.points, scorecard, probability))
+        timer.end('serialize', mark)
         
-        return jsonify({
-            'risk_score': round(risk_score, 1),
-            'rating': assessment['rating'],
-            'risk_level': assessment['risk_level'],
-            'risk_color': assessment['color'],
-            'description_hindi': assessment['description'],
-            'description_english': assessment['english_desc']
-        })
+        if METRICS_ENABLED:
+            RATINGS.inc((assessment['rating'],))
+        if RECORDING:
+            record_decision(scorecard, input_data, breakdown.score, assessment['rating'])
+        if RESULT_CACHE.enabled:
+            RESULT_CACHE.put(cache_key, response.get_data())
+        return response
     except Exception as e:
-        return jsonify({'error': str(e)}), 400
+        if METRICS_ENABLED:
+            ERRORS.inc(('api_predict', type(e).__name__))
+        return jsonify(error_body(e)), 400
+
+def iter_json_array(stream, chunk_size=65536):
+    """Yield the elements of a JSON array read incrementally from a byte stream"""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer, pos, eof = '', 0, False
+    state = '['
+    
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of JSON array')
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + text.decode(chunk, final=eof), 0
+            continue
+        
+        char = buffer[pos]
+        if state == '[':
+            if char != '[':
+                raise ValueError('Request body must be a JSON array or NDJSON')
+            pos += 1
+            state = 'first'
+        elif state == ',':
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("Expected ',' or ']' in JSON array")
+            pos += 1
+            state = 'value'
+        else:
+            if state == 'first' and char == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # A value touching the end of the buffer may continue in the next chunk
+            if not eof and (end is None or end == len(buffer)):
+                chunk = stream.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + text.decode(chunk, final=eof), 0
+                continue
+            pos = end
+            state = ','
+            yield value
+
+def iter_ndjson(stream):
+    """Yield one parsed record (or the parse error) per non-blank NDJSON line"""
+    for line in iter(stream.readline, b''):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+def score_chunk(chunk):
+    """Score a chunk of (index, record) pairs and yield one NDJSON line per record"""
+    import numpy as np
+    from emi import derived_dti
+    
+    results = {}
+    records = []
+    for index, record in chunk:
+        if isinstance(record, Exception):
+            results[index] = {'index': index, 'error': str(record)}
+        elif not isinstance(record, dict):
+            results[index] = {'index': index, **error_body(ValidationError({'body': 'must be a JSON object'}))}
+        else:
+            records.append((index, record))
+    
+    # Validate the chunk column-wise; invalid records get their per-field errors inline
+    scorecard = SCORECARDS.current
+    schema = schema_for(scorecard)
+    n = len(records)
+    dicts = [record for _, record in records]
+    columns = {field: list(map(dict.get, dicts, repeat(field), repeat(MISSING))) for field in FIELD_DEFAULTS}
+    columns, errors = schema.validate_columns(columns, n)
+    derive = []
+    tenures = []
+    for position, (index, record) in enumerate(records):
+        if position not in errors and wants_derived_dti(record):
+            try:
+                tenures.append(schema.validate_tenure(record))
+                derive.append(position)
+            except ValidationError as e:
+                errors[position] = e.errors
+    for position, field_errors in errors.items():
+        index = records[position][0]
+        results[index] = {'index': index, **error_body(ValidationError(field_errors))}
+    if METRICS_ENABLED:
+        failed = len(chunk) - n + len(errors)
+        if failed:
+            ERRORS.inc(('api_predict_batch', 'ValidationError'), failed)
+    
+    if errors:
+        keep = np.ones(n, dtype=bool)
+        keep[list(errors)] = False
+        columns = {field: values[keep] for field, values in columns.items()}
+        # Re-index the derive positions onto the kept rows
+        kept_position = np.cumsum(keep) - 1
+        derive = kept_position[derive].tolist()
+        records = [pair for pair, kept in zip(records, keep.tolist()) if kept]
+    if derive:
+        # One vectorized EMI pass for every record in the chunk that asked for it
+        columns['debtToIncomeRatio'][derive] = derived_dti(
+            columns['loanAmount'][derive], columns['interestRate'][derive], tenures, columns['income'][derive])
+    if records:
+        points, scores, ratings = evaluate_columns(columns, scorecard)
+        if SHADOW is not None:
+            SHADOW.submit_batch(scorecard, columns, scores, ratings)
+        if AUDIT is not None:
+            columns['loanTenure'] = np.full(len(records), np.nan)
+            columns['loanTenure'][derive] = tenures
+            AUDIT.record_batch('api_predict_batch', columns, scores, ratings, scorecard.version)
+        if METRICS_ENABLED:
+            for rating, count in Counter(ratings.tolist()).items():
+                RATINGS.inc((rating,), count)
+        pd_model = pd_model_for(scorecard)
+        probabilities = pd_model.predict_batch(columns).tolist() if pd_model is not None else repeat(None)
+        for (index, _), factor_points, risk_score, rating, probability in zip(
+                records, points.tolist(), scores.tolist(), ratings, probabilities):
+            results[index] = {'index': index,
+                              **build_prediction(risk_score, ASSESSMENTS[rating], factor_points, scorecard, probability)}
+    
+    for index, _ in chunk:
+        yield json.dumps(results[index]) + '\n'
+
+@app.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """Score a JSON array or NDJSON stream of applicants, streaming NDJSON results back"""
+    stream = request.stream
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = iter_ndjson(stream)
+    else:
+        records = iter_json_array(stream)
+    
+    def generate():
+        chunk = []
+        index = 0
+        while True:
+            # Only the parser's errors mean a malformed array; scoring errors propagate
+            try:
+                record = next(records)
+            except StopIteration:
+                break
+            except ValueError as e:
+                # Malformed array: flush what was read, then report where it stopped
+                yield from score_chunk(chunk)
+                yield json.dumps({'error': str(e)}) + '\n'
+                return
+            chunk.append((index, record))
+            index += 1
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                yield from score_chunk(chunk)
+                chunk = []
+        yield from score_chunk(chunk)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def what_if_option_errors(data, scorecard):
+    """Per-field errors for the /api/what-if search options, in the request schema's style"""
+    errors = {}
+    limit = to_number(data.get('limit', 5))
+    if limit is None or not limit.is_integer():
+        errors['limit'] = 'must be a whole number'
+    elif limit < 0:
+        errors['limit'] = 'must be at least 0'
+    target = data.get('targetRating')
+    if target is not None and target not in scorecard.rating_labels:
+        errors['targetRating'] = 'must be one of ' + ', '.join(scorecard.rating_labels)
+    return errors
+
+@app.route('/api/what-if', methods=['POST'])
+def api_what_if():
+    """Smallest change to each input (and pairs of inputs) that moves the rating"""
+    try:
+        data = request.json
+        scorecard = SCORECARDS.current
+        errors = {}
+        try:
+            input_data = extract_input(data, scorecard=scorecard)
+        except ValidationError as e:
+            if 'body' in e.errors:
+                raise
+            errors.update(e.errors)
+        errors.update(what_if_option_errors(data, scorecard))
+        if errors:
+            raise ValidationError(errors)
+        return jsonify(what_if(
+            input_data,
+            scorecard=scorecard,
+            target=data.get('targetRating'),
+            combine=bool(data.get('combinations', True)),
+            limit=int(to_number(data.get('limit', 5)))
+        ))
+    except Exception as e:
+        if METRICS_ENABLED:
+            ERRORS.inc(('api_what_if', type(e).__name__))
+        return jsonify(error_body(e)), 400
+
+@app.route('/api/cache', methods=['GET'])
+def api_cache():
+    """Hit/miss counters and occupancy of the /api/predict result cache"""
+    return jsonify(RESULT_CACHE.stats())
+
+@app.route('/api/audit', methods=['GET'])
+def api_audit():
+    """Audit log counters for this process (404 when CREDIT_RISK_AUDIT_DIR is unset)"""
+    if AUDIT is None:
+        return jsonify({'error': 'Audit log is disabled'}), 404
+    return jsonify(AUDIT.stats())
+
+@app.route('/api/shadow', methods=['GET'])
+def api_shadow():
+    """Score deltas and rating flips of the shadow scorecard against production (this process)"""
+    if SHADOW is None:
+        return jsonify({'error': 'Shadow scoring is disabled'}), 404
+    return jsonify(SHADOW.report())
+
+@app.route('/api/scorecard', methods=['GET'])
+def api_scorecard():
+    """Versions in use and their reload status"""
+    return jsonify({
+        'production': SCORECARDS.status(),
+        'shadow': CANDIDATES.status() if CANDIDATES is not None else None
+    })
+
+@app.route('/api/scorecard/reload', methods=['POST'])
+def api_scorecard_reload():
+    """Re-read the scorecard files now instead of waiting for the next poll"""
+    for store in (SCORECARDS, CANDIDATES):
+        if store is not None and store.path:
+            store.reload()
+    return api_scorecard()
 
 @app.route('/api/formula', methods=['GET'])
 def api_formula():
     """Return the formula breakdown for transparency"""
+    scorecard = SCORECARDS.current
     return jsonify({
-        'formula': [
-            'Age Factor: 10 points if <25 or >60',
-            'Income: Up to 25 points based on annual income',
-            'Credit Rating: 0-40 points (CIBIL score based)',
-            'Debt-to-Income: Up to 25 points (RBI guideline <50%)',
-            'Employment: Up to 15 points (Stability)',
-            'Payment History: Up to 35 points (Late payments)',
-            'Active Accounts: Up to 12 points (Fewer is better)',
-            'Savings Buffer: Up to 10 points (Emergency fund)',
-            'Loan-to-Value: Up to 20 points (Loan vs Income)',
-            'Interest Rate: Up to 8 points (Rate acceptance)'
-        ],
-        'total': 'Risk Score out of 100',
-        'methodology': 'Mathematical formula based on RBI guidelines and Indian banking standards'
+        'formula': scorecard.formula(),
+        'total': f'Risk Score out of {scorecard.max_score}',
+        'methodology': 'Mathematical formula based on RBI guidelines and Indian banking standards',
+        'version': scorecard.version
     })
 
+def warm_up_predict():
+    """Score a throwaway applicant on the single-applicant path (no NumPy or pandas)"""
+    scorecard = SCORECARDS.current
+    sample = extract_input({}, scorecard=scorecard)
+    calculate_credit_risk(sample)
+    (grid_for(scorecard) or scorecard).evaluate(sample)
+    band_key = scorecard.band_key(sample)
+    if pd_model_for(scorecard) is not None:
+        PD_MODEL.predict_bands(band_key)
+
+def warm_up_batch():
+    """Load NumPy, pandas and the compiled arrays the batch endpoint uses"""
+    from emi import derived_dti
+    scorecard = SCORECARDS.current
+    sample = extract_input({}, scorecard=scorecard)
+    columns, _ = schema_for(scorecard).validate_columns({field: [MISSING] for field in FIELD_DEFAULTS}, 1)
+    evaluate_columns(columns, scorecard)
+    derived_dti(columns['loanAmount'], columns['interestRate'], [5.0], columns['income'])
+    if pd_model_for(scorecard) is not None:
+        PD_MODEL.predict_batch({field: [value] for field, value in sample.items()})
+
+def warm_up(batch=True):
+    """Score a throwaway applicant on every path so first requests skip lazy setup"""
+    STARTUP.run('predict', warm_up_predict)
+    if batch:
+        STARTUP.run('batch', warm_up_batch)
+
+@app.route('/api/ready', methods=['GET'])
+def api_ready():
+    """
+    Readiness probe: 200 once /api/predict is warm, 503 (and warm-up started
+    in the background) before that. Also reports this process's import time,
+    warm-up stages and first request.
+    """
+    ready = STARTUP.is_warm('predict')
+    if not STARTUP.is_warm('batch'):
+        STARTUP.start_in_background(warm_up)
+    body = {
+        'ready': ready,
+        'batch_ready': STARTUP.is_warm('batch'),
+        'scorecard_version': SCORECARDS.current.version,
+        **STARTUP.report()
+    }
+    return jsonify(body), 200 if ready else 503
+
+if METRICS_ENABLED:
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus text exposition of this process's counters and histograms"""
+        return Response(METRICS.render(), content_type=CONTENT_TYPE)
+    
+    app.wsgi_app = RequestMetrics(app.wsgi_app, [rule.rule for rule in app.url_map.iter_rules()],
+                                  REQUESTS, REQUEST_SECONDS)
+
+# Outermost, so the first request is timed including the metrics middleware
+app.wsgi_app = FirstRequestTimer(app.wsgi_app, STARTUP)
+STARTUP.imported()
+
 if __name__ == '__main__':
     print("Starting Flask app on http://localhost:8501")
+    print("Development server only; for production run: gunicorn -c gunicorn.conf.py app:app")
+    # Ready for single predictions now; NumPy and pandas load in the background
+    warm_up(batch=False)
+    STARTUP.start_in_background(warm_up)
     app.run(debug=False, host='0.0.0.0', port=8501, threaded=True)
@@ -0,0 +1,254 @@
+"""
+Asyncio scoring front end with micro-batching.
+
+Concurrent /api/predict calls that arrive within a short window (or until a
+batch fills up) are scored together in one vectorized evaluate_columns() pass,
+and each caller gets its own response. Plain ASGI, so any ASGI server runs it:
+
+    uvicorn async_service:app --port 8502 --workers 4
+
+Tune with CREDIT_RISK_BATCH_WINDOW_MS (default 2) and CREDIT_RISK_BATCH_MAX
+(default 256). GET /api/batching reports queue depth, batch sizes and the
+latency added by waiting for a batch. Decisions go to the same audit log,
+shadow scorer and metrics as app.py's (GET /metrics), one batch at a time.
+If a batch fails to score, its requests are rescored one by one, so only the
+request that broke it gets a 500.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import Counter, deque
+
+from app import (ASSESSMENTS, AUDIT, ERRORS, METRICS, METRICS_ENABLED, RATINGS, SCORECARDS, SHADOW, build_prediction,
+                 error_body, evaluate_columns, extract_input, pd_model_for)
+from metrics import CONTENT_TYPE
+from scorecard import FIELD_DEFAULTS
+
+BATCH_WINDOW_MS = float(os.environ.get('CREDIT_RISK_BATCH_WINDOW_MS', 2))
+BATCH_MAX = int(os.environ.get('CREDIT_RISK_BATCH_MAX', 256))
+
+# Upper edges of the batch-size histogram reported by /api/batching
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MicroBatcher:
+    """Collects concurrent scoring requests and scores them in vectorized batches"""
+
+    def __init__(self, window=BATCH_WINDOW_MS / 1000, max_batch=BATCH_MAX, recent=10000):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = dict.fromkeys(BATCH_SIZE_BUCKETS + (float('inf'),), 0)
+        # Seconds each recent request waited for its batch to be scored
+        self._waits = deque(maxlen=recent)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def score(self, input_data):
+        """(risk_score, rating, factor_points, scorecard, pd) for one applicant, scored with whatever else is queued"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((input_data, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Give other requests up to one window to join, unless the batch is already full
+            if len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[:self.max_batch]
+            self._pending = self._pending[self.max_batch:]
+            self._full.clear()
+            if not self._pending:
+                self._wakeup.clear()
+            elif len(self._pending) >= self.max_batch:
+                self._full.set()
+            if batch:
+                self._score(batch)
+
+    def _score(self, batch):
+        started = time.perf_counter()
+        try:
+            columns = {field: [item[0][field] for item in batch] for field in FIELD_DEFAULTS}
+            # The whole batch scores with one version, even across a hot swap
+            scorecard = SCORECARDS.current
+            points, scores, ratings = evaluate_columns(columns, scorecard)
+            pd_model = pd_model_for(scorecard)
+            probabilities = pd_model.predict_batch(columns).tolist() if pd_model is not None else [None] * len(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                # Score one at a time, so a record that breaks the batch only fails its own request
+                for item in batch:
+                    self._score([item])
+                return
+            _, future, _ = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        for (_, future, queued), factor_points, risk_score, rating, probability in zip(
+                batch, points.tolist(), scores.tolist(), ratings, probabilities):
+            self._waits.append(started - queued)
+            if not future.done():
+                future.set_result((risk_score, rating, factor_points, scorecard, probability))
+        record_batch(batch, columns, scorecard, scores, ratings)
+
+        self.batches += 1
+        self.items += len(batch)
+        for bucket in self.batch_sizes:
+            if len(batch) <= bucket:
+                self.batch_sizes[bucket] += 1
+                break
+
+    def metrics(self):
+        waits = sorted(self._waits)
+
+        def wait_ms(fraction):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(fraction * (len(waits) - 1)))] * 1000, 3)
+
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'queue_depth': len(self._pending),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'requests': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'batch_size_histogram': {
+                ('+Inf' if bucket == float('inf') else str(bucket)): count
+                for bucket, count in self.batch_sizes.items()
+            },
+            'added_latency_ms': {'p50': wait_ms(0.50), 'p99': wait_ms(0.99), 'max': wait_ms(1.0)}
+        }
+
+
+def record_batch(batch, columns, scorecard, scores, ratings):
+    """Hand a scored batch to the shadow scorer, audit log and rating counts (each only when on)"""
+    if SHADOW is not None:
+        SHADOW.submit_batch(scorecard, columns, scores, ratings)
+    if AUDIT is not None:
+        columns['loanTenure'] = [item[0].get('loanTenure', float('nan')) for item in batch]
+        AUDIT.record_batch('async_predict', columns, scores, ratings, scorecard.version)
+    if METRICS_ENABLED:
+        for rating, count in Counter(ratings.tolist()).items():
+            RATINGS.inc((rating,), count)
+
+
+batcher = None
+
+
+def get_batcher():
+    """The process-wide batcher, created inside the running event loop"""
+    global batcher
+    if batcher is None:
+        batcher = MicroBatcher()
+    return batcher
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_text(send, text, content_type):
+    body = text.encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def predict(receive, send):
+    try:
+        data = json.loads(await read_body(receive))
+        input_data = extract_input(data)
+    except Exception as e:
+        if METRICS_ENABLED:
+            ERRORS.inc(('async_predict', type(e).__name__))
+        await send_json(send, error_body(e), 400)
+        return
+    try:
+        risk_score, rating, factor_points, scorecard, probability = await get_batcher().score(input_data)
+        body = build_prediction(risk_score, ASSESSMENTS[rating], factor_points, scorecard, probability)
+    except Exception as e:
+        if METRICS_ENABLED:
+            ERRORS.inc(('async_predict', type(e).__name__))
+        await send_json(send, error_body(e), 500)
+        return
+    await send_json(send, body)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_batcher().start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await get_batcher().stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    route = (scope['method'], scope['path'])
+    if route == ('POST', '/api/predict'):
+        await predict(receive, send)
+    elif route == ('GET', '/api/batching'):
+        await send_json(send, get_batcher().metrics())
+    elif route == ('GET', '/metrics') and METRICS_ENABLED:
+        await send_text(send, METRICS.render(), CONTENT_TYPE)
+    else:
+        await send_json(send, {'error': 'Not found'}, 404)
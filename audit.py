@@ -0,0 +1,372 @@
+"""
+Append-only audit log of scoring decisions.
+
+Every scored request is appended to an in-memory buffer; a background thread
+drains it in batches into Arrow IPC stream segments (one file per segment,
+rotated by row count), each row tagged with the scorecard version that
+scored it. The request path only appends to a deque, so it never waits on
+the disk; if the writer falls behind by more than `max_pending` entries (a
+request or a batch chunk each), new ones are dropped and counted rather than
+blocking. Rows whose write fails are counted as dropped too.
+
+Replay memory-maps the segments and rescores them in bulk to confirm every
+recorded score reproduces:
+
+    python audit.py audit_log/
+    python audit.py audit_log/ --scorecard scorecards/1.1.json    # rows scored by a config-file version
+    python audit.py audit_log/audit-20260101T000000-1234-0001.arrows --show 20
+"""
+import argparse
+import atexit
+import glob
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+NUMERIC_FIELDS = tuple(field for field, default in FIELD_DEFAULTS.items() if not isinstance(default, str))
+SEGMENT_SUFFIX = '.arrows'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise SystemExit('The audit log needs pyarrow: pip install pyarrow')
+    return pyarrow
+
+
+def audit_schema(pa):
+    """Arrow schema of a segment: when, where, which scorecard, the inputs as scored, and the result"""
+    return pa.schema(
+        [('timestamp', pa.timestamp('us', tz='UTC')),
+         ('endpoint', pa.string()),
+         ('scorecard_version', pa.string())]
+        + [(field, pa.float64()) for field in NUMERIC_FIELDS]
+        + [('creditRating', pa.string()),
+           # Only set when the DTI was derived from the loan terms
+           ('loanTenure', pa.float64()),
+           ('risk_score', pa.int32()),
+           ('rating', pa.string())]
+    )
+
+
+def _rows(entry):
+    """Rows in a queued entry: a batch carries its scores as an array, a single row as a number"""
+    return len(entry[3]) if isinstance(entry[3], np.ndarray) else 1
+
+
+class AuditLog:
+    """Non-blocking audit sink writing rotating Arrow IPC segments from a background thread"""
+
+    def __init__(self, directory, version=None, flush_entries=1000, flush_interval=1.0,
+                 segment_rows=1_000_000, max_pending=100_000):
+        self.pa = _require_pyarrow()
+        self.directory = directory
+        self.version = SCORECARD.version if version is None else version
+        self.flush_entries = flush_entries
+        self.flush_interval = flush_interval
+        self.segment_rows = segment_rows
+        self.max_pending = max_pending
+        self.schema = audit_schema(self.pa)
+        os.makedirs(directory, exist_ok=True)
+
+        # Entries are one row (time, endpoint, input_data, score, rating,
+        # version) or a whole batch (time, endpoint, columns, scores, ratings,
+        # version). deque appends and pops are atomic, so the request path
+        # takes no lock.
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._writer = None
+        self._segment = None
+        self._segment_count = 0
+        self._segment_written = 0
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0
+        self.write_errors = 0
+        self.last_error = None
+        # A forked gunicorn worker starts with an empty queue and its own writer
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pending.clear()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._writer = None
+        self._segment = None
+        self._segment_count = 0
+        self._segment_written = 0
+        self._stop.clear()
+        self.written = self.dropped = self.segments = self.write_errors = 0
+        self.last_error = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _append(self, entry):
+        if self._thread is None:
+            self._start()
+        pending = self._pending
+        if len(pending) >= self.max_pending:
+            with self._lock:
+                self.dropped += _rows(entry)
+            return
+        pending.append(entry)
+        if len(pending) >= self.flush_entries:
+            self._wake.set()
+
+    def record(self, endpoint, input_data, risk_score, rating, version=None):
+        """Queue one scored request (input_data as scored, after coercion and DTI derivation)"""
+        self._append((time.time(), endpoint, input_data, risk_score, rating, version or self.version))
+
+    def record_batch(self, endpoint, columns, scores, ratings, version=None):
+        """Queue a scored batch: input columns as passed to evaluate_batch, plus its score and rating arrays"""
+        if len(scores):
+            self._append((time.time(), endpoint, columns, np.asarray(scores), ratings, version or self.version))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+        self._close_segment()
+
+    def _drain(self):
+        entries = []
+        pending = self._pending
+        for _ in range(len(pending)):
+            entries.append(pending.popleft())
+        return entries
+
+    def _to_batch(self, entries):
+        """One Arrow record batch from queued rows and batches, in arrival order"""
+        pa = self.pa
+        parts = {name: [] for name in self.schema.names}
+
+        def add_rows(rows):
+            if not rows:
+                return
+            parts['timestamp'].append(np.array([row[0] for row in rows]))
+            parts['endpoint'].append(np.array([row[1] for row in rows], dtype=object))
+            for field in NUMERIC_FIELDS:
+                parts[field].append(np.array([row[2][field] for row in rows], dtype=float))
+            parts['creditRating'].append(np.array([row[2]['creditRating'] for row in rows], dtype=object))
+            parts['loanTenure'].append(np.array([row[2].get('loanTenure', np.nan) for row in rows], dtype=float))
+            parts['risk_score'].append(np.array([row[3] for row in rows], dtype=np.int32))
+            parts['rating'].append(np.array([row[4] for row in rows], dtype=object))
+            parts['scorecard_version'].append(np.array([row[5] for row in rows], dtype=object))
+            rows.clear()
+
+        rows = []
+        for entry in entries:
+            # A batch carries its scores as an array, a single row as a number
+            if not isinstance(entry[3], np.ndarray):
+                rows.append(entry)
+                continue
+            add_rows(rows)
+            stamp, endpoint, columns, scores, ratings, version = entry
+            n = len(scores)
+            parts['timestamp'].append(np.full(n, stamp))
+            parts['endpoint'].append(np.full(n, endpoint, dtype=object))
+            for field in NUMERIC_FIELDS:
+                parts[field].append(np.asarray(columns[field], dtype=float))
+            parts['creditRating'].append(np.asarray(columns['creditRating'], dtype=object))
+            parts['loanTenure'].append(np.asarray(columns.get('loanTenure', np.full(n, np.nan)), dtype=float))
+            parts['risk_score'].append(np.asarray(scores, dtype=np.int32))
+            parts['rating'].append(np.asarray(ratings, dtype=object))
+            parts['scorecard_version'].append(np.full(n, version, dtype=object))
+        add_rows(rows)
+
+        arrays = []
+        for field in self.schema:
+            values = np.concatenate(parts[field.name])
+            if field.name == 'timestamp':
+                arrays.append(pa.array((values * 1e6).astype(np.int64)).cast(field.type))
+            else:
+                # NaN tenure (not derived) is stored as null
+                arrays.append(pa.array(values, type=field.type, from_pandas=field.name == 'loanTenure'))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def flush(self):
+        """Write everything queued so far (called by the writer thread)"""
+        entries = self._drain()
+        if not entries:
+            return
+        try:
+            batch = self._to_batch(entries)
+            if self._writer is None:
+                self._open_segment()
+            self._writer.write_batch(batch)
+            self._segment_written += batch.num_rows
+            self.written += batch.num_rows
+            if self._segment_written >= self.segment_rows:
+                self._close_segment()
+        except Exception as e:
+            # The drained rows are lost: count them, and start a new segment
+            # next time in case the writer is what broke
+            with self._lock:
+                self.dropped += sum(map(_rows, entries))
+            self.write_errors += 1
+            self.last_error = f'{type(e).__name__}: {e}'
+            try:
+                self._close_segment()
+            except Exception:
+                self._writer = None
+
+    def _open_segment(self):
+        self._segment_count += 1
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        self._segment = os.path.join(self.directory, f'audit-{stamp}-{os.getpid()}-{self._segment_count:04d}{SEGMENT_SUFFIX}')
+        self._writer = self.pa.ipc.new_stream(self._segment, self.schema)
+        self._segment_written = 0
+        self.segments += 1
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self):
+        """Flush the buffer and close the open segment"""
+        if self._thread is not None and self._thread.is_alive():
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+
+    def stats(self):
+        return {
+            'directory': self.directory,
+            'scorecard_version': self.version,
+            'pending': len(self._pending),
+            'written': self.written,
+            'dropped': self.dropped,
+            'segments': self.segments,
+            'write_errors': self.write_errors,
+            'last_error': self.last_error
+        }
+
+
+def segment_paths(paths):
+    """Segment files named directly or found in the given directories, oldest first"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, '*' + SEGMENT_SUFFIX))))
+        else:
+            found.append(path)
+    return found
+
+
+def read_segment(path):
+    """Memory-map one segment and return its table (complete batches only if the file was cut short)"""
+    pa = _require_pyarrow()
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_stream(source)
+        batches = []
+        try:
+            for batch in reader:
+                batches.append(batch)
+        except pa.ArrowInvalid:
+            # A writer killed mid-batch leaves a truncated tail
+            pass
+        return pa.Table.from_batches(batches, schema=reader.schema)
+
+
+def replay_segment(path, scorecards=(SCORECARD,), show=0):
+    """
+    Rescore one segment in bulk and compare with the recorded results.
+
+    Each row is rescored with the scorecard of its recorded version; rows of
+    versions not in `scorecards` are counted as skipped.
+    Returns {'rows', 'checked', 'skipped', 'mismatches', 'examples'}.
+    """
+    from batch_scoring import evaluate_batch
+
+    table = read_segment(path)
+    rows = table.num_rows
+    versions = table.column('scorecard_version').to_numpy(zero_copy_only=False)
+    numeric = {field: table.column(field).to_numpy() for field in NUMERIC_FIELDS}
+    credit_rating = table.column('creditRating').to_numpy(zero_copy_only=False)
+    recorded = table.column('risk_score').to_numpy()
+    recorded_ratings = table.column('rating').to_numpy(zero_copy_only=False)
+
+    checked = 0
+    mismatches = 0
+    examples = []
+    for scorecard in scorecards:
+        selected = np.flatnonzero(versions == scorecard.version)
+        if not len(selected):
+            continue
+        columns = {field: values[selected] for field, values in numeric.items()}
+        columns['creditRating'] = credit_rating[selected]
+        _, scores, ratings = evaluate_batch(columns, scorecard)
+        mismatched = np.flatnonzero((scores != recorded[selected]) | (ratings != recorded_ratings[selected]))
+        checked += len(selected)
+        mismatches += len(mismatched)
+        for position in mismatched[:max(show - len(examples), 0)].tolist():
+            row = int(selected[position])
+            examples.append({
+                'row': row,
+                'version': scorecard.version,
+                'recorded': (int(recorded[row]), recorded_ratings[row]),
+                'replayed': (int(scores[position]), ratings[position])
+            })
+    return {
+        'rows': rows,
+        'checked': checked,
+        'skipped': rows - checked,
+        'mismatches': mismatches,
+        'examples': examples
+    }
+
+
+def main(argv=None):
+    from scorecard import load_scorecard
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='segment files or audit log directories')
+    parser.add_argument('--scorecard', action='append', default=[], metavar='JSON',
+                        help='scorecard config file for rows of that version (repeatable; the built-in one is always used)')
+    parser.add_argument('--show', type=int, default=5, help='mismatching rows to print per segment (default: 5)')
+    args = parser.parse_args(argv)
+
+    scorecards = {SCORECARD.version: SCORECARD}
+    for path in args.scorecard:
+        scorecard = load_scorecard(path)
+        scorecards[scorecard.version] = scorecard
+
+    start = time.perf_counter()
+    totals = {'rows': 0, 'checked': 0, 'skipped': 0, 'mismatches': 0}
+    for path in segment_paths(args.paths):
+        result = replay_segment(path, tuple(scorecards.values()), show=args.show)
+        for key in totals:
+            totals[key] += result[key]
+        print(f"{os.path.basename(path)}: {result['checked']:,} rescored, {result['mismatches']:,} mismatches"
+              + (f", {result['skipped']:,} from unknown scorecard versions" if result['skipped'] else ''))
+        for example in result['examples']:
+            print(f"  row {example['row']} (scorecard {example['version']}): "
+                  f"recorded {example['recorded']}, replayed {example['replayed']}")
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {totals['checked']:,} of {totals['rows']:,} rows in {elapsed:.2f}s "
+          f"against scorecard {', '.join(scorecards)}: {totals['mismatches']:,} mismatches")
+    return 1 if totals['mismatches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
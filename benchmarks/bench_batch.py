@@ -0,0 +1,51 @@
+"""
+Compare the per-row calculate_credit_risk() loop against batch_scoring.score_batch().
+
+    python benchmarks/bench_batch.py --rows 200000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import iter_rows, make_population
+
+from app import calculate_credit_risk, get_indian_credit_assessment
+from batch_scoring import score_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = make_population(args.rows, seed=args.seed)
+    rows = list(iter_rows(data))
+
+    start = time.perf_counter()
+    loop_scores = []
+    loop_ratings = []
+    for row in rows:
+        score = calculate_credit_risk(row)
+        loop_scores.append(score)
+        loop_ratings.append(get_indian_credit_assessment(score)['rating'])
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_scores, batch_ratings = score_batch(data)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = int(np.count_nonzero(batch_scores != np.asarray(loop_scores)))
+    mismatches += int(np.count_nonzero(batch_ratings != np.asarray(loop_ratings, dtype=object)))
+
+    print(f"Rows:           {args.rows:,}")
+    print(f"Per-row loop:   {args.rows / loop_seconds:,.0f} rows/sec ({loop_seconds:.3f}s)")
+    print(f"Batch scorer:   {args.rows / batch_seconds:,.0f} rows/sec ({batch_seconds:.3f}s)")
+    print(f"Speedup:        {loop_seconds / batch_seconds:.1f}x")
+    print(f"Mismatches:     {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+"""
+Compare the memory-mapped risk grid against the branchy scorecard path.
+
+    python benchmarks/bench_grid.py --rows 200000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import iter_rows, make_population
+
+from batch_scoring import score_batch
+from risk_grid import load_grid, verify
+from scorecard import SCORECARD
+
+
+def rate(rows, seconds):
+    return f"{rows / seconds:,.0f} rows/sec ({seconds:.3f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-verify', action='store_true', help='skip the full-grid verification pass')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    grid = load_grid(SCORECARD)
+    print(f"Grid:              {grid.table.shape} = {grid.table.size:,} cells, loaded in {time.perf_counter() - start:.3f}s")
+
+    mismatches = 0
+    if not args.skip_verify:
+        start = time.perf_counter()
+        mismatches = verify(grid)
+        print(f"Verify:            {mismatches} mismatching cells ({time.perf_counter() - start:.2f}s)")
+
+    data = make_population(args.rows, seed=args.seed)
+    rows = list(iter_rows(data))
+
+    start = time.perf_counter()
+    branchy = [SCORECARD.score(row) for row in rows]
+    branchy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looked_up = [grid.score(row) for row in rows]
+    grid_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_scores, _ = score_batch(data)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grid_scores, _ = grid.score_batch(data)
+    grid_batch_seconds = time.perf_counter() - start
+
+    mismatches += sum(a != b for a, b in zip(branchy, looked_up))
+    mismatches += int(np.count_nonzero(batch_scores != grid_scores))
+    mismatches += int(np.count_nonzero(batch_scores != np.asarray(branchy)))
+
+    print(f"Scalar scorecard:  {rate(args.rows, branchy_seconds)}")
+    print(f"Scalar grid:       {rate(args.rows, grid_seconds)}")
+    print(f"Batch scorecard:   {rate(args.rows, batch_seconds)}")
+    print(f"Batch grid:        {rate(args.rows, grid_batch_seconds)}")
+    print(f"Mismatches:        {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+Cold-start report: import time and first-request latency of fresh processes.
+
+Each run starts a new interpreter and measures, in order:
+
+    core        import scorecard + schema (the scoring core: no Flask, NumPy or pandas)
+    app         import app (Flask and the single-applicant path)
+    predict     first /api/predict through the test client
+    batch       first /api/predict/batch (loads NumPy and pandas on demand)
+    warm_up     app.warm_up() in a process that has not served anything yet
+
+The median of --runs processes is reported, with the slowest imports from
+`python -X importtime -c "import app"`. Results can be saved as a JSON
+baseline and later runs compared against it, like bench_suite.py.
+
+    python benchmarks/bench_startup.py --save-baseline
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import ROOT
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'startup_baseline.json')
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+import scorecard, schema
+core = time.perf_counter()
+heavy_after_core = [name for name in ('flask', 'numpy', 'pandas') if name in sys.modules]
+import app
+imported = time.perf_counter()
+heavy_after_app = [name for name in ('numpy', 'pandas') if name in sys.modules]
+client = app.app.test_client()
+if sys.argv[1] == 'warm_up':
+    app.warm_up()
+    first = time.perf_counter()
+    print(json.dumps({'core': core - started, 'app': imported - core, 'warm_up': first - imported,
+                      'heavy_after_core': heavy_after_core, 'heavy_after_app': heavy_after_app}))
+    sys.exit(0)
+client.post('/api/predict', json={'income': 600000, 'creditRating': 'Good'})
+predicted = time.perf_counter()
+client.post('/api/predict/batch', json=[{'income': 600000, 'creditRating': 'Good'}]).get_data()
+batched = time.perf_counter()
+print(json.dumps({'core': core - started, 'app': imported - core, 'predict': predicted - imported,
+                  'batch': batched - predicted, 'heavy_after_core': heavy_after_core,
+                  'heavy_after_app': heavy_after_app}))
+'''
+
+
+def probe(mode):
+    env = dict(os.environ, CREDIT_RISK_SCORECARD_POLL='0')
+    output = subprocess.run([sys.executable, '-c', PROBE, mode], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """(cumulative seconds, module) of the slowest top-level imports under `import app`"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # A module is listed after its imports: the one-level-deep entries just
+        # before ' app' are what app.py imported (earlier ones belong to site)
+        if not name.startswith('  '):
+            if name.strip() == 'app':
+                break
+            timings = []
+        elif not name.startswith('    '):
+            timings.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(timings, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per measurement (median kept)')
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to list')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before flagging (default: 0.25)')
+    parser.add_argument('--output', help='also write this run\'s report as JSON')
+    args = parser.parse_args()
+
+    requests = [probe('requests') for _ in range(args.runs)]
+    warm_ups = [probe('warm_up') for _ in range(args.runs)]
+    timings = {
+        'core': statistics.median(run['core'] for run in requests + warm_ups),
+        'app': statistics.median(run['app'] for run in requests + warm_ups),
+        'predict': statistics.median(run['predict'] for run in requests),
+        'batch': statistics.median(run['batch'] for run in requests),
+        'warm_up': statistics.median(run['warm_up'] for run in warm_ups)
+    }
+    report = {
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'seconds': {name: round(value, 5) for name, value in timings.items()},
+        'loaded_by_core': requests[0]['heavy_after_core'],
+        'loaded_by_app': requests[0]['heavy_after_app'],
+        'slowest_imports': [[name, round(seconds, 5)] for seconds, name in slowest_imports(args.top)]
+    }
+
+    print(f'Median of {args.runs} fresh processes')
+    for name, value in timings.items():
+        print(f'{name:<10} {value * 1000:>9.1f} ms')
+    print(f"import scorecard, schema loads: {', '.join(report['loaded_by_core']) or 'nothing heavy'}")
+    print(f"import app loads: {', '.join(report['loaded_by_app']) or 'no NumPy or pandas'}")
+    print('Slowest imports made by app.py (cumulative):')
+    for name, seconds in report['slowest_imports']:
+        print(f'  {name:<20} {seconds * 1000:>9.1f} ms')
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        flags = [f"{name}: {value * 1000:.1f} ms, baseline {baseline['seconds'][name] * 1000:.1f} ms"
+                 for name, value in timings.items()
+                 if name in baseline.get('seconds', {}) and value > baseline['seconds'][name] * (1 + args.tolerance)]
+        for flag in flags:
+            print(f'REGRESSION: {flag}')
+        if flags:
+            status = 1
+        else:
+            print(f'No regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f'Wrote baseline {args.baseline}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
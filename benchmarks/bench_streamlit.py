@@ -0,0 +1,90 @@
+"""
+Measure Streamlit rerun time and per-session memory for the UI script.
+
+Each iteration changes the income input and presses the assess button, the
+same interaction for any version of the script, so older revisions can be
+compared directly:
+
+    python benchmarks/bench_streamlit.py
+    git show <rev>:streamlit_app.py > /tmp/old_app.py
+    python benchmarks/bench_streamlit.py --script /tmp/old_app.py
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+
+from common import ROOT
+
+from streamlit.testing.v1 import AppTest
+
+
+def compile_time(script, repeat=20):
+    """
+    Median time to compile the script. AppTest recompiles it on every run,
+    which a server does once, so rerun times include this and it is reported
+    next to them: compare scripts of different lengths with that in mind.
+    """
+    with open(script, encoding='utf-8') as handle:
+        source = handle.read()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compile(source, script, 'exec')
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def rerun(app_test, income):
+    app_test.number_input[1].set_value(income)
+    app_test.button[0].click()
+    app_test.run(timeout=30)
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default=os.path.join(ROOT, 'streamlit_app.py'))
+    parser.add_argument('--reruns', type=int, default=50)
+    parser.add_argument('--sessions', type=int, default=5, help='sessions to average memory over')
+    parser.add_argument('--rounds', type=int, default=3, help='timing rounds, the fastest median is kept')
+    args = parser.parse_args()
+
+    # Warm imports and shared caches so they are not charged to the first session
+    rerun(AppTest.from_file(args.script).run(timeout=30), 500000)
+
+    tracemalloc.start()
+    retained = []
+    for _ in range(args.sessions):
+        before = tracemalloc.take_snapshot()
+        session = AppTest.from_file(args.script).run(timeout=30)
+        rerun(session, 500000)
+        after = tracemalloc.take_snapshot()
+        retained.append(sum(stat.size_diff for stat in after.compare_to(before, 'filename')))
+        del session
+    tracemalloc.stop()
+
+    session = AppTest.from_file(args.script).run(timeout=30)
+    rounds = []
+    for _ in range(args.rounds):
+        run = []
+        for i in range(args.reruns):
+            # Cycle through a few incomes so cached paths see both hits and misses
+            start = time.perf_counter()
+            rerun(session, 400000 + (i % 10) * 50000)
+            run.append(time.perf_counter() - start)
+        rounds.append(sorted(run))
+    # One noisy round on a shared machine should not decide a comparison
+    timings = min(rounds, key=statistics.median)
+    compiling = compile_time(args.script)
+    print(f"Script:           {args.script}")
+    print(f"Rerun median:     {statistics.median(timings) * 1000:.1f} ms")
+    print(f"Rerun p90:        {timings[int(0.9 * (len(timings) - 1))] * 1000:.1f} ms")
+    print(f"Script compile:   {compiling * 1000:.1f} ms of each rerun (a server compiles once)")
+    print(f"Session memory:   {statistics.mean(retained) / 1024:.0f} KiB allocated per session")
+
+
+if __name__ == '__main__':
+    main()
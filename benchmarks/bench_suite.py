@@ -0,0 +1,249 @@
+"""
+Equivalence and performance suite for every scoring path.
+
+Scores one seeded population (random applicants plus rows on every band
+edge) through each path and checks that all of them agree exactly on score
+and rating with the original if/elif ladders (golden.py):
+
+    scalar      CompiledScorecard.score()
+    evaluate    CompiledScorecard.evaluate(), used by /api/predict and Streamlit
+    cached      band_key() + score_bands(), the result-cache path
+    batch       batch_scoring.score_batch()
+    evaluate_batch  batch_scoring.evaluate_batch(), used by /api/predict/batch
+    grid        risk_grid lookup table: score, evaluate and their batch forms (CREDIT_RISK_GRID=1)
+    api         /api/predict through the Flask test client, cache miss then hit
+
+It records rows/sec and p99 latency per path (per call for scalar paths, per
+1,000-row chunk for batch paths) and compares them with a JSON baseline:
+a path more than --tolerance slower, or scores that differ from the
+baseline's for the same population, is flagged and the exit status is 1.
+
+    python benchmarks/bench_suite.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/bench_suite.py                      # compare against it
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from common import ROOT, edge_population, iter_rows, make_population
+from golden import legacy_rating, legacy_score
+
+from batch_scoring import evaluate_batch, score_batch
+from scorecard import SCORECARD
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+CHUNK = 1000
+
+
+def digest(*arrays):
+    sha = hashlib.sha256()
+    for array in arrays:
+        sha.update(np.ascontiguousarray(np.asarray(array).astype(str)).tobytes())
+    return sha.hexdigest()[:16]
+
+
+def population(rows, seed):
+    data = make_population(rows, seed=seed)
+    edges = edge_population(SCORECARD)
+    return {field: np.concatenate([data[field], edges[field]]) for field in data}
+
+
+def p99(latencies):
+    """p99 in µs of each call's fastest run, so one noisy repeat does not move it"""
+    return float(np.percentile(np.min(latencies, axis=0), 99)) * 1e6
+
+
+def run_scalar(function, rows, repeat):
+    """(outputs, best rows/sec, p99 µs per call)"""
+    outputs = [function(row) for row in rows]
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            function(row)
+        best = max(best, len(rows) / (time.perf_counter() - start))
+    clock = time.perf_counter
+    latencies = []
+    for _ in range(repeat):
+        run = []
+        for row in rows:
+            start = clock()
+            function(row)
+            run.append(clock() - start)
+        latencies.append(run)
+    return outputs, best, p99(latencies)
+
+
+def run_batch(function, data, repeat):
+    """(outputs, best rows/sec, p99 µs per chunk) for function(columns) -> (scores, ratings)"""
+    n = len(next(iter(data.values())))
+    chunks = [{field: values[start:start + CHUNK] for field, values in data.items()} for start in range(0, n, CHUNK)]
+    outputs = function(data)
+    best = 0.0
+    latencies = []
+    for _ in range(repeat):
+        run = []
+        for chunk in chunks:
+            start = time.perf_counter()
+            function(chunk)
+            run.append(time.perf_counter() - start)
+        best = max(best, n / sum(run))
+        latencies.append(run)
+    return outputs, best, p99(latencies)
+
+
+def run_api(rows):
+    """Scores and ratings from /api/predict for rows that pass validation: first uncached, then cached"""
+    from app import RESULT_CACHE, app
+
+    client = app.test_client()
+    RESULT_CACHE.clear()
+    results = {}
+    for label in ('api_miss', 'api_hit'):
+        outputs = []
+        latencies = []
+        for row in rows:
+            start = time.perf_counter()
+            body = client.post('/api/predict', json=row).get_json()
+            latencies.append(time.perf_counter() - start)
+            outputs.append((body['risk_score'], body['rating']))
+        results[label] = (outputs, len(rows) / sum(latencies), p99([latencies]))
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Human-readable regressions of this run against a baseline report"""
+    flags = []
+    if baseline.get('population') == report['population'] and baseline.get('scores') != report['scores']:
+        flags.append(f"scores differ from the baseline for the same population ({baseline['scores']} -> {report['scores']})")
+    for name, result in report['paths'].items():
+        before = baseline.get('paths', {}).get(name)
+        if not before:
+            continue
+        if result['rows_per_sec'] < before['rows_per_sec'] * (1 - tolerance):
+            flags.append(f"{name}: {result['rows_per_sec']:,.0f} rows/sec, baseline {before['rows_per_sec']:,.0f}")
+        if result['p99_us'] > before['p99_us'] * (1 + tolerance):
+            flags.append(f"{name}: p99 {result['p99_us']:,.1f}µs, baseline {before['p99_us']:,.1f}µs")
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='random applicants (edge rows are added)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per path, best is kept')
+    parser.add_argument('--api-rows', type=int, default=2000, help='applicants sent through /api/predict (0 skips)')
+    parser.add_argument('--skip-grid', action='store_true', help='skip the lookup-table paths')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before flagging (default: 0.2)')
+    parser.add_argument('--output', help='also write this run\'s report as JSON')
+    args = parser.parse_args()
+
+    data = population(args.rows, args.seed)
+    rows = list(iter_rows(data))
+    n = len(rows)
+
+    reference = [legacy_score(row) for row in rows]
+    reference_ratings = [legacy_rating(score) for score in reference]
+    results = {}
+
+    def scored(function):
+        return lambda row: (lambda score: (score, SCORECARD.rating(score)))(function(row))
+
+    results['scalar'] = run_scalar(scored(SCORECARD.score), rows, args.repeat)
+    results['evaluate'] = run_scalar(scored(lambda row: SCORECARD.evaluate(row).score), rows, args.repeat)
+    results['cached'] = run_scalar(scored(lambda row: SCORECARD.score_bands(SCORECARD.band_key(row))), rows, args.repeat)
+
+    def pairs(scores_and_ratings):
+        scores, ratings = scores_and_ratings
+        return list(zip(scores.tolist(), ratings.tolist()))
+
+    for name, function in (('batch', score_batch), ('evaluate_batch', lambda d: evaluate_batch(d)[1:])):
+        outputs, rate, latency = run_batch(function, data, args.repeat)
+        results[name] = (pairs(outputs), rate, latency)
+
+    if not args.skip_grid:
+        from risk_grid import load_grid
+        grid = load_grid(SCORECARD)
+        results['grid'] = run_scalar(scored(grid.score), rows, args.repeat)
+        results['grid_evaluate'] = run_scalar(scored(lambda row: grid.evaluate(row).score), rows, args.repeat)
+        for name, function in (('grid_batch', grid.score_batch), ('grid_evaluate_batch', lambda d: grid.evaluate_batch(d)[1:])):
+            outputs, rate, latency = run_batch(function, data, args.repeat)
+            results[name] = (pairs(outputs), rate, latency)
+
+    api_mismatches = {}
+    if args.api_rows:
+        from schema import REQUEST_SCHEMA, ValidationError
+        valid = []
+        for position, row in enumerate(rows):
+            try:
+                REQUEST_SCHEMA.validate(row)
+            except ValidationError:
+                continue
+            valid.append(position)
+            if len(valid) >= args.api_rows:
+                break
+        for name, (outputs, rate, latency) in run_api([rows[position] for position in valid]).items():
+            expected = [(reference[position], reference_ratings[position]) for position in valid]
+            api_mismatches[name] = sum(a != b for a, b in zip(outputs, expected))
+            results[name] = (None, rate, latency)
+
+    expected = list(zip(reference, reference_ratings))
+    report = {
+        'rows': n,
+        'seed': args.seed,
+        'scorecard_version': SCORECARD.version,
+        'population': digest(*data.values()),
+        'scores': digest(reference, reference_ratings),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'paths': {}
+    }
+    mismatches = 0
+    print(f"{n:,} applicants (seed {args.seed}, population {report['population']}, scores {report['scores']})")
+    for name, (outputs, rate, latency) in results.items():
+        if outputs is None:
+            wrong = api_mismatches[name]
+        else:
+            wrong = sum(a != b for a, b in zip(outputs, expected))
+        mismatches += wrong
+        unit = 'chunk' if 'batch' in name else 'call'
+        report['paths'][name] = {'rows_per_sec': round(rate, 1), 'p99_us': round(latency, 2), 'mismatches': wrong}
+        print(f"{name:<19} {rate:>13,.0f} rows/sec   p99 {latency:>10,.1f}µs/{unit:<5}  mismatches {wrong}")
+
+    status = 0
+    if mismatches:
+        print(f'FAIL: {mismatches} results disagree with the original scoring ladders')
+        status = 1
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        flags = compare(report, baseline, args.tolerance)
+        for flag in flags:
+            print(f'REGRESSION: {flag}')
+        if flags:
+            status = 1
+        else:
+            print(f'No regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f'Wrote baseline {args.baseline}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import os
+import sys
+
+import numpy as np
+
+# Make the modules next to app.py importable when run as `python benchmarks/<script>.py`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CREDIT_RATINGS = ['Excellent', 'Good', 'Average', 'Fair', 'Poor', 'No History']
+
+# Band edges of every factor, so the population exercises each boundary
+EDGES = {
+    'age': [25, 30, 55, 60],
+    'income': [150000, 300000, 500000, 1000000],
+    'debtToIncomeRatio': [0.20, 0.35, 0.50, 0.70],
+    'employmentLength': [1, 2, 5],
+    'numAccounts': [4, 7, 10],
+    'latePayments': [0, 2, 5],
+    'loanAmount': [],
+    'interestRate': [9, 12, 15],
+    'savingsBalance': []
+}
+
+RANGES = {
+    'age': (18, 100),
+    'income': (0, 3000000),
+    'debtToIncomeRatio': (0.0, 1.0),
+    'employmentLength': (0, 50),
+    'numAccounts': (0, 20),
+    'latePayments': (0, 20),
+    'loanAmount': (0, 10000000),
+    'interestRate': (0.0, 30.0),
+    'savingsBalance': (0, 2000000)
+}
+
+
+def make_population(n, seed=0, edge_fraction=0.25):
+    """
+    Seeded synthetic applicants as a dict of NumPy arrays.
+
+    Most values are uniform over the Streamlit widget ranges; edge_fraction of
+    them are pinned to a band edge or the float just either side of it.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for field, (low, high) in RANGES.items():
+        values = rng.uniform(low, high, n)
+        edges = np.asarray(EDGES[field], dtype=float)
+        if len(edges):
+            pick = rng.random(n) < edge_fraction
+            chosen = edges[rng.integers(0, len(edges), pick.sum())]
+            nudge = rng.integers(-1, 2, pick.sum())
+            chosen = np.where(nudge < 0, np.nextafter(chosen, -np.inf), chosen)
+            chosen = np.where(nudge > 0, np.nextafter(chosen, np.inf), chosen)
+            values[pick] = chosen
+        data[field] = values
+    data['creditRating'] = np.array(CREDIT_RATINGS, dtype=object)[rng.integers(0, len(CREDIT_RATINGS), n)]
+    return data
+
+
+def iter_rows(data):
+    """Yield per-applicant dicts in the shape calculate_credit_risk() expects."""
+    fields = list(data)
+    columns = [data[f].tolist() for f in fields]
+    for values in zip(*columns):
+        yield dict(zip(fields, values))
+
+
+def edge_population(scorecard):
+    """
+    Deterministic applicants that sit on every breakpoint of every factor.
+
+    Each row starts from a mid-band applicant and moves one input to a
+    breakpoint or the float just either side of it; ratio factors are hit by
+    moving the loan amount or savings against a fixed income. Every category,
+    an unknown rating and NaN inputs are included too.
+    """
+    base = {'age': 40.0, 'income': 600000.0, 'creditRating': 'Good', 'debtToIncomeRatio': 0.3,
+            'employmentLength': 6.0, 'numAccounts': 3.0, 'latePayments': 1.0, 'loanAmount': 600000.0,
+            'interestRate': 10.0, 'savingsBalance': 200000.0}
+    # Raw field and the value that puts a ratio input exactly on `edge`
+    ratios = {
+        'loanToIncome': ('loanAmount', lambda edge: edge * base['income'] / 100),
+        'savingsMonths': ('savingsBalance', lambda edge: edge * base['income'] / 12)
+    }
+    rows = []
+    for factor in scorecard.definition['factors']:
+        key = factor['input']
+        if 'categories' in factor:
+            for name in list(factor['categories']) + ['Unknown']:
+                rows.append(dict(base, **{key: name}))
+            continue
+        field, to_raw = ratios.get(key, (key, lambda edge: edge))
+        for _, edge in factor['breakpoints']:
+            value = float(to_raw(edge))
+            for nudged in (np.nextafter(value, -np.inf), value, np.nextafter(value, np.inf)):
+                rows.append(dict(base, **{field: float(nudged)}))
+        rows.append(dict(base, **{field: float('nan')}))
+    return {field: np.array([row[field] for row in rows], dtype=object if field == 'creditRating' else float)
+            for field in base}
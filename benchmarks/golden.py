@@ -0,0 +1,209 @@
+"""
+Golden scores from the original if/elif scoring ladders.
+
+Every scoring path is a rewrite of the ladders app.py shipped with before the
+scorecard table existed, so agreeing with CompiledScorecard.score() alone
+proves nothing if the table itself is wrong. legacy_score() and
+legacy_rating() below are those ladders, copied unchanged apart from the
+names. golden.json holds their results for the band-edge population (every
+breakpoint, the floats either side, NaN, -0.0, infinities and an unknown
+category) and a seeded random sample. tests/test_golden.py checks every path
+against it, and bench_suite.py uses the ladders as its reference.
+
+    python benchmarks/golden.py              # rewrite golden.json
+    python benchmarks/golden.py --check      # exit 1 if golden.json is stale
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from common import ROOT, edge_population, iter_rows, make_population
+
+from scorecard import SCORECARD
+
+GOLDEN = os.path.join(ROOT, 'benchmarks', 'golden.json')
+RANDOM_ROWS = 1000
+SEED = 0
+
+
+def legacy_score(input_data):
+    """calculate_credit_risk() as first released: risk score 0-100, higher = more risk"""
+    age = input_data.get('age', 0)
+    income = input_data.get('income', 0)
+    credit_rating = input_data.get('creditRating', 'Average')
+    debt_to_income = input_data.get('debtToIncomeRatio', 0)
+    employment_years = input_data.get('employmentLength', 0)
+    num_accounts = input_data.get('numAccounts', 0)
+    late_payments = input_data.get('latePayments', 0)
+    loan_amount = input_data.get('loanAmount', 0)
+    interest_rate = input_data.get('interestRate', 0)
+    savings_balance = input_data.get('savingsBalance', 0)
+
+    risk_score = 0
+
+    if age < 25 or age > 60:
+        risk_score += 10
+    elif age < 30 or age > 55:
+        risk_score += 5
+
+    if income < 150000:
+        risk_score += 25
+    elif income < 300000:
+        risk_score += 15
+    elif income < 500000:
+        risk_score += 8
+    elif income < 1000000:
+        risk_score += 3
+
+    credit_rating_weight = {
+        'Excellent': 0,
+        'Good': 5,
+        'Average': 15,
+        'Fair': 25,
+        'Poor': 40,
+        'No History': 30
+    }
+    risk_score += credit_rating_weight.get(credit_rating, 15)
+
+    if debt_to_income > 0.70:
+        risk_score += 25
+    elif debt_to_income > 0.50:
+        risk_score += 20
+    elif debt_to_income > 0.35:
+        risk_score += 10
+    elif debt_to_income > 0.20:
+        risk_score += 3
+
+    if employment_years < 1:
+        risk_score += 15
+    elif employment_years < 2:
+        risk_score += 10
+    elif employment_years < 5:
+        risk_score += 5
+
+    if late_payments == 0:
+        payment_penalty = 0
+    elif late_payments <= 2:
+        payment_penalty = 10
+    elif late_payments <= 5:
+        payment_penalty = 20
+    else:
+        payment_penalty = 35
+    risk_score += payment_penalty
+
+    if num_accounts > 10:
+        risk_score += 12
+    elif num_accounts > 7:
+        risk_score += 8
+    elif num_accounts > 4:
+        risk_score += 3
+
+    savings_to_monthly_income = (savings_balance / (income / 12)) if income > 0 else 0
+    if savings_to_monthly_income < 1:
+        risk_score += 10
+    elif savings_to_monthly_income < 3:
+        risk_score += 5
+    elif savings_to_monthly_income < 6:
+        risk_score += 2
+
+    ltv = (loan_amount / income * 100) if income > 0 else 0
+    if ltv > 500:
+        risk_score += 20
+    elif ltv > 350:
+        risk_score += 15
+    elif ltv > 200:
+        risk_score += 8
+    elif ltv > 100:
+        risk_score += 3
+
+    if interest_rate > 15:
+        risk_score += 8
+    elif interest_rate > 12:
+        risk_score += 4
+    elif interest_rate > 9:
+        risk_score += 1
+
+    return min(risk_score, 100)
+
+
+def legacy_rating(risk_score):
+    """Rating of get_indian_credit_assessment() as first released"""
+    if risk_score < 20:
+        return 'Excellent'
+    elif risk_score < 35:
+        return 'Good'
+    elif risk_score < 50:
+        return 'Average'
+    elif risk_score < 70:
+        return 'Fair'
+    return 'Poor'
+
+
+def special_rows():
+    """Signed zeros and infinities on every numeric input, one at a time"""
+    base = {'age': 40.0, 'income': 600000.0, 'creditRating': 'Good', 'debtToIncomeRatio': 0.3,
+            'employmentLength': 6.0, 'numAccounts': 3.0, 'latePayments': 1.0, 'loanAmount': 600000.0,
+            'interestRate': 10.0, 'savingsBalance': 200000.0}
+    rows = []
+    for field, value in base.items():
+        if isinstance(value, str):
+            continue
+        for special in (-0.0, 0.0, float('inf'), float('-inf')):
+            rows.append(dict(base, **{field: special}))
+    return rows
+
+
+def golden_rows(random_rows=RANDOM_ROWS, seed=SEED):
+    edges = list(iter_rows(edge_population(SCORECARD)))
+    sample = list(iter_rows(make_population(random_rows, seed=seed)))
+    return edges + special_rows() + sample
+
+
+def build(random_rows=RANDOM_ROWS, seed=SEED):
+    rows = golden_rows(random_rows, seed)
+    scores = [legacy_score(row) for row in rows]
+    return {
+        'source': 'calculate_credit_risk() if/elif ladders (benchmarks/golden.py)',
+        'seed': seed,
+        'rows': rows,
+        'scores': scores,
+        'ratings': [legacy_rating(score) for score in scores]
+    }
+
+
+def load_golden(path=GOLDEN):
+    """(rows, scores, ratings) from the committed fixture"""
+    with open(path, encoding='utf-8') as handle:
+        golden = json.load(handle)
+    return golden['rows'], golden['scores'], golden['ratings']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='compare with the committed fixture instead of writing it')
+    parser.add_argument('--output', default=GOLDEN)
+    args = parser.parse_args()
+
+    golden = build()
+    if args.check:
+        rows, scores, ratings = load_golden(args.output)
+        # NaN != NaN, so compare the serialized rows
+        same = (json.dumps(rows) == json.dumps(golden['rows']) and scores == golden['scores']
+                and ratings == golden['ratings'])
+        print(f"{args.output}: {'up to date' if same else 'stale, rerun without --check'} ({len(rows):,} rows)")
+        return 0 if same else 1
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(golden, handle)
+        handle.write('\n')
+    counts = np.unique(golden['ratings'], return_counts=True)
+    print(f"Wrote {len(golden['rows']):,} rows to {args.output}: "
+          + ', '.join(f'{rating} {count}' for rating, count in zip(*counts)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Load-test /api/predict on a running server and report latency and RPS.
+
+Each client thread holds one keep-alive connection and posts applicants from
+a seeded synthetic population as fast as the server answers.
+
+    gunicorn -c gunicorn.conf.py app:app
+    python benchmarks/load_test.py --url http://localhost:8501 --clients 32 --duration 20
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common import iter_rows, make_population
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def client(url, path, bodies, deadline, latencies, errors):
+    """Post bodies round-robin over one keep-alive connection until the deadline"""
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request('POST', path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8501')
+    parser.add_argument('--path', default='/api/predict')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--applicants', type=int, default=10000, help='distinct request bodies')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    bodies = [json.dumps(row) for row in iter_rows(make_population(args.applicants, seed=args.seed))]
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=client, args=(url, args.path, bodies[i::args.clients] or bodies, deadline, latencies, errors))
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests:  {len(latencies):,} ok, {len(errors):,} failed in {elapsed:.1f}s with {args.clients} clients")
+    print(f"RPS:       {len(latencies) / elapsed:,.0f}")
+    print(f"p50:       {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"p99:       {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"max:       {(latencies[-1] if latencies else 0) * 1000:.2f} ms")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+import numpy as np
+
+# EMI (Equated Monthly Installment) and DTI Calculations
+# Vectorized over arrays of loans: principal (₹), annual interest rate (%)
+# and tenure (years) broadcast against each other, so one call prices a
+# single loan or a whole portfolio. Scalars in give NumPy scalars out.
+
+
+def monthly_emi(principal, annual_rate, tenure_years):
+    """
+    Monthly installment for fully amortizing loans.
+
+    EMI = P × r × (1+r)^n / ((1+r)^n - 1) with r the monthly rate and n the
+    number of months. At 0% the loan is repaid in equal parts, P / n.
+    Loans with no principal or no tenure have an EMI of 0.
+    """
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 100 / 12
+    num_months = np.asarray(tenure_years, dtype=float) * 12
+
+    growth = np.power(1 + monthly_rate, num_months)
+    has_rate = monthly_rate > 0
+    has_term = num_months > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortizing = principal * monthly_rate * growth / (growth - 1)
+        interest_free = principal / num_months
+    emi = np.where(has_rate, amortizing, interest_free)
+    return np.where(has_term & (principal > 0), emi, 0.0)[()]
+
+
+def debt_to_income(emi, annual_income):
+    """Monthly installment as a fraction of monthly income (0 when income is not positive)"""
+    emi = np.asarray(emi, dtype=float)
+    monthly_income = np.asarray(annual_income, dtype=float) / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = emi / monthly_income
+    return np.where(monthly_income > 0, ratio, 0.0)[()]
+
+
+def derived_dti(principal, annual_rate, tenure_years, annual_income):
+    """Debt-to-income ratio implied by the loan terms, for one loan or an array of loans"""
+    return debt_to_income(monthly_emi(principal, annual_rate, tenure_years), annual_income)
+
+
+def amortization_schedule(principal, annual_rate, tenure_years):
+    """
+    Month-by-month schedule for an array of loans in one pass.
+
+    Returns a dict of (loans, months) arrays: 'emi', 'interest', 'principal'
+    (the part of each installment that repays principal) and 'balance' (the
+    outstanding balance after the payment). Months past a loan's own tenure
+    are zero, so loans of different tenures share one grid.
+    """
+    principal = np.atleast_1d(np.asarray(principal, dtype=float))
+    annual_rate = np.atleast_1d(np.asarray(annual_rate, dtype=float))
+    tenure_years = np.atleast_1d(np.asarray(tenure_years, dtype=float))
+    principal, annual_rate, tenure_years = np.broadcast_arrays(principal, annual_rate, tenure_years)
+
+    monthly_rate = (annual_rate / 100 / 12)[:, None]
+    num_months = np.rint(tenure_years * 12).astype(int)
+    emi = np.atleast_1d(monthly_emi(principal, annual_rate, tenure_years))[:, None]
+
+    months = np.arange(1, max(int(num_months.max(initial=0)), 0) + 1)[None, :]
+    growth = np.power(1 + monthly_rate, months)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Closed-form balance after k payments; the zero-rate limit is P - k × EMI
+        balance = np.where(monthly_rate > 0,
+                           principal[:, None] * growth - emi * (growth - 1) / monthly_rate,
+                           principal[:, None] - emi * months)
+    balance = np.maximum(balance, 0.0)
+    opening = np.concatenate([principal[:, None], balance[:, :-1]], axis=1)
+    interest = opening * monthly_rate
+
+    active = months <= num_months[:, None]
+    return {
+        'emi': np.where(active, emi, 0.0),
+        'interest': np.where(active, interest, 0.0),
+        'principal': np.where(active, emi - interest, 0.0),
+        'balance': np.where(active, balance, 0.0)
+    }
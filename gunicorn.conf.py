@@ -0,0 +1,41 @@
+# Production serving mode for app.py (Linux/macOS)
+#
+#     gunicorn -c gunicorn.conf.py app:app
+#
+# The app, the compiled scorecard and NumPy/pandas are loaded once in the
+# master before workers are forked, so every worker starts warm and shares
+# those pages copy-on-write. Tune with the environment variables below.
+#
+# Graceful reload: `kill -HUP <master pid>` replaces workers one by one
+# after they finish in-flight requests. Because the app is preloaded, code or
+# scorecard changes need a full binary upgrade: `kill -USR2 <master pid>`,
+# then `kill -QUIT <old master pid>` once the new master is serving.
+import multiprocessing
+import os
+
+bind = os.environ.get('CREDIT_RISK_BIND', '0.0.0.0:8501')
+
+# One process per core gets around the GIL; threads overlap socket I/O
+workers = int(os.environ.get('CREDIT_RISK_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('CREDIT_RISK_THREADS', 4))
+worker_class = 'gthread'
+
+# Keep client connections open between requests (seconds)
+keepalive = int(os.environ.get('CREDIT_RISK_KEEPALIVE', 5))
+timeout = int(os.environ.get('CREDIT_RISK_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('CREDIT_RISK_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.environ.get('CREDIT_RISK_MAX_REQUESTS', 100000))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+accesslog = os.environ.get('CREDIT_RISK_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker forks"""
+    from app import warm_up
+    warm_up()
+    server.log.info('Scorer preloaded; forking %s workers x %s threads', workers, threads)
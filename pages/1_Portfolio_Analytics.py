@@ -0,0 +1,95 @@
+import streamlit as st
+
+from portfolio import read_portfolio, summarize_portfolio
+from scorecard_store import shared_store
+
+# Page config
+st.set_page_config(
+    page_title="Portfolio Analytics",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+st.title("Portfolio Analytics")
+st.caption("Upload a loan book to score every applicant at once. Charts are built from aggregates and a "
+           "random sample, so books of a million rows stay responsive.")
+
+# Only the aggregates are cached, never the uploaded rows.
+# The upload itself is keyed by its file id instead of hashing its bytes.
+@st.cache_data(max_entries=8, show_spinner="Scoring portfolio...")
+def summarize_upload(file_id, name, scorecard_version, sample_size, _uploaded, _scorecard):
+    """Scored and aggregated portfolio for one uploaded file."""
+    return summarize_portfolio(read_portfolio(_uploaded, name), scorecard=_scorecard, sample_size=sample_size)
+
+uploaded = st.file_uploader("Applicants (CSV or Parquet)", type=["csv", "parquet", "pq"])
+st.caption("Columns: " + ", ".join(f"`{field}`" for field in [
+    'age', 'income', 'creditRating', 'debtToIncomeRatio', 'employmentLength',
+    'numAccounts', 'latePayments', 'loanAmount', 'interestRate', 'savingsBalance'
+]) + ". Missing columns use the API defaults.")
+
+if uploaded is None:
+    st.stop()
+
+# Same scorecard file as the Flask API; the summary cache is keyed on its version
+scorecard = shared_store().current
+sample_size = st.sidebar.slider("Scatter sample size", 1000, 20000, 5000, step=1000)
+
+try:
+    summary = summarize_upload(uploaded.file_id, uploaded.name, scorecard.version, sample_size, uploaded, scorecard)
+except Exception as e:
+    st.error(f"Could not score {uploaded.name}: {e}")
+    st.stop()
+
+# 1. Headline numbers
+ratings = summary['ratings']
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Applicants", f"{summary['rows']:,}")
+with col2:
+    mean_score = (summary['scores'] * summary['scores'].index).sum() / max(summary['rows'], 1)
+    st.metric("Mean Risk Score", f"{mean_score:.1f}")
+with col3:
+    st.metric("Poor Share", f"{ratings['share'].get('Poor', 0):.1%}")
+
+# 2. Rating and score distributions
+st.subheader("Rating Distribution")
+col1, col2 = st.columns(2)
+with col1:
+    st.bar_chart(ratings['applicants'])
+with col2:
+    st.bar_chart(summary['scores'])
+
+# 3. Points each factor contributed across the book
+st.subheader("Factor Contributions")
+columns = st.columns(3)
+for index, (label, counts) in enumerate(summary['factor_points'].items()):
+    with columns[index % 3]:
+        st.write(f"**{label}**")
+        st.bar_chart(counts, height=180)
+
+# 4. Concentration tables
+st.subheader("Concentration")
+exposure_format = {
+    'applicants': '{:,}', 'applicant_share': '{:.1%}', 'exposure': '₹{:,.0f}',
+    'exposure_share': '{:.1%}', 'mean_score': '{:.1f}'
+}
+col1, col2 = st.columns(2)
+with col1:
+    st.write("**By Rating**")
+    st.dataframe(summary['by_rating'].style.format(exposure_format))
+    st.write("**By CIBIL Rating**")
+    st.dataframe(summary['by_credit_rating'].style.format(exposure_format))
+with col2:
+    st.write("**By Loan Size**")
+    st.dataframe(summary['by_loan_size'].style.format(exposure_format))
+    st.write("**Largest Loans**")
+    st.dataframe(summary['top_loans'].style.format({
+        'loans': '{:,}', 'exposure': '₹{:,.0f}', 'exposure_share': '{:.1%}'
+    }))
+
+# 5. Sampled scatter (never the full book)
+st.subheader("Risk Score vs Loan Amount")
+sample = summary['sample']
+st.scatter_chart(sample, x='loanAmount', y='risk_score', color='rating')
+st.caption(f"Random sample of {len(sample):,} of {summary['rows']:,} applicants. "
+           f"Scored with scorecard version {scorecard.version}.")
@@ -0,0 +1,316 @@
+"""
+Probability of default calibrated on local loan outcomes.
+
+The points total ranks applicants but is not a probability. This fits a
+logistic regression on the scorecard's own bands: every factor contributes
+one indicator per band (plus one for NaN or an unknown category), so the
+model keeps the scorecard's structure and only re-weights it against
+observed defaults. Training streams the file in chunks with mini-batch Adam,
+so the data never has to fit in memory. Serving is one sparse dot product:
+the applicant's band key picks one coefficient per factor.
+
+    python pd_model.py loans.csv --target default --output pd_model.json
+    CREDIT_RISK_PD_MODEL=pd_model.json python app.py    # /api/predict adds "pd"
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from batch_scoring import DERIVED_COLUMNS, batch_length, numeric_column
+from risk_grid import fingerprint as scorecard_fingerprint
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+# 2: models record the scorecard fingerprint as well as its version
+FORMAT_VERSION = 2
+
+
+def band_labels(factor):
+    """Band keys of one factor in feature order: numeric bands then NaN (-1), or categories then unknown (None)"""
+    if 'categories' in factor:
+        return list(factor['categories']) + [None]
+    return list(range(len(factor['bounds']) + 1)) + [-1]
+
+
+def feature_names(scorecard):
+    names = []
+    for factor in scorecard.factors:
+        for band in band_labels(factor):
+            names.append(f"{factor['name']}={'other' if band is None else 'nan' if band == -1 else band}")
+    return names
+
+
+def band_indices(data, scorecard=SCORECARD):
+    """(n, factors) array of global feature indices, the batch counterpart of band_key()"""
+    n = batch_length(data)
+    columns = []
+    offset = 0
+    for factor in scorecard.factors:
+        field = factor['input']
+        if 'categories' in factor:
+            import pandas as pd
+            values = data[field] if field in data else np.full(n, FIELD_DEFAULTS[field], dtype=object)
+            codes, names = pd.factorize(np.asarray(values, dtype=object))
+            slots = {name: slot for slot, name in enumerate(factor['categories'])}
+            unknown = len(slots)
+            lookup = np.array([slots.get(name, unknown) for name in names] + [unknown], dtype=np.int64)
+            local = lookup[codes]
+        else:
+            values = DERIVED_COLUMNS[field](data, n) if field in DERIVED_COLUMNS else numeric_column(data, field, n)
+            bounds = np.asarray(factor['bounds'], dtype=float)
+            local = np.searchsorted(bounds, values, side='right')
+            local[np.isnan(values)] = len(bounds) + 1
+        columns.append(local + offset)
+        offset += len(band_labels(factor))
+    return np.stack(columns, axis=1) if columns else np.empty((n, 0), dtype=np.int64)
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -35, 35)))
+
+
+class PDModel:
+    """Fitted intercept and one coefficient per factor band"""
+
+    def __init__(self, intercept, weights, scorecard=SCORECARD, metrics=None):
+        self.intercept = float(intercept)
+        self.weights = np.asarray(weights, dtype=float)
+        self.scorecard = scorecard
+        self.version = scorecard.version
+        self.metrics = metrics or {}
+        # Per factor: band key -> coefficient, for the scalar path
+        self._tables = []
+        offset = 0
+        for factor in scorecard.factors:
+            labels = band_labels(factor)
+            self._tables.append(dict(zip(labels, self.weights[offset:offset + len(labels)].tolist())))
+            offset += len(labels)
+        if offset != len(self.weights):
+            raise ValueError(f'PD model has {len(self.weights)} coefficients, scorecard {self.version} has {offset} bands')
+
+    def predict_bands(self, band_key):
+        """PD for a band key from scorecard.band_key(): the intercept plus one coefficient per factor"""
+        z = self.intercept
+        for table, band in zip(self._tables, band_key):
+            z += table[band]
+        if z < -35:
+            return math.exp(z)
+        return 1 / (1 + math.exp(-z))
+
+    def predict(self, input_data):
+        return self.predict_bands(self.scorecard.band_key(input_data))
+
+    def predict_batch(self, data):
+        """PD for every row of a DataFrame or dict of columns"""
+        return _sigmoid(self.intercept + self.weights[band_indices(data, self.scorecard)].sum(axis=1))
+
+    def to_dict(self):
+        coefficients = {}
+        offset = 0
+        for factor in self.scorecard.factors:
+            labels = band_labels(factor)
+            coefficients[factor['name']] = [
+                [band, weight] for band, weight in zip(labels, self.weights[offset:offset + len(labels)].tolist())]
+            offset += len(labels)
+        return {
+            'format': FORMAT_VERSION,
+            'scorecard_version': self.version,
+            'scorecard_fingerprint': scorecard_fingerprint(self.scorecard),
+            'intercept': self.intercept,
+            # Per factor: [band key, coefficient] with band keys as in band_key()
+            # (band index, -1 for NaN; category name, null for unknown)
+            'coefficients': coefficients,
+            'metrics': self.metrics
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+            handle.write('\n')
+
+
+def load_model(path, scorecard=SCORECARD):
+    """
+    Read a fitted model. It must have been fitted on the scorecard it will read
+    band keys from: same version and same definition, so a file edited without
+    a version bump is caught too.
+    """
+    with open(path, encoding='utf-8') as handle:
+        model = json.load(handle)
+    if model.get('scorecard_version') != scorecard.version:
+        raise ValueError(f"PD model {path} was fitted on scorecard {model.get('scorecard_version')}, "
+                         f"not {scorecard.version}")
+    if model.get('scorecard_fingerprint') != scorecard_fingerprint(scorecard):
+        raise ValueError(f"PD model {path} was fitted on a different definition of scorecard {scorecard.version}; "
+                         f"refit it with pd_model.py")
+    weights = []
+    for factor in scorecard.factors:
+        fitted = {band if band is None or isinstance(band, str) else int(band): weight
+                  for band, weight in model['coefficients'][factor['name']]}
+        weights.extend(fitted[band] for band in band_labels(factor))
+    return PDModel(model['intercept'], weights, scorecard, model.get('metrics'))
+
+
+def _holdout_mask(start, n, every):
+    """Every `every`-th row (by position in the file) is held out for evaluation"""
+    return (np.arange(start, start + n) % every) == 0 if every else np.zeros(n, dtype=bool)
+
+
+def _targets(frame, target):
+    import pandas as pd
+    values = pd.to_numeric(frame[target].replace({'True': 1, 'False': 0, True: 1, False: 0}), errors='coerce')
+    return values.to_numpy(dtype=float)
+
+
+def fit(chunks, target='default', scorecard=SCORECARD, epochs=5, batch_size=1024, learning_rate=0.05,
+        l2=1e-4, holdout_every=10, seed=0):
+    """
+    Fit the PD model by mini-batch Adam over a re-readable stream of chunks.
+
+    chunks() returns a fresh iterator of DataFrames on each call (one pass
+    per epoch). Rows with a missing or non-0/1 target are skipped. Every
+    `holdout_every`-th row is kept out of training and used for the metrics.
+    """
+    n_features = len(feature_names(scorecard))
+    rng = np.random.default_rng(seed)
+    weights = np.zeros(n_features)
+    intercept = 0.0
+    # Adam state for [weights..., intercept]
+    moment = np.zeros(n_features + 1)
+    velocity = np.zeros(n_features + 1)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+
+    for _ in range(epochs):
+        position = 0
+        for frame in chunks():
+            n = len(frame)
+            labels = _targets(frame, target)
+            keep = ~_holdout_mask(position, n, holdout_every) & ((labels == 0) | (labels == 1))
+            position += n
+            if not keep.any():
+                continue
+            indices = band_indices(frame, scorecard)[keep]
+            labels = labels[keep]
+            order = rng.permutation(len(labels))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_indices = indices[batch]
+                residual = _sigmoid(intercept + weights[batch_indices].sum(axis=1)) - labels[batch]
+                # One-hot features: the gradient is a bincount of residuals over the active bands
+                gradient = np.empty(n_features + 1)
+                gradient[:-1] = np.bincount(batch_indices.ravel(), weights=np.repeat(residual, batch_indices.shape[1]),
+                                            minlength=n_features) / len(batch) + l2 * weights
+                gradient[-1] = residual.mean()
+                step += 1
+                moment = beta1 * moment + (1 - beta1) * gradient
+                velocity = beta2 * velocity + (1 - beta2) * gradient ** 2
+                update = learning_rate * (moment / (1 - beta1 ** step)) / (np.sqrt(velocity / (1 - beta2 ** step)) + eps)
+                weights -= update[:-1]
+                intercept -= update[-1]
+
+    model = PDModel(intercept, weights, scorecard)
+    model.metrics = evaluate(model, chunks(), target, holdout_every)
+    return model
+
+
+def _auc(scores, labels):
+    """Area under the ROC curve via the rank-sum statistic (ties share ranks)"""
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return None
+    import pandas as pd
+    ranks = pd.Series(scores).rank().to_numpy()
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def evaluate(model, chunks, target='default', holdout_every=10, bins=10):
+    """Holdout log loss, Brier score, AUC (PD and raw points) and a calibration table by PD decile"""
+    from batch_scoring import score_batch
+
+    pds, labels, points = [], [], []
+    position = 0
+    for frame in chunks:
+        n = len(frame)
+        frame_labels = _targets(frame, target)
+        mask = (_holdout_mask(position, n, holdout_every) if holdout_every else np.ones(n, dtype=bool))
+        mask &= (frame_labels == 0) | (frame_labels == 1)
+        position += n
+        if mask.any():
+            rows = frame[mask]
+            pds.append(model.predict_batch(rows))
+            points.append(score_batch(rows, model.scorecard)[0])
+            labels.append(frame_labels[mask])
+    if not pds:
+        return {'rows': 0}
+    pd_values, labels, points = np.concatenate(pds), np.concatenate(labels), np.concatenate(points)
+    clipped = np.clip(pd_values, 1e-12, 1 - 1e-12)
+
+    order = np.argsort(pd_values, kind='stable')
+    calibration = []
+    for part in np.array_split(order, min(bins, len(order))):
+        calibration.append({
+            'rows': len(part),
+            'mean_pd': float(pd_values[part].mean()),
+            'default_rate': float(labels[part].mean())
+        })
+    return {
+        'rows': len(labels),
+        'default_rate': float(labels.mean()),
+        'log_loss': float(-np.mean(labels * np.log(clipped) + (1 - labels) * np.log(1 - clipped))),
+        'brier': float(np.mean((pd_values - labels) ** 2)),
+        'auc': _auc(pd_values, labels),
+        'auc_points': _auc(points.astype(float), labels),
+        'calibration': calibration
+    }
+
+
+def main(argv=None):
+    from score_file import read_chunks
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file of applicants with a default flag')
+    parser.add_argument('--target', default='default', help='0/1 default column (default: default)')
+    parser.add_argument('--output', default='pd_model.json')
+    parser.add_argument('--scorecard', help='scorecard config file to fit against (default: built-in)')
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--learning-rate', type=float, default=0.05)
+    parser.add_argument('--l2', type=float, default=1e-4)
+    parser.add_argument('--chunk-size', type=int, default=100000, help='rows read per chunk (default: 100000)')
+    parser.add_argument('--holdout-every', type=int, default=10,
+                        help='hold out every Nth row for evaluation, 0 to train on all (default: 10)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scorecard = SCORECARD
+    if args.scorecard:
+        from scorecard import load_scorecard
+        scorecard = load_scorecard(args.scorecard)
+
+    start = time.perf_counter()
+    model = fit(lambda: read_chunks(args.input, args.chunk_size), args.target, scorecard, epochs=args.epochs,
+                batch_size=args.batch_size, learning_rate=args.learning_rate, l2=args.l2,
+                holdout_every=args.holdout_every, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    model.save(args.output)
+
+    metrics = model.metrics
+    print(f'Fitted on scorecard {scorecard.version} in {elapsed:.2f}s, wrote {args.output}')
+    if metrics.get('rows'):
+        auc = 'n/a' if metrics['auc'] is None else f"{metrics['auc']:.3f}"
+        auc_points = 'n/a' if metrics['auc_points'] is None else f"{metrics['auc_points']:.3f}"
+        print(f"Holdout ({metrics['rows']:,} rows, default rate {metrics['default_rate']:.2%}): "
+              f"log loss {metrics['log_loss']:.4f}, Brier {metrics['brier']:.4f}, "
+              f"AUC {auc} (points total {auc_points})")
+        for row in metrics['calibration']:
+            print(f"  mean PD {row['mean_pd']:7.2%}  observed {row['default_rate']:7.2%}  ({row['rows']:,} rows)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
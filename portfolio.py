@@ -0,0 +1,108 @@
+"""
+Portfolio-level summaries of a scored loan book.
+
+summarize_portfolio() scores a whole DataFrame with the vectorized path and
+reduces it to small tables (rating distribution, score histogram, per-factor
+points histograms, concentration tables and a bounded random sample for
+scatter plots), so a UI only ever renders aggregates, whatever the book size.
+"""
+import numpy as np
+import pandas as pd
+
+from batch_scoring import evaluate_batch
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+# Loan size buckets (₹) for the exposure concentration table
+LOAN_SIZE_BINS = [0, 100000, 500000, 1000000, 2500000, 5000000, 10000000, float('inf')]
+LOAN_SIZE_LABELS = ['< ₹1L', '₹1L-5L', '₹5L-10L', '₹10L-25L', '₹25L-50L', '₹50L-1Cr', '≥ ₹1Cr']
+
+# Share of total exposure held by the largest loans
+TOP_SHARES = (0.01, 0.05, 0.10, 0.25)
+
+
+def read_portfolio(handle, name):
+    """DataFrame from an uploaded CSV or Parquet file (format from the file name)"""
+    from score_file import file_format
+
+    if file_format(name) == 'parquet':
+        return pd.read_parquet(handle)
+    return pd.read_csv(handle)
+
+
+def _exposure_table(codes, names, scores, loans):
+    """Applicants, exposure and mean score per group code, with shares of the book"""
+    size = len(names)
+    applicants = np.bincount(codes, minlength=size)
+    exposure = np.bincount(codes, weights=loans, minlength=size)
+    score_sum = np.bincount(codes, weights=scores, minlength=size)
+    total = exposure.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table = pd.DataFrame({
+            'applicants': applicants,
+            'applicant_share': applicants / max(len(codes), 1),
+            'exposure': exposure,
+            'exposure_share': exposure / total if total else 0.0,
+            'mean_score': np.round(score_sum / applicants, 1)
+        }, index=pd.Index(names, name='group'))
+    return table[table['applicants'] > 0]
+
+
+def summarize_portfolio(frame, scorecard=SCORECARD, sample_size=5000, seed=0):
+    """
+    Score a loan book and aggregate it for display.
+
+    Returns a dict of small DataFrames: 'ratings', 'scores' (applicants per
+    score), 'factor_points' (factor -> applicants per points value), the
+    concentration tables 'by_rating', 'by_credit_rating', 'by_loan_size' and
+    'top_loans', and 'sample' (at most sample_size scored rows drawn with a
+    seeded RNG), plus 'rows'.
+    """
+    points, scores, ratings = evaluate_batch(frame, scorecard)
+    n = len(scores)
+    rating_codes = np.searchsorted(np.asarray(scorecard.rating_bounds), scores, side='right')
+    loans = pd.to_numeric(frame['loanAmount'], errors='coerce').to_numpy(dtype=float) \
+        if 'loanAmount' in frame else np.full(n, float(FIELD_DEFAULTS['loanAmount']))
+    loans = np.nan_to_num(loans)
+
+    labels = list(scorecard.rating_labels)
+    rating_counts = pd.Series(np.bincount(rating_codes, minlength=len(labels)), index=labels)
+    score_counts = pd.Series(np.bincount(scores, minlength=scorecard.max_score + 1),
+                             index=pd.RangeIndex(scorecard.max_score + 1, name='score'), name='applicants')
+
+    factor_points = {}
+    for column, label in enumerate(scorecard.factor_labels):
+        values, counts = np.unique(points[:, column], return_counts=True)
+        factor_points[label] = pd.Series(counts, index=pd.Index(values, name='points'), name='applicants')
+
+    credit = frame['creditRating'] if 'creditRating' in frame \
+        else np.full(n, FIELD_DEFAULTS['creditRating'], dtype=object)
+    credit_codes, credit_names = pd.factorize(np.asarray(credit, dtype=object), use_na_sentinel=False)
+    size_codes = np.searchsorted(np.asarray(LOAN_SIZE_BINS[1:-1]), loans, side='right')
+
+    # Exposure share of the largest 1%, 5%, ... of loans
+    ordered = np.sort(loans)[::-1]
+    total = ordered.sum()
+    top_loans = pd.DataFrame({
+        'loans': [max(1, int(round(share * n))) if n else 0 for share in TOP_SHARES],
+    }, index=[f'Top {share:.0%}' for share in TOP_SHARES])
+    top_loans['exposure'] = [ordered[:count].sum() for count in top_loans['loans']]
+    top_loans['exposure_share'] = top_loans['exposure'] / total if total else 0.0
+
+    rng = np.random.default_rng(seed)
+    picked = np.sort(rng.choice(n, size=min(sample_size, n), replace=False))
+    sample = pd.DataFrame({'risk_score': scores[picked], 'rating': ratings[picked].astype(str), 'loanAmount': loans[picked]})
+    for key in ('income', 'debtToIncomeRatio'):
+        if key in frame:
+            sample[key] = pd.to_numeric(frame[key].iloc[picked], errors='coerce').to_numpy()
+
+    return {
+        'rows': n,
+        'ratings': pd.DataFrame({'applicants': rating_counts, 'share': rating_counts / max(n, 1)}),
+        'scores': score_counts,
+        'factor_points': factor_points,
+        'by_credit_rating': _exposure_table(credit_codes, [str(name) for name in credit_names], scores, loans),
+        'by_loan_size': _exposure_table(size_codes, LOAN_SIZE_LABELS, scores, loans),
+        'by_rating': _exposure_table(rating_codes, labels, scores, loans),
+        'top_loans': top_loans,
+        'sample': sample
+    }
@@ -0,0 +1,288 @@
+"""
+Incremental rescoring of a whole portfolio against the previous run.
+
+Most applicants in a nightly book refresh are unchanged, so re-scoring all of
+them repeats yesterday's work. Every row is fingerprinted instead: a 64-bit
+hash of the ten scoring inputs, normalized the way the scorer reads them.
+A persistent index keeps each applicant's fingerprint, score and rating. A
+row is scored again only when its fingerprint differs from the index, the
+applicant is new, or the scorecard changed since the index was written.
+Identical inputs within a chunk are scored once. Rating changes go to a
+delta file, and the index is replaced atomically only after a complete run,
+so an interrupted run can simply be repeated.
+
+    python rescore.py portfolio.csv --index portfolio.idx.npz --delta changes.csv
+    python rescore.py portfolio.csv --index portfolio.idx.npz --delta changes.csv --output scored.parquet
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import batch_length, numeric_column, score_batch
+from risk_grid import fingerprint as scorecard_fingerprint
+from score_file import ChunkWriter, read_chunks
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+INDEX_FORMAT = 1
+
+
+def _mix(x):
+    """splitmix64 finalizer over a uint64 array, in place"""
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xbf58476d1ce4e5b9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94d049bb133111eb)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def _stable_hash(text):
+    # Python's hash() is salted per process, so names are hashed with blake2b
+    return int.from_bytes(hashlib.blake2b(str(text).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def fingerprints(data, n=None):
+    """
+    uint64 fingerprint of each row's scoring inputs.
+
+    Numeric fields are read as float64 like the batch scorer (missing columns
+    take the scalar defaults, -0.0 counts as 0.0 and every NaN is the same),
+    so a file whose integer columns are parsed as floats on another day keeps
+    its fingerprints.
+    """
+    n = batch_length(data) if n is None else n
+    result = np.zeros(n, dtype=np.uint64)
+    for field, default in FIELD_DEFAULTS.items():
+        if isinstance(default, str):
+            values = data[field] if field in data else np.full(n, default, dtype=object)
+            codes, names = pd.factorize(np.asarray(values, dtype=object))
+            bits = np.array([_stable_hash(name) for name in names] + [0], dtype=np.uint64)[codes]
+        else:
+            values = numeric_column(data, field, n) + 0.0
+            values[np.isnan(values)] = np.nan
+            bits = values.view(np.uint64)
+        result ^= bits
+        _mix(result)
+        result += np.uint64(0x9e3779b97f4a7c15)
+    return result
+
+
+def applicant_keys(values):
+    """
+    (uint64 key of each applicant id, 'int' or 'text'). Integer ids are their
+    own key, so they cannot collide and a file sorted by id looks up in order;
+    other ids are hashed.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64).view(np.uint64), 'int'
+    return pd.util.hash_array(values.astype(str).astype(object)), 'text'
+
+
+class ScoreIndex:
+    """Fingerprint, score and rating of every applicant from the last run, sorted by applicant key"""
+
+    def __init__(self, keys, fingerprints, scores, ratings, meta):
+        self.keys = keys
+        self.fingerprints = fingerprints
+        self.scores = scores
+        self.ratings = ratings
+        self.meta = meta
+        self.rating_labels = np.asarray(meta['rating_labels'], dtype=object)
+
+    @classmethod
+    def empty(cls, scorecard=SCORECARD):
+        return cls(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int16),
+                   np.empty(0, dtype=np.int8), index_meta(scorecard, None))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """(found mask, positions) of keys in the index"""
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.intp)
+        # Searching in key order is several times faster than in random order
+        order = np.argsort(keys, kind='stable')
+        positions = np.empty(len(keys), dtype=np.intp)
+        positions[order] = np.searchsorted(self.keys, keys[order])
+        np.minimum(positions, len(self.keys) - 1, out=positions)
+        return self.keys[positions] == keys, positions
+
+    def matches(self, scorecard):
+        """Whether results in this index came from `scorecard`"""
+        return (self.meta['scorecard_version'] == scorecard.version
+                and self.meta['scorecard_fingerprint'] == scorecard_fingerprint(scorecard))
+
+    def save(self, path):
+        """Write to a temporary file and rename it over `path`, so a crash never leaves half an index"""
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as handle:
+            np.savez(handle, keys=self.keys, fingerprints=self.fingerprints, scores=self.scores,
+                     ratings=self.ratings, meta=np.array(json.dumps(self.meta)))
+        os.replace(temporary, path)
+
+
+def index_meta(scorecard, id_kind, rows=0):
+    return {
+        'format': INDEX_FORMAT,
+        'scorecard_version': scorecard.version,
+        'scorecard_fingerprint': scorecard_fingerprint(scorecard),
+        'rating_labels': list(scorecard.rating_labels),
+        'id_kind': id_kind,
+        'rows': rows,
+        'updated_at': time.time()
+    }
+
+
+def load_index(path, scorecard=SCORECARD):
+    """The index at `path`, or an empty one if the file does not exist yet"""
+    if not os.path.exists(path):
+        return ScoreIndex.empty(scorecard)
+    with np.load(path, allow_pickle=False) as stored:
+        meta = json.loads(str(stored['meta']))
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"{path} has index format {meta.get('format')}, expected {INDEX_FORMAT}")
+        return ScoreIndex(stored['keys'], stored['fingerprints'], stored['scores'], stored['ratings'], meta)
+
+
+def rescore_chunk(frame, index, scorecard, id_column, force=False):
+    """
+    Reuse or recompute the score of every row in one chunk.
+
+    Returns (keys, fingerprints, scores, rating codes, rescored mask, delta)
+    where delta is a DataFrame of the rows whose rating changed or that are new.
+    """
+    n = len(frame)
+    keys, _ = applicant_keys(frame[id_column].to_numpy())
+    prints = fingerprints(frame, n)
+    found, positions = index.lookup(keys)
+    labels = np.asarray(scorecard.rating_labels, dtype=object)
+    if len(index):
+        old_prints = index.fingerprints[positions]
+        old_scores = index.scores[positions]
+        previous = np.where(found, index.rating_labels[index.ratings[positions]], None)
+    else:
+        old_prints = np.zeros(n, dtype=np.uint64)
+        old_scores = np.zeros(n, dtype=np.int16)
+        previous = np.full(n, None, dtype=object)
+    same_inputs = found & (old_prints == prints)
+    rescored = np.ones(n, dtype=bool) if force else ~same_inputs
+
+    # Reused rows keep the index's score (rows scored by another scorecard are
+    # all rescored), and every rating comes from this scorecard's bounds
+    scores = np.where(found, old_scores, 0).astype(np.int16)
+    changed = np.flatnonzero(rescored)
+    if len(changed):
+        # Identical inputs are scored once
+        _, first, inverse = np.unique(prints[changed], return_index=True, return_inverse=True)
+        unique_scores, _ = score_batch(frame.iloc[changed[first]], scorecard)
+        scores[changed] = unique_scores[inverse]
+    ratings = np.searchsorted(np.asarray(scorecard.rating_bounds), scores, side='right').astype(np.int8)
+
+    moved = rescored & (~found | (previous != labels[ratings]))
+    delta = pd.DataFrame({
+        id_column: frame[id_column].to_numpy()[moved],
+        'previous_rating': pd.array(previous[moved], dtype='string'),
+        'rating': pd.array(labels[ratings[moved]], dtype='string'),
+        'previous_score': np.where(found[moved], old_scores[moved], -1),
+        'risk_score': scores[moved],
+        'reason': pd.array(np.where(~found[moved], 'new', np.where(same_inputs[moved], 'scorecard', 'inputs')),
+                           dtype='string')
+    })
+    return keys, prints, scores, ratings, rescored, delta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file of the whole portfolio')
+    parser.add_argument('--index', required=True, help='index file from the previous run (created if missing)')
+    parser.add_argument('--delta', required=True, help='CSV or Parquet file for rating changes and new applicants')
+    parser.add_argument('--output', help='also write every applicant\'s score and rating here')
+    parser.add_argument('--id-column', default='applicant_id', help='column identifying an applicant (default: applicant_id)')
+    parser.add_argument('--chunk-size', type=int, default=200000, help='rows per chunk (default: 200000)')
+    parser.add_argument('--scorecard', help='scorecard config file to score with (default: built-in)')
+    parser.add_argument('--full', action='store_true', help='rescore every row, still reporting changes against the index')
+    args = parser.parse_args(argv)
+
+    scorecard = SCORECARD
+    if args.scorecard:
+        from scorecard import load_scorecard
+        scorecard = load_scorecard(args.scorecard)
+
+    start = time.perf_counter()
+    index = load_index(args.index, scorecard)
+    force = args.full or not index.matches(scorecard)
+    if len(index) and not index.matches(scorecard):
+        print(f"Scorecard changed ({index.meta['scorecard_version']} -> {scorecard.version}): rescoring every row")
+
+    parts = {'keys': [], 'fingerprints': [], 'scores': [], 'ratings': []}
+    rows = rescored = changes = 0
+    id_kind = None
+    delta_writer = ChunkWriter(args.delta)
+    output_writer = ChunkWriter(args.output) if args.output else None
+    try:
+        for frame in read_chunks(args.input, args.chunk_size):
+            if args.id_column not in frame:
+                raise SystemExit(f"{args.input} has no '{args.id_column}' column; pick one with --id-column")
+            # The key kind follows the column's dtype, which CSV chunks infer one at a
+            # time: every chunk must hash ids the same way as the index and the first chunk
+            kind = applicant_keys(frame[args.id_column].to_numpy()[:1])[1]
+            if id_kind is None:
+                id_kind = kind
+                if len(index) and index.meta['id_kind'] != kind:
+                    raise SystemExit(f"Applicant ids were {index.meta['id_kind']} in {args.index} and are {kind} now; "
+                                     f"rebuild it by moving the index aside")
+            elif kind != id_kind:
+                raise SystemExit(f"Applicant ids in {args.input} are {id_kind} up to row {rows:,} and {kind} after it "
+                                 f"(a missing or non-integer id?); every id must be read the same way")
+            keys, prints, scores, ratings, mask, delta = rescore_chunk(frame, index, scorecard, args.id_column, force)
+            for name, values in zip(parts, (keys, prints, scores, ratings)):
+                parts[name].append(values)
+            rows += len(frame)
+            rescored += int(mask.sum())
+            changes += len(delta)
+            delta_writer.write(delta)
+            if output_writer is not None:
+                output_writer.write(pd.DataFrame({
+                    args.id_column: frame[args.id_column].to_numpy(),
+                    'risk_score': scores,
+                    'rating': np.asarray(scorecard.rating_labels, dtype=object)[ratings],
+                    'rescored': mask
+                }))
+    finally:
+        delta_writer.close()
+        if output_writer is not None:
+            output_writer.close()
+
+    keys = np.concatenate(parts['keys']) if rows else np.empty(0, dtype=np.uint64)
+    # Sorted by key; a repeated applicant id keeps its last row
+    order = np.argsort(keys, kind='stable')[::-1]
+    unique_keys, first = np.unique(keys[order], return_index=True)
+    keep = order[first]
+    removed = int((~np.isin(index.keys, unique_keys, assume_unique=True)).sum()) if len(index) else 0
+    ScoreIndex(unique_keys,
+               np.concatenate(parts['fingerprints'])[keep] if rows else np.empty(0, dtype=np.uint64),
+               np.concatenate(parts['scores'])[keep] if rows else np.empty(0, dtype=np.int16),
+               np.concatenate(parts['ratings'])[keep] if rows else np.empty(0, dtype=np.int8),
+               index_meta(scorecard, id_kind, len(unique_keys))).save(args.index)
+    elapsed = time.perf_counter() - start
+
+    print(f"{rows:,} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec): "
+          f"{rescored:,} rescored, {rows - rescored:,} reused from the index")
+    print(f"{changes:,} rating changes or new applicants written to {args.delta}")
+    if rows - len(unique_keys):
+        print(f"{rows - len(unique_keys):,} rows repeat an applicant id; the last one is kept in the index")
+    if removed:
+        print(f"{removed:,} applicants from the previous run are no longer in the portfolio")
+    print(f"Index {args.index}: {len(unique_keys):,} applicants, scorecard {scorecard.version}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
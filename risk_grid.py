@@ -0,0 +1,287 @@
+"""
+Precomputed full-grid risk lookup table.
+
+Every scorecard factor is piecewise-constant, so the whole scoring space is a
+finite grid: one axis per factor, one cell per combination of point levels
+(bands that award the same points share a level). The grid is materialized
+once into a compact int8 .npy file and memory-mapped, so every worker process
+shares the same pages. Scoring an applicant then reduces to finding the level
+on each axis and reading one cell.
+
+    python risk_grid.py build     # write the grid for the current scorecard
+    python risk_grid.py verify    # check every cell against the formula
+"""
+import argparse
+import hashlib
+import json
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+from scorecard import DERIVED_INPUTS, FIELD_DEFAULTS, SCORECARD, ScoreBreakdown
+
+GRID_DIR = os.environ.get('CREDIT_RISK_GRID_DIR',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grid_cache'))
+
+
+def fingerprint(scorecard):
+    """Short hash of the scorecard definition; a grid is only valid for its own scorecard"""
+    encoded = json.dumps(scorecard.definition, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def grid_path(scorecard, directory=GRID_DIR):
+    return os.path.join(directory, f'risk_grid_{fingerprint(scorecard)}.npy')
+
+
+def factor_levels(factor):
+    """
+    Distinct point values of a factor and the level each band maps to.
+
+    Returns (levels, band_levels, nan_level) for numeric factors and
+    (levels, category_levels, default_level) for categorical ones.
+    """
+    if 'categories' in factor:
+        levels = sorted(set(factor['categories'].values()) | {factor['default_points']})
+        category_levels = {name: levels.index(points) for name, points in factor['categories'].items()}
+        return levels, category_levels, levels.index(factor['default_points'])
+    levels = sorted(set(factor['points']) | {factor['nan_points']})
+    return levels, [levels.index(points) for points in factor['points']], levels.index(factor['nan_points'])
+
+
+def build_table(scorecard):
+    """Score of every cell of the grid, capped at max_score"""
+    if scorecard.max_score > np.iinfo(np.int8).max:
+        raise ValueError('Grid cells are int8; max_score must be at most 127')
+    axes = [np.asarray(factor_levels(factor)[0], dtype=np.int16) for factor in scorecard.factors]
+    table = np.zeros([len(levels) for levels in axes], dtype=np.int16)
+    for axis, levels in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[axis] = len(levels)
+        table += levels.reshape(shape)
+    np.minimum(table, scorecard.max_score, out=table)
+    return table.astype(np.int8)
+
+
+def build_grid(scorecard=SCORECARD, directory=GRID_DIR):
+    """Write the grid file for a scorecard, atomically so concurrent workers never read half a file"""
+    path = grid_path(scorecard, directory)
+    os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as handle:
+        np.save(handle, build_table(scorecard))
+    os.replace(temporary, path)
+    return path
+
+
+class RiskGrid:
+    """Memory-mapped grid with O(1) scalar and vectorized lookups"""
+
+    def __init__(self, scorecard, table):
+        self.scorecard = scorecard
+        self.version = scorecard.version
+        self.table = table
+        strides = [stride // table.itemsize for stride in table.strides]
+        # memoryview indexing returns plain ints without copying the mapped pages
+        self._cells = memoryview(table.reshape(-1))
+
+        # Per factor, precomputed flat offsets (level * stride) for each band
+        self._direct = []
+        self._derived = []
+        self._categorical = []
+        self._axes = []
+        # Same factors in scorecard order with each band's (offset, points), for evaluate()
+        self._steps = []
+        for factor, stride in zip(scorecard.factors, strides):
+            levels, mapping, fallback = factor_levels(factor)
+            key = factor['input']
+            if 'categories' in factor:
+                offsets = {name: level * stride for name, level in mapping.items()}
+                self._categorical.append((key, FIELD_DEFAULTS[key], offsets, fallback * stride))
+                self._axes.append((key, None, offsets, fallback * stride, factor['categories'], factor['default_points']))
+                bands = {name: (level * stride, levels[level]) for name, level in mapping.items()}
+                self._steps.append((key, FIELD_DEFAULTS[key], None, None, bands, (fallback * stride, levels[fallback])))
+                continue
+            offsets = tuple(level * stride for level in mapping)
+            row = (factor['bounds'], offsets, fallback * stride)
+            if key in DERIVED_INPUTS:
+                self._derived.append((DERIVED_INPUTS[key],) + row)
+            else:
+                self._direct.append((key, FIELD_DEFAULTS[key]) + row)
+            self._axes.append((key, np.asarray(factor['bounds']), np.asarray(offsets, dtype=np.int64), fallback * stride,
+                               np.asarray(factor['points'], dtype=np.int16), factor['nan_points']))
+            bands = tuple((level * stride, levels[level]) for level in mapping)
+            self._steps.append((key, FIELD_DEFAULTS.get(key), DERIVED_INPUTS.get(key), factor['bounds'], bands,
+                                (fallback * stride, levels[fallback])))
+
+    def score(self, input_data):
+        """Risk score for one applicant: band offsets summed into one cell index"""
+        get = input_data.get
+        cell = 0
+        for key, default, bounds, offsets, nan_offset in self._direct:
+            value = get(key, default)
+            cell += offsets[bisect_right(bounds, value)] if value == value else nan_offset
+        for derive, bounds, offsets, nan_offset in self._derived:
+            value = derive(input_data)
+            cell += offsets[bisect_right(bounds, value)] if value == value else nan_offset
+        for key, default, offsets, default_offset in self._categorical:
+            cell += offsets.get(get(key, default), default_offset)
+        return self._cells[cell]
+
+    def evaluate(self, input_data):
+        """
+        Score one applicant from the grid and keep every factor's points.
+
+        Same ScoreBreakdown as CompiledScorecard.evaluate(); the score is the
+        grid cell, the points come from the level found on each axis.
+        """
+        get = input_data.get
+        cell = 0
+        points = []
+        append = points.append
+        for key, default, derive, bounds, bands, fallback in self._steps:
+            value = derive(input_data) if derive is not None else get(key, default)
+            if bounds is None:
+                offset, factor_points = bands.get(value, fallback)
+            else:
+                offset, factor_points = bands[bisect_right(bounds, value)] if value == value else fallback
+            cell += offset
+            append(factor_points)
+        breakdown = ScoreBreakdown(self.scorecard.factor_names, tuple(points), self.scorecard.max_score)
+        breakdown.score = self._cells[cell]
+        return breakdown
+
+    def rating(self, risk_score):
+        return self.scorecard.rating(risk_score)
+
+    def _lookup(self, data, points=None):
+        """(scores, ratings) read from the grid; fills points[:, factor] when an array is given"""
+        import pandas as pd
+        from batch_scoring import DERIVED_COLUMNS, batch_length, numeric_column
+
+        n = batch_length(data)
+        cells = np.zeros(n, dtype=np.int64)
+        for column, (key, bounds, offsets, fallback, factor_points, fallback_points) in enumerate(self._axes):
+            if bounds is None:
+                values = data[key] if key in data else np.full(n, FIELD_DEFAULTS[key], dtype=object)
+                codes, names = pd.factorize(np.asarray(values, dtype=object))
+                lookup = np.array([offsets.get(name, fallback) for name in names] + [fallback], dtype=np.int64)
+                cells += lookup[codes]
+                if points is not None:
+                    points[:, column] = np.array([factor_points.get(name, fallback_points) for name in names]
+                                                 + [fallback_points], dtype=np.int16)[codes]
+                continue
+            values = DERIVED_COLUMNS[key](data, n) if key in DERIVED_COLUMNS else numeric_column(data, key, n)
+            bands = np.searchsorted(bounds, values, side='right')
+            missing = np.isnan(values)
+            cells += np.where(missing, fallback, offsets[bands])
+            if points is not None:
+                points[:, column] = np.where(missing, fallback_points, factor_points[bands])
+        scores = self.table.reshape(-1)[cells].astype(np.int64)
+        ratings = np.asarray(self.scorecard.rating_labels, dtype=object)[
+            np.searchsorted(np.asarray(self.scorecard.rating_bounds), scores, side='right')]
+        return scores, ratings
+
+    def score_batch(self, data):
+        """Vectorized lookup; same (scores, ratings) contract as batch_scoring.score_batch"""
+        return self._lookup(data)
+
+    def evaluate_batch(self, data):
+        """Vectorized lookup keeping every factor's points; same contract as batch_scoring.evaluate_batch"""
+        from batch_scoring import batch_length
+
+        points = np.empty((batch_length(data), len(self._axes)), dtype=np.int16)
+        scores, ratings = self._lookup(data, points)
+        return points, scores, ratings
+
+
+def load_grid(scorecard=SCORECARD, directory=GRID_DIR, build=True):
+    """Memory-map the grid for a scorecard, building it first if it is missing"""
+    path = grid_path(scorecard, directory)
+    if not os.path.exists(path):
+        if not build:
+            raise FileNotFoundError(f'No risk grid at {path}; run `python risk_grid.py build`')
+        build_grid(scorecard, directory)
+    table = np.load(path, mmap_mode='r')
+    expected = tuple(len(factor_levels(factor)[0]) for factor in scorecard.factors)
+    if table.shape != expected or table.dtype != np.int8:
+        raise ValueError(f'Risk grid at {path} does not match the scorecard shape {expected}')
+    return RiskGrid(scorecard, table)
+
+
+def _representative(bounds, band):
+    """A value safely inside band `band` of the strict upper bounds"""
+    if not bounds:
+        return 1.0
+    if band == 0:
+        return bounds[0] / 2 if bounds[0] > 0 else bounds[0] - 1
+    if band == len(bounds):
+        return bounds[-1] + max(1.0, abs(bounds[-1]))
+    return (bounds[band - 1] + bounds[band]) / 2
+
+
+def verify(grid, chunk_size=500000):
+    """
+    Rescore one representative applicant per grid cell with the formula.
+
+    Returns the number of cells whose stored score differs from
+    batch_scoring.score_batch() on that applicant, scored with the grid's own
+    scorecard.
+    """
+    from batch_scoring import score_batch
+
+    scorecard = grid.scorecard
+    table = grid.table.reshape(-1)
+    axes = []
+    for factor in scorecard.factors:
+        levels, mapping, fallback = factor_levels(factor)
+        if 'categories' in factor:
+            names = [None] * len(levels)
+            for name, level in mapping.items():
+                names[level] = names[level] or name
+            # A level reached only through the default needs a name outside the table
+            names[fallback] = names[fallback] or '__unknown__'
+            axes.append((factor['input'], np.asarray(names, dtype=object)))
+        else:
+            values = [float('nan')] * len(levels)
+            for band, level in enumerate(mapping):
+                if values[level] != values[level]:
+                    values[level] = _representative(factor['bounds'], band)
+            axes.append((factor['input'], np.asarray(values, dtype=float)))
+
+    mismatches = 0
+    for start in range(0, table.size, chunk_size):
+        cells = np.arange(start, min(start + chunk_size, table.size))
+        coords = np.unravel_index(cells, grid.table.shape)
+        columns = {key: values[index] for (key, values), index in zip(axes, coords)}
+        # Turn derived ratios back into the raw fields they are computed from
+        income = columns['income']
+        if 'savingsMonths' in columns:
+            columns['savingsBalance'] = columns.pop('savingsMonths') * (income / 12)
+        if 'loanToIncome' in columns:
+            columns['loanAmount'] = columns.pop('loanToIncome') * income / 100
+        scores, _ = score_batch(columns, scorecard)
+        mismatches += int(np.count_nonzero(scores != table[cells]))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('--dir', default=GRID_DIR, help='directory holding grid files')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        path = build_grid(SCORECARD, args.dir)
+        print(f'Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)')
+        return 0
+
+    grid = load_grid(SCORECARD, args.dir)
+    mismatches = verify(grid)
+    print(f'Checked {grid.table.size:,} cells: {mismatches} mismatches')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
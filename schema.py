@@ -0,0 +1,277 @@
+"""
+Request schema: validation and coercion of scoring inputs.
+
+The schema is compiled once from the scorecard tables: numeric fields get the
+Streamlit widgets' ranges (scorecard.FIELD_RANGES) and creditRating must be
+one of the scorecard's categories. Valid payloads take a generated
+straight-line fast path; an invalid one is rechecked field by field so every
+problem comes back as a per-field message, instead of the first bad field
+failing the request.
+
+    from schema import REQUEST_SCHEMA, ValidationError
+    try:
+        input_data = REQUEST_SCHEMA.validate(payload)
+    except ValidationError as e:
+        e.errors    # {'age': 'must be between 18 and 100', ...}
+"""
+import math
+import numbers
+from functools import lru_cache
+
+from scorecard import FIELD_DEFAULTS, FIELD_RANGES, SCORECARD
+
+# Loan tenure (years) is only read when deriving DTI; range of the Streamlit selectbox
+TENURE_RANGE = (1, 30)
+
+# Marks an absent field in validate_columns() input; it takes the field's default
+MISSING = object()
+
+_PLAIN_NUMBERS = frozenset([int, float])
+_STR = {str}
+
+
+class ValidationError(ValueError):
+    """Invalid request fields; `errors` maps each field to what is wrong with it"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('Invalid input: ' + '; '.join(f'{field} {message}' for field, message in errors.items()))
+
+
+def _range_message(low, high):
+    if high is None:
+        return f'must be at least {low:g}'
+    if low is None:
+        return f'must be at most {high:g}'
+    return f'must be between {low:g} and {high:g}'
+
+
+def to_number(value):
+    """
+    float for numbers and numeric strings (whatever float() accepted before),
+    None for anything else. Integers too large for a float become ±inf, which
+    every range check rejects.
+    """
+    if isinstance(value, numbers.Real):
+        try:
+            return float(value)
+        except OverflowError:
+            return math.inf if value > 0 else -math.inf
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+class RequestSchema:
+    """Compiled per-field checks for the scoring inputs"""
+
+    def __init__(self, scorecard=SCORECARD, ranges=FIELD_RANGES, defaults=FIELD_DEFAULTS):
+        categories = {factor['input']: frozenset(factor['categories'])
+                      for factor in scorecard.factors if 'categories' in factor}
+
+        # (field, default, low, high, message) with open bounds as ±inf
+        self._numeric = tuple(
+            (field, float(defaults[field]),
+             -math.inf if low is None else float(low), math.inf if high is None else float(high),
+             _range_message(low, high))
+            for field, (low, high) in ranges.items()
+        )
+        self._categorical = tuple(
+            (field, defaults[field], categories[field], 'must be one of ' + ', '.join(sorted(categories[field])))
+            for field in defaults if field in categories
+        )
+        low, high = TENURE_RANGE
+        self._tenure = ('loanTenure', float(low), float(high), _range_message(low, high))
+        self._validate = self._compile()
+
+    def validate(self, data):
+        """Coerced input dict for one payload; raises ValidationError listing every bad field"""
+        return self._validate(data)
+
+    def _validate_fields(self, data):
+        """Field-by-field validation that collects every error (the slow path behind validate)"""
+        if not isinstance(data, dict):
+            raise ValidationError({'body': 'must be a JSON object'})
+        get = data.get
+        input_data = {}
+        errors = {}
+        for field, default, low, high, message in self._numeric:
+            value = get(field, MISSING)
+            if value is MISSING:
+                input_data[field] = default
+                continue
+            number = to_number(value)
+            if number is None or number != number:
+                # None for non-numbers, NaN for 'nan'
+                errors[field] = 'must be a number'
+            elif not low <= number <= high:
+                errors[field] = message
+            elif math.isinf(number):
+                # An open-ended range lets ±inf through the bounds
+                errors[field] = 'must be a finite number'
+            else:
+                input_data[field] = number
+        for field, default, allowed, message in self._categorical:
+            value = get(field, MISSING)
+            if value is MISSING:
+                input_data[field] = default
+            elif value.__class__ is str and value in allowed:
+                input_data[field] = value
+            else:
+                errors[field] = message
+        if errors:
+            raise ValidationError(errors)
+        return input_data
+
+    def _compile(self):
+        """
+        Generate the fast path of validate() as straight-line code with every
+        bound inlined: one float() per field and a single chained range check.
+        Any failure falls back to _validate_fields() for per-field messages.
+        A default that would fail its own check (age 0) stands in for an
+        absent field unchecked, as in _validate_fields(), so those fields
+        test for absence first instead of sending the request down the slow path.
+        """
+        lines = ['def validate(data):',
+                 '    try:',
+                 '        get = data.get']
+        names = []
+        checks = []
+        for index, (field, default, low, high, message) in enumerate(self._numeric):
+            name = f'v{index}'
+            names.append((field, name))
+            # Open upper bounds still reject inf, and NaN fails every comparison
+            check = (f'{low!r} <= {name} <= {high!r}' if high != math.inf else
+                     f'{low!r} <= {name} < _INF' if low != -math.inf else f'-_INF < {name} < _INF')
+            if low <= default <= high:
+                lines.append(f'        {name} = float(get({field!r}, {default!r}))')
+            else:
+                lines += [f'        r{index} = get({field!r}, _MISSING)',
+                          f'        {name} = {default!r} if r{index} is _MISSING else float(r{index})']
+                check = f'(r{index} is _MISSING or {check})'
+            checks.append(check)
+        for index, (field, default, allowed, message) in enumerate(self._categorical):
+            name = f'c{index}'
+            names.append((field, name))
+            if default in allowed:
+                lines.append(f'        {name} = get({field!r}, {default!r})')
+                checks.append(f'{name} in _ALLOWED[{index}]')
+            else:
+                lines += [f'        s{index} = get({field!r}, _MISSING)',
+                          f'        {name} = {default!r} if s{index} is _MISSING else s{index}']
+                checks.append(f'(s{index} is _MISSING or {name} in _ALLOWED[{index}])')
+        lines += ['        if ' + ' and '.join(checks) + ':',
+                  '            return {' + ', '.join(f'{field!r}: {name}' for field, name in names) + '}',
+                  '    except (AttributeError, TypeError, ValueError, OverflowError):',
+                  '        pass',
+                  '    return _validate_fields(data)']
+        self.source = '\n'.join(lines)
+        namespace = {
+            '_INF': math.inf,
+            '_MISSING': MISSING,
+            '_ALLOWED': tuple(allowed for _, _, allowed, _ in self._categorical),
+            '_validate_fields': self._validate_fields
+        }
+        exec(compile(self.source, '<request schema>', 'exec'), namespace)
+        return namespace['validate']
+
+    def validate_tenure(self, data):
+        """Loan tenure in years, required when the DTI is derived from the loan terms"""
+        field, low, high, message = self._tenure
+        value = data.get(field)
+        if value is None:
+            raise ValidationError({field: 'is required to derive debtToIncomeRatio'})
+        number = to_number(value)
+        if number is None:
+            raise ValidationError({field: 'must be a number'})
+        if not low <= number <= high:
+            raise ValidationError({field: message})
+        return number
+
+    def validate_columns(self, columns, n):
+        """
+        Column-wise validation of a batch.
+
+        columns maps fields to length-n sequences; a missing column, or a
+        MISSING entry in one, takes the field's default. Returns (coerced, errors): coerced holds a float array per
+        numeric field and an object array per categorical field, and errors
+        maps each invalid row position to its {field: message}.
+        """
+        import numpy as np
+        import pandas as pd
+
+        coerced = {}
+        errors = {}
+
+        def flag(mask, field, message):
+            for position in np.flatnonzero(mask).tolist():
+                errors.setdefault(position, {})[field] = message
+
+        for field, default, low, high, message in self._numeric:
+            if field not in columns:
+                coerced[field] = np.full(n, default)
+                continue
+            raw = columns[field]
+            not_number = np.zeros(n, dtype=bool)
+            values = None
+            if getattr(raw, 'dtype', None) is not None and raw.dtype.kind in 'fiu':
+                values = np.asarray(raw, dtype=float)
+            else:
+                raw = list(raw)
+                if set(map(type, raw)) <= _PLAIN_NUMBERS:
+                    try:
+                        values = np.asarray(raw, dtype=float)
+                    except OverflowError:
+                        pass
+                if values is None:
+                    # Mixed column, or an integer too large for a float: same per-value rules as validate()
+                    numbers_or_none = [default if value is MISSING else to_number(value) for value in raw]
+                    not_number = np.fromiter((number is None for number in numbers_or_none), dtype=bool, count=n)
+                    values = np.array([math.nan if number is None else number for number in numbers_or_none])
+            not_number |= np.isnan(values)
+            with np.errstate(invalid='ignore'):
+                in_range = (values >= low) & (values <= high)
+            out_of_range = ~in_range & ~not_number
+            infinite = in_range & np.isinf(values)
+            if not_number.any() or out_of_range.any() or infinite.any():
+                # Defaults stand in for absent fields unchecked, as in validate()
+                present = np.fromiter((value is not MISSING for value in raw), dtype=bool, count=n)
+                out_of_range &= present
+                infinite &= present
+            flag(not_number, field, 'must be a number')
+            flag(out_of_range, field, message)
+            flag(infinite, field, 'must be a finite number')
+            coerced[field] = values
+
+        for field, default, allowed, message in self._categorical:
+            if field not in columns:
+                coerced[field] = np.full(n, default, dtype=object)
+                continue
+            raw = list(columns[field])
+            if set(map(type, raw)) == _STR and allowed.issuperset(raw):
+                coerced[field] = np.array(raw, dtype=object)
+                continue
+            values = np.fromiter((default if value is MISSING else value for value in raw), dtype=object, count=n)
+            try:
+                codes, names = pd.factorize(values)
+            except TypeError:
+                # Unhashable values (lists, objects): check them one by one
+                codes, names = np.arange(n), values
+            # Trailing slot is code -1 (None/NaN)
+            valid = np.array([name.__class__ is str and name in allowed for name in names] + [False], dtype=bool)
+            flag(~valid[codes], field, message)
+            coerced[field] = values
+        return coerced, errors
+
+
+@lru_cache(maxsize=8)
+def schema_for(scorecard):
+    """The compiled schema for a scorecard (its categories), built once per scorecard"""
+    return RequestSchema(scorecard)
+
+
+# Compiled once at import from the production scorecard
+REQUEST_SCHEMA = schema_for(SCORECARD)
@@ -0,0 +1,264 @@
+"""
+Score CSV or Parquet files of any size without going through Flask.
+
+The input is read in fixed-size chunks, chunks are scored across a process
+pool with the shared scorecard rules, and results are appended to the output
+as they complete, so memory stays flat no matter how large the file is.
+Rows are validated with the same request schema as /api/predict/batch: an
+empty cell takes the field's default, and a row with a bad value is written
+unscored with its per-field messages in the `errors` column.
+
+    python score_file.py bureau_dump.csv scored.parquet --chunk-size 200000 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import evaluate_batch
+from schema import MISSING, schema_for
+from scorecard import FIELD_DEFAULTS
+from scorecard_store import ScorecardStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def file_format(path):
+    """'csv' or 'parquet', from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.csv', '.txt', '.gz', '.bz2', '.zip', '.xz'):
+        return 'csv'
+    raise ValueError(f"Unsupported file type '{extension}', expected .csv or .parquet")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit('Parquet support needs pyarrow: pip install pyarrow')
+    return pyarrow
+
+
+# Scorecard inputs are read with fixed dtypes so every CSV chunk scores (and
+# writes) them the same way, whatever the chunk happens to contain
+INPUT_DTYPES = {field: 'str' if isinstance(default, str) else 'float64' for field, default in FIELD_DEFAULTS.items()}
+# score_file.py reads them as text and validates each cell itself
+TEXT_DTYPES = dict.fromkeys(FIELD_DEFAULTS, 'str')
+
+
+def read_chunks(path, chunk_size, dtype=INPUT_DTYPES):
+    """Yield DataFrames of at most chunk_size rows (dtype applies to CSV input)"""
+    if file_format(path) == 'parquet':
+        pa = _require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Nullable dtypes keep other integer columns integers when a chunk has gaps
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype, dtype_backend='numpy_nullable')
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they arrive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = file_format(path)
+        self._parquet = None
+        self._schema = None
+        self._first = True
+
+    def write(self, frame):
+        if self.format == 'parquet':
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._schema = self._file_schema(pa, table)
+                self._parquet = pa.parquet.ParquetWriter(self.path, self._schema)
+            table = self._conform(pa, table)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    @staticmethod
+    def _file_schema(pa, table):
+        """
+        Schema of the output file, from the first chunk. A column with no
+        values in that chunk has no type to go by, so it is written as text,
+        which whatever later chunks hold can be cast to. Nullable integer
+        columns (the scores of rejected rows) keep their type.
+        """
+        fields = []
+        for field, column in zip(table.schema, table.columns):
+            if column.null_count == len(column) and not pa.types.is_integer(field.type):
+                field = field.with_type(pa.large_string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _conform(self, pa, table):
+        """Cast a chunk to the file schema; a value that does not fit is an error naming the column"""
+        if table.schema.equals(self._schema):
+            return table
+        columns = []
+        for field in self._schema:
+            column = table.column(field.name)
+            try:
+                columns.append(column.cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                raise ValueError(f"Column '{field.name}' was {field.type} in the first chunk but has "
+                                 f"{column.type} values later on that do not convert") from None
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def input_columns(frame):
+    """
+    A chunk's scorecard inputs as validate_columns() takes them: numbers
+    where every cell parses, otherwise values with MISSING for empty cells
+    and None for text that is not a number.
+    """
+    columns = {}
+    for field, default in FIELD_DEFAULTS.items():
+        if field not in frame:
+            continue
+        raw = frame[field]
+        missing = raw.isna().to_numpy()
+        if isinstance(default, str):
+            values = raw.to_numpy(dtype=object, na_value=None)
+        else:
+            numbers = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            unreadable = np.isnan(numbers) & ~missing
+            if not (missing.any() or unreadable.any()):
+                columns[field] = numbers
+                continue
+            values = numbers.astype(object)
+            values[unreadable] = None
+        values[missing] = MISSING
+        columns[field] = values
+    return columns
+
+
+def score_chunk(frame, scorecard):
+    """
+    Validate and score one chunk. Inputs are replaced by their values as
+    scored (defaults filled in), and risk_score, rating, per-factor
+    points_<factor> and errors columns are appended; rows that fail
+    validation are left unscored, with their {field: message} as JSON in
+    errors and empty cells where a number did not parse.
+    """
+    n = len(frame)
+    columns, errors = schema_for(scorecard).validate_columns(input_columns(frame), n)
+    valid = np.ones(n, dtype=bool)
+    valid[list(errors)] = False
+    points, scores, ratings = evaluate_batch({field: values[valid] for field, values in columns.items()}, scorecard)
+
+    for field, values in columns.items():
+        if field not in frame:
+            continue
+        if isinstance(FIELD_DEFAULTS[field], str):
+            frame[field] = pd.array(np.where(valid, values, frame[field].to_numpy(dtype=object, na_value=None)),
+                                    dtype='string')
+        else:
+            frame[field] = np.where(valid, values, pd.to_numeric(frame[field], errors='coerce').to_numpy(
+                dtype=float, na_value=np.nan))
+
+    def scored(values, dtype):
+        # Rejected rows get NA, so these columns are nullable in every chunk
+        full = np.full(n, None, dtype=object)
+        full[valid] = values
+        return pd.array(full, dtype=dtype)
+
+    frame['risk_score'] = scored(scores, 'Int16')
+    frame['rating'] = scored(ratings.astype(str), 'string')
+    for column, name in enumerate(scorecard.factor_names):
+        frame[f'points_{name}'] = scored(points[:, column], 'Int16')
+    messages = np.full(n, None, dtype=object)
+    for position, field_errors in errors.items():
+        messages[position] = json.dumps(field_errors)
+    frame['errors'] = pd.array(messages, dtype='string')
+    return frame
+
+
+def score_chunks(chunks, workers, scorecard):
+    """Score chunks in input order, keeping at most 2 chunks per worker in flight"""
+    if workers <= 1:
+        for frame in chunks:
+            yield score_chunk(frame, scorecard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for frame in chunks:
+            pending.append(pool.submit(score_chunk, frame, scorecard))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size in MB, as (this process, largest worker), or None
+    where the resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file of applicants')
+    parser.add_argument('output', help='CSV or Parquet file to write scored rows to')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='rows per chunk (default: 100000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='scoring processes, 1 scores in-process (default: CPU count)')
+    parser.add_argument('--scorecard', default=os.environ.get('CREDIT_RISK_SCORECARD'),
+                        help='scorecard config file (default: CREDIT_RISK_SCORECARD, else built-in)')
+    args = parser.parse_args(argv)
+
+    # One version for the whole file, loaded the way the service loads it
+    scorecard = ScorecardStore(args.scorecard).current
+    start = time.perf_counter()
+    rows = rejected = 0
+    writer = ChunkWriter(args.output)
+    try:
+        for frame in score_chunks(read_chunks(args.input, args.chunk_size, TEXT_DTYPES), args.workers, scorecard):
+            writer.write(frame)
+            rows += len(frame)
+            rejected += int(frame['errors'].notna().sum())
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec) "
+          f"with scorecard {scorecard.version}")
+    if rejected:
+        print(f"{rejected:,} rows failed validation and were not scored; see the errors column")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss[0]:.1f} MB main process, {rss[1]:.1f} MB largest worker")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
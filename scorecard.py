@@ -0,0 +1,353 @@
+import json
+import math
+from bisect import bisect_right
+
+# Scorecard Definition (Indian Standards)
+# Single source of truth for every band threshold and point value. Flask,
+# Streamlit, the batch scorer and /api/formula all read from this table.
+#
+# Numeric factors list their breakpoints in ascending order as [op, value]
+# pairs, where op is '<' or '<=' and reads "input op value". The first
+# breakpoint the input satisfies picks the points at the same position; an
+# input past every breakpoint gets the last entry of `points`.
+# `nan_points` is what a NaN input scores (every comparison is False for NaN
+# in the original if/elif ladders).
+SCORECARD_DEFINITION = {
+    'version': '1.0',
+    'max_score': 100,
+    'factors': [
+        {
+            'name': 'age',
+            'label': 'Age Factor',
+            'input': 'age',
+            'breakpoints': [['<', 25], ['<', 30], ['<=', 55], ['<=', 60]],
+            'points': [10, 5, 0, 5, 10],
+            'nan_points': 0,
+            'note': 'Risk if <25 or >60 years, 30-55 is ideal'
+        },
+        {
+            'name': 'income',
+            'label': 'Income',
+            'input': 'income',
+            # Minimum income threshold for loan eligibility in India: ~₹150,000/year
+            'breakpoints': [['<', 150000], ['<', 300000], ['<', 500000], ['<', 1000000]],
+            'points': [25, 15, 8, 3, 0],
+            'nan_points': 0,
+            'note': 'Based on annual income, minimum threshold ₹150K'
+        },
+        {
+            'name': 'credit_rating',
+            'label': 'Credit Rating',
+            'input': 'creditRating',
+            'categories': {
+                'Excellent': 0,      # CIBIL 750-900
+                'Good': 5,           # CIBIL 700-749
+                'Average': 15,       # CIBIL 650-699
+                'Fair': 25,          # CIBIL 600-649
+                'Poor': 40,          # CIBIL <600
+                'No History': 30     # First-time borrower
+            },
+            'default_points': 15,
+            'note': 'CIBIL score based'
+        },
+        {
+            'name': 'debt_to_income',
+            'label': 'Debt-to-Income',
+            'input': 'debtToIncomeRatio',
+            # RBI guideline: Should be <50% for most lenders
+            'breakpoints': [['<=', 0.20], ['<=', 0.35], ['<=', 0.50], ['<=', 0.70]],
+            'points': [0, 3, 10, 20, 25],
+            'nan_points': 0,
+            'note': 'RBI guideline <50%'
+        },
+        {
+            'name': 'employment',
+            'label': 'Employment',
+            'input': 'employmentLength',
+            'breakpoints': [['<', 1], ['<', 2], ['<', 5]],
+            'points': [15, 10, 5, 0],
+            'nan_points': 0,
+            'note': 'Stability, 5+ years is minimal risk'
+        },
+        {
+            'name': 'late_payments',
+            'label': 'Payment History',
+            'input': 'latePayments',
+            'breakpoints': [['<', 0], ['<=', 0], ['<=', 2], ['<=', 5]],
+            'points': [10, 0, 10, 20, 35],
+            'nan_points': 35,
+            'note': 'Late payments'
+        },
+        {
+            'name': 'num_accounts',
+            'label': 'Active Accounts',
+            'input': 'numAccounts',
+            'breakpoints': [['<=', 4], ['<=', 7], ['<=', 10]],
+            'points': [0, 3, 8, 12],
+            'nan_points': 0,
+            'note': 'Fewer is better'
+        },
+        {
+            'name': 'savings_buffer',
+            'label': 'Savings Buffer',
+            'input': 'savingsMonths',
+            'breakpoints': [['<', 1], ['<', 3], ['<', 6]],
+            'points': [10, 5, 2, 0],
+            'nan_points': 0,
+            'note': 'Emergency fund in months of income'
+        },
+        {
+            'name': 'loan_to_value',
+            'label': 'Loan-to-Value',
+            'input': 'loanToIncome',
+            'breakpoints': [['<=', 100], ['<=', 200], ['<=', 350], ['<=', 500]],
+            'points': [0, 3, 8, 15, 20],
+            'nan_points': 0,
+            'note': 'Loan vs annual income, %'
+        },
+        {
+            'name': 'interest_rate',
+            'label': 'Interest Rate',
+            'input': 'interestRate',
+            'breakpoints': [['<=', 9], ['<=', 12], ['<=', 15]],
+            'points': [0, 1, 4, 8],
+            'nan_points': 0,
+            'note': 'Rate acceptance'
+        }
+    ],
+    # Risk score → rating, same breakpoint convention as the factors
+    'ratings': {
+        'breakpoints': [['<', 20], ['<', 35], ['<', 50], ['<', 70]],
+        'labels': ['Excellent', 'Good', 'Average', 'Fair', 'Poor']
+    }
+}
+
+# Fallbacks for fields missing from the input
+FIELD_DEFAULTS = {
+    'age': 0,
+    'income': 0,
+    'creditRating': 'Average',
+    'debtToIncomeRatio': 0,
+    'employmentLength': 0,
+    'numAccounts': 0,
+    'latePayments': 0,
+    'loanAmount': 0,
+    'interestRate': 0,
+    'savingsBalance': 0
+}
+
+# Valid range of every numeric field, mirroring the Streamlit input widgets
+# (None means unbounded on that side)
+FIELD_RANGES = {
+    'age': (18, 100),
+    'income': (0, None),
+    'debtToIncomeRatio': (0.0, 1.0),
+    'employmentLength': (0, 50),
+    'numAccounts': (0, 20),
+    'latePayments': (0, 20),
+    'loanAmount': (0, None),
+    'interestRate': (0.0, 30.0),
+    'savingsBalance': (0, None)
+}
+
+
+def savings_months(input_data):
+    """Savings buffer in months of income (0 when income is not positive)"""
+    income = input_data.get('income', 0)
+    savings_balance = input_data.get('savingsBalance', 0)
+    return (savings_balance / (income / 12)) if income > 0 else 0
+
+
+def loan_to_income(input_data):
+    """Loan amount as a percentage of annual income (0 when income is not positive)"""
+    income = input_data.get('income', 0)
+    loan_amount = input_data.get('loanAmount', 0)
+    return (loan_amount / income * 100) if income > 0 else 0
+
+
+# Inputs computed from other fields rather than read directly
+DERIVED_INPUTS = {
+    'savingsMonths': savings_months,
+    'loanToIncome': loan_to_income
+}
+
+
+def compile_bounds(breakpoints):
+    """
+    Turn [op, value] breakpoints into strict upper bounds for bisect_right.
+
+    'x <= v' is the same test as 'x < nextafter(v)', so every band becomes
+    bounds[i-1] <= x < bounds[i] and bisect_right returns the band index.
+    """
+    bounds = []
+    for op, value in breakpoints:
+        if op == '<':
+            bounds.append(float(value))
+        elif op == '<=':
+            bounds.append(math.nextafter(float(value), math.inf))
+        else:
+            raise ValueError(f"Unknown breakpoint operator '{op}'")
+    if bounds != sorted(bounds):
+        raise ValueError('Breakpoints must be in ascending order')
+    return tuple(bounds)
+
+
+class ScoreBreakdown:
+    """Points of every factor from one scorecard evaluation, plus the pre-cap total"""
+
+    __slots__ = ('names', 'points', 'total', 'score')
+
+    def __init__(self, names, points, max_score):
+        self.names = names          # factor names, shared by every breakdown of a scorecard
+        self.points = points        # tuple of ints in factor order
+        self.total = sum(points)    # before the max_score cap
+        self.score = min(self.total, max_score)
+
+    def as_dict(self):
+        return dict(zip(self.names, self.points))
+
+
+class CompiledScorecard:
+    """Scorecard definition compiled into lookup arrays for bisect scoring"""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.version = str(definition.get('version', ''))
+        self.max_score = definition['max_score']
+        self.factors = []
+        for factor in definition['factors']:
+            if 'categories' in factor:
+                compiled = {
+                    'name': factor['name'],
+                    'input': factor['input'],
+                    'categories': dict(factor['categories']),
+                    'default_points': factor['default_points']
+                }
+            else:
+                bounds = compile_bounds(factor['breakpoints'])
+                if len(factor['points']) != len(bounds) + 1:
+                    raise ValueError(f"Factor '{factor['name']}' needs one more points entry than breakpoints")
+                compiled = {
+                    'name': factor['name'],
+                    'input': factor['input'],
+                    'bounds': bounds,
+                    'points': tuple(factor['points']),
+                    'nan_points': factor.get('nan_points', 0)
+                }
+            if factor['input'] not in FIELD_DEFAULTS and factor['input'] not in DERIVED_INPUTS:
+                raise ValueError(f"Factor '{factor['name']}' reads unknown input '{factor['input']}'")
+            self.factors.append(compiled)
+
+        ratings = definition['ratings']
+        self.rating_bounds = compile_bounds(ratings['breakpoints'])
+        self.rating_labels = tuple(ratings['labels'])
+        if len(self.rating_labels) != len(self.rating_bounds) + 1:
+            raise ValueError('Ratings need one more label than breakpoints')
+
+        self.factor_names = tuple(factor['name'] for factor in self.factors)
+        self.factor_labels = tuple(factor['label'] for factor in definition['factors'])
+
+        # Flattened rows for the scalar paths, grouped so score() needs no
+        # per-factor branching: plain fields, derived inputs, categories. Each
+        # row starts with its factor's position, which evaluate() writes to.
+        self._direct = []
+        self._derived = []
+        self._categorical = []
+        for position, factor in enumerate(self.factors):
+            key = factor['input']
+            if 'categories' in factor:
+                self._categorical.append((position, key, FIELD_DEFAULTS[key], factor['categories'], factor['default_points']))
+            elif key in DERIVED_INPUTS:
+                self._derived.append((position, DERIVED_INPUTS[key], factor['bounds'], factor['points'], factor['nan_points']))
+            else:
+                self._direct.append((position, key, FIELD_DEFAULTS[key], factor['bounds'], factor['points'], factor['nan_points']))
+
+    def score(self, input_data):
+        """Risk score (0 to max_score, higher = more risk) for one applicant"""
+        get = input_data.get
+        risk_score = 0
+        for _, key, default, bounds, points, nan_points in self._direct:
+            value = get(key, default)
+            risk_score += points[bisect_right(bounds, value)] if value == value else nan_points
+        for _, derive, bounds, points, nan_points in self._derived:
+            value = derive(input_data)
+            risk_score += points[bisect_right(bounds, value)] if value == value else nan_points
+        for _, key, default, categories, default_points in self._categorical:
+            risk_score += categories.get(get(key, default), default_points)
+        return min(risk_score, self.max_score)
+
+    def evaluate(self, input_data):
+        """Score one applicant and keep every factor's points (a ScoreBreakdown)"""
+        get = input_data.get
+        points = [0] * len(self.factors)
+        for position, key, default, bounds, factor_points, nan_points in self._direct:
+            value = get(key, default)
+            points[position] = factor_points[bisect_right(bounds, value)] if value == value else nan_points
+        for position, derive, bounds, factor_points, nan_points in self._derived:
+            value = derive(input_data)
+            points[position] = factor_points[bisect_right(bounds, value)] if value == value else nan_points
+        for position, key, default, categories, default_points in self._categorical:
+            points[position] = categories.get(get(key, default), default_points)
+        return ScoreBreakdown(self.factor_names, tuple(points), self.max_score)
+
+    def band_key(self, input_data):
+        """
+        Band index of every factor, as a hashable tuple.
+
+        Applicants with the same band key get the same score, so it is a
+        quantized cache key. NaN inputs map to band -1 and unknown categories
+        to None.
+        """
+        get = input_data.get
+        key = []
+        for factor in self.factors:
+            name = factor['input']
+            value = DERIVED_INPUTS[name](input_data) if name in DERIVED_INPUTS else get(name, FIELD_DEFAULTS[name])
+            if 'categories' in factor:
+                key.append(value if value in factor['categories'] else None)
+            else:
+                key.append(bisect_right(factor['bounds'], value) if value == value else -1)
+        return tuple(key)
+
+    def score_bands(self, band_key):
+        """Risk score for a band key from band_key()"""
+        risk_score = 0
+        for factor, band in zip(self.factors, band_key):
+            if 'categories' in factor:
+                risk_score += factor['categories'].get(band, factor['default_points'])
+            else:
+                risk_score += factor['nan_points'] if band < 0 else factor['points'][band]
+        return min(risk_score, self.max_score)
+
+    def rating(self, risk_score):
+        """Rating label for a risk score"""
+        return self.rating_labels[bisect_right(self.rating_bounds, risk_score)]
+
+    def formula(self):
+        """Human-readable factor list for /api/formula"""
+        lines = []
+        for factor in self.definition['factors']:
+            if 'categories' in factor:
+                points = list(factor['categories'].values()) + [factor['default_points']]
+                lines.append(f"{factor['label']}: {min(points)}-{max(points)} points ({factor['note']})")
+            else:
+                lines.append(f"{factor['label']}: Up to {max(factor['points'])} points ({factor['note']})")
+        return lines
+
+
+def compile_scorecard(definition):
+    """Validate a scorecard definition and compile it for scoring"""
+    return CompiledScorecard(definition)
+
+
+def load_scorecard(path):
+    """Compile a scorecard definition from a JSON file (same layout as SCORECARD_DEFINITION)"""
+    with open(path, encoding='utf-8') as handle:
+        definition = json.load(handle)
+    if not definition.get('version'):
+        raise ValueError(f'Scorecard file {path} needs a version')
+    return compile_scorecard(definition)
+
+
+# Compiled once at import; every front-end scores from this instance
+SCORECARD = compile_scorecard(SCORECARD_DEFINITION)
@@ -0,0 +1,195 @@
+"""
+Versioned scorecards loaded from JSON files and hot-swapped while serving.
+
+A store holds the scorecard currently in force. Requests read `store.current`
+once and score the whole request with that object, so replacing it is a
+single reference assignment: requests in flight finish on the version they
+started with and none is dropped or sees a mix of two versions. A new file
+is compiled and checked before the swap; a file that fails to load leaves
+the running version in place.
+
+    python scorecard_store.py export scorecards/1.0.json    # built-in table as a config file
+    python scorecard_store.py check scorecards/1.1.json     # compile it and diff against production
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from scorecard import SCORECARD, SCORECARD_DEFINITION, load_scorecard
+
+
+class ScorecardStore:
+    """The active scorecard, reloadable from `path` (None keeps `default` for good)"""
+
+    def __init__(self, path=None, default=SCORECARD, prepare=None):
+        self.path = path
+        # prepare(scorecard) runs before a swap and may raise to reject it
+        self._prepare = prepare
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._interval = None
+        self._signature = self._stat()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        # A bad file at startup fails loudly instead of serving the fallback
+        self.current = load_scorecard(path) if path else default
+        if prepare is not None:
+            prepare(self.current)
+        self.loaded_at = time.time()
+        # A forked gunicorn worker gets a fresh lock (and its own watcher, if any)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self._watcher is not None:
+            self._start_watcher()
+
+    def on_swap(self, callback):
+        """Call callback(old, new) after every swap"""
+        self._listeners.append(callback)
+
+    def swap(self, scorecard):
+        """Make `scorecard` current (after prepare) and notify listeners"""
+        if self._prepare is not None:
+            self._prepare(scorecard)
+        old, self.current = self.current, scorecard
+        self.loaded_at = time.time()
+        self.reloads += 1
+        for callback in self._listeners:
+            callback(old, scorecard)
+        return old
+
+    def _stat(self):
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self):
+        """Load the file again and swap it in; returns False (keeping the current version) if it fails"""
+        if not self.path:
+            return False
+        with self._lock:
+            self._signature = self._stat()
+            try:
+                self.swap(load_scorecard(self.path))
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f'{type(e).__name__}: {e}'
+                return False
+            self.last_error = None
+            return True
+
+    def check(self):
+        """Reload if the file changed since it was last read"""
+        if self.path and self._stat() != self._signature:
+            return self.reload()
+        return False
+
+    def watch(self, interval=2.0):
+        """Poll the file for changes from a daemon thread (restarted in forked workers)"""
+        if not self.path or interval <= 0:
+            return
+        if self._watcher is None:
+            self._interval = interval
+            self._start_watcher()
+
+    def _start_watcher(self):
+        def run():
+            while True:
+                time.sleep(self._interval)
+                self.check()
+
+        self._watcher = threading.Thread(target=run, name='scorecard-watcher', daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        return {
+            'version': self.current.version,
+            'path': self.path,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_store():
+    """
+    Process-wide store for CREDIT_RISK_SCORECARD, the file app.py serves, polled
+    every CREDIT_RISK_SCORECARD_POLL seconds. For front ends like Streamlit
+    whose scripts re-run: every run and page gets the same store.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            store = ScorecardStore(os.environ.get('CREDIT_RISK_SCORECARD'))
+            store.watch(float(os.environ.get('CREDIT_RISK_SCORECARD_POLL', 2)))
+            _shared = store
+        return _shared
+
+
+def diff_scorecards(old, new):
+    """Human-readable list of what changed between two compiled scorecards"""
+    lines = []
+    old_factors = {factor['name']: factor for factor in old.definition['factors']}
+    new_factors = {factor['name']: factor for factor in new.definition['factors']}
+    for name in old_factors.keys() - new_factors.keys():
+        lines.append(f'removed factor {name}')
+    for name in new_factors.keys() - old_factors.keys():
+        lines.append(f'added factor {name}')
+    for name in old_factors.keys() & new_factors.keys():
+        for key in ('input', 'breakpoints', 'points', 'nan_points', 'categories', 'default_points'):
+            before, after = old_factors[name].get(key), new_factors[name].get(key)
+            if before != after:
+                lines.append(f'{name}.{key}: {before} -> {after}')
+    for key in ('breakpoints', 'labels'):
+        before, after = old.definition['ratings'][key], new.definition['ratings'][key]
+        if before != after:
+            lines.append(f'ratings.{key}: {before} -> {after}')
+    if old.max_score != new.max_score:
+        lines.append(f'max_score: {old.max_score} -> {new.max_score}')
+    return sorted(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='write the built-in scorecard as a JSON config file')
+    export.add_argument('path')
+    check = commands.add_parser('check', help='compile a config file and show how it differs from production')
+    check.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        with open(args.path, 'w', encoding='utf-8') as handle:
+            json.dump(SCORECARD_DEFINITION, handle, indent=2, ensure_ascii=False)
+            handle.write('\n')
+        print(f'Wrote scorecard {SCORECARD.version} to {args.path}')
+        return 0
+
+    try:
+        candidate = load_scorecard(args.path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f'{args.path}: {type(e).__name__}: {e}')
+        return 1
+    print(f'{args.path}: scorecard {candidate.version} compiles')
+    changes = diff_scorecards(SCORECARD, candidate)
+    print('\n'.join(f'  {line}' for line in changes) if changes else f'  same tables as built-in {SCORECARD.version}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
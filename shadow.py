@@ -0,0 +1,177 @@
+"""
+Shadow scoring: a candidate scorecard scores production traffic in the background.
+
+The request path appends what it scored (inputs, production score and rating)
+to a queue and returns; a daemon thread drains the queue, rescores it with the
+candidate in one vectorized pass and aggregates score deltas and rating flips
+against production. Nothing the candidate does reaches a response. Statistics
+restart whenever the production or candidate scorecard is swapped, so they
+always compare one pair of versions.
+"""
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from batch_scoring import score_batch
+from scorecard import FIELD_DEFAULTS
+
+
+class ShadowScorer:
+    """Background comparison of a candidate scorecard (from a ScorecardStore) against production"""
+
+    def __init__(self, candidate, production, flush_interval=0.5, max_pending=100_000):
+        self.candidate = candidate
+        self.production = production
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # (production scorecard, inputs, scores, ratings): one dict and scalars
+        # per request, or columns and arrays per batch chunk
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.reset()
+        # A forked gunicorn worker starts with an empty queue and its own thread
+        os.register_at_fork(after_in_child=self._after_fork)
+        candidate.on_swap(lambda old, new: self.reset())
+        production.on_swap(lambda old, new: self.reset())
+
+    def reset(self):
+        """Start the comparison over for the current pair of versions"""
+        with self._lock:
+            self._pair = (self.production.current, self.candidate.current)
+            self.since = time.time()
+            self.compared = 0
+            self.changed = 0
+            self.delta_sum = 0
+            self.delta_abs_sum = 0
+            self.delta_min = None
+            self.delta_max = None
+            self.deltas = Counter()
+            self.flips = Counter()
+            self.better = 0
+            self.worse = 0
+
+    def _after_fork(self):
+        self._pending.clear()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                self._thread.start()
+
+    def submit(self, production, input_data, risk_score, rating):
+        """Queue one request scored by `production` (never blocks; drops when the queue is full)"""
+        self._submit((production, input_data, risk_score, rating))
+
+    def submit_batch(self, production, columns, scores, ratings):
+        """Queue a scored batch chunk: its input columns, score and rating arrays"""
+        if len(scores):
+            self._submit((production, columns, np.asarray(scores), ratings))
+
+    def _submit(self, entry):
+        if self._thread is None:
+            self._start()
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(entry)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.compare_pending()
+            except Exception as e:
+                # A broken candidate must not stop the loop; its rows are lost
+                self.errors += 1
+                self.last_error = f'{type(e).__name__}: {e}'
+
+    def compare_pending(self):
+        """Rescore everything queued with the candidate and fold it into the statistics"""
+        pending = self._pending
+        entries = [pending.popleft() for _ in range(len(pending))]
+        production, candidate = self._pair
+        rows = [entry for entry in entries if entry[0] is production and not isinstance(entry[2], np.ndarray)]
+        chunks = [entry for entry in entries if entry[0] is production and isinstance(entry[2], np.ndarray)]
+        if not rows and not chunks:
+            return
+
+        columns = {}
+        for field in FIELD_DEFAULTS:
+            parts = [np.asarray(chunk[1][field]) for chunk in chunks]
+            if rows:
+                dtype = object if isinstance(FIELD_DEFAULTS[field], str) else float
+                parts.append(np.array([row[1][field] for row in rows], dtype=dtype))
+            columns[field] = np.concatenate(parts)
+        scores = np.concatenate([chunk[2] for chunk in chunks] + ([np.array([row[2] for row in rows])] if rows else []))
+        ratings = np.concatenate([np.asarray(chunk[3], dtype=object) for chunk in chunks]
+                                 + ([np.array([row[3] for row in rows], dtype=object)] if rows else []))
+
+        shadow_scores, shadow_ratings = score_batch(columns, candidate)
+        delta = shadow_scores - scores
+        flipped = shadow_ratings != ratings
+        production_rank = {label: rank for rank, label in enumerate(production.rating_labels)}
+        candidate_rank = {label: rank for rank, label in enumerate(candidate.rating_labels)}
+        values, counts = np.unique(delta, return_counts=True)
+
+        with self._lock:
+            if self._pair != (production, candidate):
+                return
+            self.compared += len(delta)
+            self.changed += int(np.count_nonzero(delta))
+            self.delta_sum += int(delta.sum())
+            self.delta_abs_sum += int(np.abs(delta).sum())
+            low, high = int(delta.min()), int(delta.max())
+            self.delta_min = low if self.delta_min is None else min(self.delta_min, low)
+            self.delta_max = high if self.delta_max is None else max(self.delta_max, high)
+            self.deltas.update(dict(zip(values.tolist(), counts.tolist())))
+            for (before, after), count in Counter(zip(ratings[flipped].tolist(), shadow_ratings[flipped].tolist())).items():
+                self.flips[(before, after)] += count
+                # Ratings run best to worst, so a lower rank is an upgrade
+                if candidate_rank[after] < production_rank.get(before, len(production_rank)):
+                    self.better += count
+                else:
+                    self.worse += count
+
+    def report(self):
+        """Aggregated score deltas and rating flips of the candidate against production"""
+        with self._lock:
+            compared = self.compared
+            flips = sum(self.flips.values())
+            return {
+                'production_version': self._pair[0].version,
+                'candidate_version': self._pair[1].version,
+                'since': self.since,
+                'compared': compared,
+                'pending': len(self._pending),
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'score_delta': {
+                    'mean': self.delta_sum / compared if compared else 0.0,
+                    'mean_abs': self.delta_abs_sum / compared if compared else 0.0,
+                    'min': self.delta_min,
+                    'max': self.delta_max,
+                    'changed': self.changed,
+                    # candidate minus production score -> applicants
+                    'histogram': {str(delta): count for delta, count in sorted(self.deltas.items())}
+                },
+                'rating_flips': {
+                    'total': flips,
+                    'rate': flips / compared if compared else 0.0,
+                    'better': self.better,
+                    'worse': self.worse,
+                    'by_rating': {f'{before} -> {after}': count for (before, after), count in self.flips.most_common()}
+                }
+            }
@@ -0,0 +1,89 @@
+"""
+Cold-start bookkeeping for the scoring service: import time, warm-up and first request.
+
+app.py records how long its own import took and runs warm_up() in stages:
+the single-applicant path first (scorecard, schema, cache; no NumPy or
+pandas), then the batch path (NumPy, pandas and the compiled arrays). The
+service is ready once the first stage is done, so /api/ready turns 200 before
+the heavy modules have loaded. FirstRequestTimer times the first request each
+process serves, which is what a client hitting a fresh pod waits for.
+"""
+import sys
+import threading
+import time
+
+# Modules whose presence in sys.modules shows what a process has paid for
+HEAVY_MODULES = ('flask', 'numpy', 'pandas', 'pyarrow')
+
+
+class StartupReport:
+    """Import, warm-up and first-request timings of this process"""
+
+    def __init__(self, import_started):
+        self.import_started = import_started
+        self.import_seconds = None
+        self.warm = {}
+        self.first_request = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def imported(self):
+        """Mark the end of the app's import"""
+        self.import_seconds = time.perf_counter() - self.import_started
+
+    def is_warm(self, stage):
+        return stage in self.warm
+
+    def run(self, stage, function):
+        """Run a warm-up stage once per process (concurrent callers wait for the first)"""
+        if stage in self.warm:
+            return
+        with self._lock:
+            if stage in self.warm:
+                return
+            started = time.perf_counter()
+            function()
+            self.warm[stage] = time.perf_counter() - started
+
+    def start_in_background(self, function):
+        """Run function (the whole warm-up) on a daemon thread, once per process"""
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=function, name='warm-up', daemon=True).start()
+
+    def after_fork(self):
+        """A forked worker keeps the parent's warm state but serves its own first request"""
+        self._lock = threading.Lock()
+        self._started = False
+        self.first_request = None
+
+    def report(self):
+        return {
+            'import_seconds': self.import_seconds,
+            'warm_up_seconds': dict(self.warm),
+            'first_request': self.first_request,
+            'uptime_seconds': time.perf_counter() - self.import_started,
+            'modules_loaded': [name for name in HEAVY_MODULES if name in sys.modules]
+        }
+
+
+class FirstRequestTimer:
+    """WSGI middleware recording the path and latency of the first request a process serves"""
+
+    def __init__(self, wsgi_app, report):
+        self.wsgi_app = wsgi_app
+        self.report = report
+
+    def __call__(self, environ, start_response):
+        if self.report.first_request is not None:
+            return self.wsgi_app(environ, start_response)
+        started = time.perf_counter()
+        result = self.wsgi_app(environ, start_response)
+        if self.report.first_request is None:
+            self.report.first_request = {
+                'path': environ.get('PATH_INFO', ''),
+                'seconds': time.perf_counter() - started,
+                'after_import_seconds': started - self.report.import_started
+            }
+        return result
@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+from emi import debt_to_income, monthly_emi
+from scorecard_store import shared_store
+
 # Page config
 st.set_page_config(
     page_title="Indian Credit Risk Assessment",
@@ -47,197 +50,86 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Mathematical Credit Risk Calculator
-def calculate_credit_risk(input_data):
-    """Calculate credit risk using mathematical formulas based on Indian banking standards."""
-    
-    age = input_data['age']
-    income = input_data['income']
-    credit_rating = input_data['creditRating']
-    debt_to_income = input_data['debtToIncomeRatio']
-    employment_years = input_data['employmentLength']
-    num_accounts = input_data['numAccounts']
-    late_payments = input_data['latePayments']
-    loan_amount = input_data['loanAmount']
-    interest_rate = input_data['interestRate']
-    savings_balance = input_data['savingsBalance']
-    
-    risk_score = 0
-    
-    # 1. Age Factor
-    if age < 25 or age > 60:
-        risk_score += 10
-    elif age < 30 or age > 55:
-        risk_score += 5
-    
-    # 2. Income Stability
-    if income < 150000:
-        risk_score += 25
-    elif income < 300000:
-        risk_score += 15
-    elif income < 500000:
-        risk_score += 8
-    elif income < 1000000:
-        risk_score += 3
-    
-    # 3. Credit Rating
-    credit_rating_weight = {
-        'Excellent': 0,
-        'Good': 5,
-        'Average': 15,
-        'Fair': 25,
-        'Poor': 40,
-        'No History': 30
+# Scoring and EMI take microseconds, less than an st.cache_data hit costs
+# (hashing the arguments and unpickling the result), so they run uncached.
+def assess(scorecard, input_data):
+    """(risk score, rating, factor points, pre-cap total) for one applicant."""
+    breakdown = scorecard.evaluate(input_data)
+    return breakdown.score, scorecard.rating(breakdown.score), breakdown.points, breakdown.total
+
+def loan_emi(loan_amount, interest_rate, loan_tenure, income):
+    """(monthly EMI, debt-to-income ratio) for one loan."""
+    monthly_loan = float(monthly_emi(loan_amount, interest_rate, loan_tenure))
+    return monthly_loan, float(debt_to_income(monthly_loan, income))
+
+# Assessment shown for each rating produced by the scorecard
+ASSESSMENTS = {
+    'Excellent': {
+        'rating': 'Excellent',
+        'risk_level': 'EXCELLENT',
+        'color': 'excellent',
+        'description': 'Your credit profile is excellent. You can get loans from all banks at the best rates.'
+    },
+    'Good': {
+        'rating': 'Good',
+        'risk_level': 'GOOD',
+        'color': 'good',
+        'description': 'Your credit profile is good. You can easily get loan approval.'
+    },
+    'Average': {
+        'rating': 'Average',
+        'risk_level': 'AVERAGE',
+        'color': 'average',
+        'description': 'Your credit profile is average. You may get loans at higher interest rates.'
+    },
+    'Fair': {
+        'rating': 'Fair',
+        'risk_level': 'FAIR',
+        'color': 'fair',
+        'description': 'Your credit profile is weak. You may get higher rates and stricter conditions.'
+    },
+    'Poor': {
+        'rating': 'Poor',
+        'risk_level': 'POOR',
+        'color': 'poor',
+        'description': 'Your credit profile is poor. You may face difficulty getting loans.'
     }
-    risk_score += credit_rating_weight.get(credit_rating, 15)
-    
-    # 4. Debt-to-Income Ratio
-    if debt_to_income > 0.70:
-        risk_score += 25
-    elif debt_to_income > 0.50:
-        risk_score += 20
-    elif debt_to_income > 0.35:
-        risk_score += 10
-    elif debt_to_income > 0.20:
-        risk_score += 3
-    
-    # 5. Employment Stability
-    if employment_years < 1:
-        risk_score += 15
-    elif employment_years < 2:
-        risk_score += 10
-    elif employment_years < 5:
-        risk_score += 5
-    
-    # 6. Payment History
-    if late_payments == 0:
-        payment_penalty = 0
-    elif late_payments <= 2:
-        payment_penalty = 10
-    elif late_payments <= 5:
-        payment_penalty = 20
-    else:
-        payment_penalty = 35
-    risk_score += payment_penalty
-    
-    # 7. Number of Active Accounts
-    if num_accounts > 10:
-        risk_score += 12
-    elif num_accounts > 7:
-        risk_score += 8
-    elif num_accounts > 4:
-        risk_score += 3
-    
-    # 8. Savings Buffer
-    savings_to_monthly_income = (savings_balance / (income / 12)) if income > 0 else 0
-    if savings_to_monthly_income < 1:
-        risk_score += 10
-    elif savings_to_monthly_income < 3:
-        risk_score += 5
-    elif savings_to_monthly_income < 6:
-        risk_score += 2
-    
-    # 9. Loan-to-Value Ratio
-    ltv = (loan_amount / income * 100) if income > 0 else 0
-    if ltv > 500:
-        risk_score += 20
-    elif ltv > 350:
-        risk_score += 15
-    elif ltv > 200:
-        risk_score += 8
-    elif ltv > 100:
-        risk_score += 3
-    
-    # 10. Interest Rate Acceptance
-    if interest_rate > 15:
-        risk_score += 8
-    elif interest_rate > 12:
-        risk_score += 4
-    elif interest_rate > 9:
-        risk_score += 1
-    
-    risk_score = min(risk_score, 100)
-    return risk_score
+}
 
-def get_indian_credit_assessment(risk_score):
-    """Convert risk score to Indian credit assessment."""
-    if risk_score < 20:
-        return {
-            'rating': 'Excellent',
-            'risk_level': 'EXCELLENT',
-            'color': 'excellent',
-            'description': 'Your credit profile is excellent. You can get loans from all banks at the best rates.'
-        }
-    elif risk_score < 35:
-        return {
-            'rating': 'Good',
-            'risk_level': 'GOOD',
-            'color': 'good',
-            'description': 'Your credit profile is good. You can easily get loan approval.'
-        }
-    elif risk_score < 50:
-        return {
-            'rating': 'Average',
-            'risk_level': 'AVERAGE',
-            'color': 'average',
-            'description': 'Your credit profile is average. You may get loans at higher interest rates.'
-        }
-    elif risk_score < 70:
-        return {
-            'rating': 'Fair',
-            'risk_level': 'FAIR',
-            'color': 'fair',
-            'description': 'Your credit profile is weak. You may get higher rates and stricter conditions.'
-        }
-    else:
-        return {
-            'rating': 'Poor',
-            'risk_level': 'POOR',
-            'color': 'poor',
-            'description': 'Your credit profile is poor. You may face difficulty getting loans.'
-        }
-
-# Input form
+# Input form: widgets inside a form only rerun the script on submit
 st.subheader("Enter Your Information")
 
-col1, col2 = st.columns(2)
-
-with col1:
-    age = st.number_input("Age (Years)", min_value=18, max_value=100, value=35)
-    income = st.number_input("Annual Income (₹)", min_value=0, value=500000)
-    credit_rating = st.selectbox(
-        "CIBIL Credit Rating",
-        ["Excellent (750-900)", "Good (700-749)", "Average (650-699)", "Fair (600-649)", "Poor (Below 600)", "No History"]
-    )
-    dti_ratio = st.number_input("Debt-to-Income Ratio", min_value=0.0, max_value=1.0, value=0.35, step=0.01)
-    employment_length = st.number_input("Employment Length (Years)", min_value=0, max_value=50, value=5)
-
-with col2:
-    num_accounts = st.number_input("Number of Active Accounts", min_value=0, max_value=20, value=4)
-    late_payments = st.number_input("Late Payments (Count)", min_value=0, max_value=20, value=2)
-    loan_amount = st.number_input("Loan Amount (₹)", min_value=0, value=1000000)
-    interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, max_value=30.0, value=8.5)
-    loan_tenure = st.selectbox("Loan Tenure (Years)", [1, 2, 3, 5, 7, 10, 15, 20, 25, 30])
-    savings_balance = st.number_input("Savings Balance (₹)", min_value=0, value=100000)
+with st.form("applicant"):
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        age = st.number_input("Age (Years)", min_value=18, max_value=100, value=35)
+        income = st.number_input("Annual Income (₹)", min_value=0, value=500000)
+        credit_rating = st.selectbox(
+            "CIBIL Credit Rating",
+            ["Excellent (750-900)", "Good (700-749)", "Average (650-699)", "Fair (600-649)", "Poor (Below 600)", "No History"]
+        )
+        dti_ratio = st.number_input("Debt-to-Income Ratio", min_value=0.0, max_value=1.0, value=0.35, step=0.01)
+        employment_length = st.number_input("Employment Length (Years)", min_value=0, max_value=50, value=5)
+    
+    with col2:
+        num_accounts = st.number_input("Number of Active Accounts", min_value=0, max_value=20, value=4)
+        late_payments = st.number_input("Late Payments (Count)", min_value=0, max_value=20, value=2)
+        loan_amount = st.number_input("Loan Amount (₹)", min_value=0, value=1000000)
+        interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, max_value=30.0, value=8.5)
+        loan_tenure = st.selectbox("Loan Tenure (Years)", [1, 2, 3, 5, 7, 10, 15, 20, 25, 30])
+        savings_balance = st.number_input("Savings Balance (₹)", min_value=0, value=100000)
+    
+    submitted = st.form_submit_button("Assess Credit Risk", use_container_width=True)
 
 # Auto-calculate DTI
 st.markdown("---")
 st.subheader("Debt-to-Income Ratio Calculation")
 
 # Calculate real EMI (Equated Monthly Installment)
+# EMI Formula: P × r × (1+r)^n / ((1+r)^n - 1), or P / n at 0% interest
 monthly_income = income / 12
-monthly_interest_rate = interest_rate / 100 / 12
-num_months = loan_tenure * 12
-
-if loan_amount > 0 and monthly_interest_rate > 0:
-    # EMI Formula: P × r × (1+r)^n / ((1+r)^n - 1)
-    numerator = loan_amount * monthly_interest_rate * ((1 + monthly_interest_rate) ** num_months)
-    denominator = ((1 + monthly_interest_rate) ** num_months) - 1
-    monthly_loan = numerator / denominator
-else:
-    monthly_loan = loan_amount / 12 if loan_tenure else 0
-
-calculated_dti = (monthly_loan / monthly_income) if monthly_income > 0 else 0
+monthly_loan, calculated_dti = loan_emi(loan_amount, interest_rate, loan_tenure, income)
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -249,10 +141,9 @@ with col3:
 
 st.info(f"EMI Calculation: ₹{monthly_loan:,.0f} ÷ ₹{monthly_income:,.0f} = {calculated_dti:.2f} (Based on {loan_tenure}-year tenure @ {interest_rate}%)")
 
-# Assess button
 st.markdown("---")
 
-if st.button("Assess Credit Risk", key="predict", use_container_width=True):
+if submitted:
     # Map credit rating to value
     rating_map = {
         "Excellent (750-900)": "Excellent",
@@ -277,8 +168,13 @@ if st.button("Assess Credit Risk", key="predict", use_container_width=True):
         'loanTenure': loan_tenure
     }
     
-    risk_score = calculate_credit_risk(input_data)
-    assessment = get_indian_credit_assessment(risk_score)
+    # Same scorecard file as the Flask API (CREDIT_RISK_SCORECARD), one version for the whole run
+    scorecard = shared_store().current
+    risk_score, rating, factor_points, total_points = assess(scorecard, input_data)
+    assessment = ASSESSMENTS.get(rating)
+    if assessment is None:
+        st.error(f"Scorecard {scorecard.version} has no assessment for the rating '{rating}'.")
+        st.stop()
     
     # Display result
     st.markdown("---")
@@ -303,7 +199,8 @@ if st.button("Assess Credit Risk", key="predict", use_container_width=True):
         st.write(f"• Age: {age} years")
         st.write(f"• Annual Income: ₹{income:,}")
         st.write(f"• CIBIL Rating: {rating_map[credit_rating]}")
-        st.write(f"• DTI Ratio: {dti_ratio:.2f}")
+        # The DTI that was scored (derived from the loan), not the manual entry
+        st.write(f"• DTI Ratio: {input_data['debtToIncomeRatio']:.2f}")
         st.write(f"• Employment: {employment_length} years")
     
     with col2:
@@ -313,6 +210,15 @@ if st.button("Assess Credit Risk", key="predict", use_container_width=True):
         st.write(f"• Loan Amount: ₹{loan_amount:,}")
         st.write(f"• Interest Rate: {interest_rate}%")
         st.write(f"• Savings: ₹{savings_balance:,}")
+    
+    # Points each factor contributed, from the same evaluation as the score
+    st.write("**Points by Factor:**")
+    st.table(pd.DataFrame({
+        'Factor': scorecard.factor_labels,
+        'Points': factor_points
+    }).set_index('Factor'))
+    if total_points > risk_score:
+        st.caption(f"Factor points total {total_points}, capped at {scorecard.max_score}.")
 
 # Footer
 st.markdown("---")
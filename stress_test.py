@@ -0,0 +1,274 @@
+"""
+Monte Carlo stress testing of a loan book's risk scores.
+
+Each scenario shocks some inputs (income down 20%, rates up 300 bps, ...).
+Every simulated path draws one systemic shock for the whole book plus
+idiosyncratic noise per applicant, rescores the book with the vectorized
+scorecard, and records where each applicant's rating moved. The book is
+streamed in chunks through a process pool, so memory stays bounded by the
+chunks in flight, and every chunk has its own seeded RNG stream, so results
+are reproducible whatever the number of workers.
+
+    python stress_test.py loan_book.parquet --paths 1000 --workers 8 --seed 7
+    python stress_test.py loan_book.csv --scenarios my_scenarios.json --output report.json
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_scoring import DERIVED_COLUMNS, band_points, compile_arrays, evaluate_batch, numeric_column
+from scorecard import FIELD_RANGES, SCORECARD
+
+# Built-in shock scenarios. Per field, 'scale' multiplies and 'shift' adds
+# (the mean shock), 'systemic_sd' is the path-to-path spread of that mean as a
+# fraction of it, and 'sd' is per-applicant noise (relative for 'scale',
+# absolute for 'shift'). Shocked values are clipped to the widget ranges, and
+# counts are rounded to whole numbers first.
+SCENARIOS = {
+    'income_down_20': {
+        'income': {'scale': 0.80, 'systemic_sd': 0.25, 'sd': 0.05}
+    },
+    'rates_up_300bps': {
+        'interestRate': {'shift': 3.0, 'systemic_sd': 0.20, 'sd': 0.25}
+    },
+    'dti_inflation': {
+        'debtToIncomeRatio': {'scale': 1.25, 'systemic_sd': 0.20, 'sd': 0.05}
+    },
+    'combined_downturn': {
+        'income': {'scale': 0.85, 'systemic_sd': 0.25, 'sd': 0.05},
+        'interestRate': {'shift': 2.0, 'systemic_sd': 0.20, 'sd': 0.25},
+        'debtToIncomeRatio': {'scale': 1.15, 'systemic_sd': 0.20, 'sd': 0.05},
+        'savingsBalance': {'scale': 0.70, 'systemic_sd': 0.25, 'sd': 0.10},
+        'latePayments': {'shift': 1.0, 'systemic_sd': 0.50, 'sd': 0.5}
+    }
+}
+
+QUANTILES = (0.05, 0.50, 0.95)
+
+# Fields that count events or accounts: a shocked count is still a whole number
+COUNT_FIELDS = frozenset(['numAccounts', 'latePayments'])
+
+
+def validate_scenarios(scenarios):
+    """Raise ValueError for shocks on unknown fields or with unknown keys"""
+    for name, shocks in scenarios.items():
+        for field, shock in shocks.items():
+            if field not in FIELD_RANGES:
+                raise ValueError(f"Scenario '{name}' shocks unknown numeric field '{field}'")
+            unknown = set(shock) - {'scale', 'shift', 'systemic_sd', 'sd'}
+            if unknown:
+                raise ValueError(f"Scenario '{name}' shock on '{field}' has unknown keys: {', '.join(sorted(unknown))}")
+            if ('scale' in shock) == ('shift' in shock):
+                raise ValueError(f"Scenario '{name}' shock on '{field}' needs exactly one of 'scale' or 'shift'")
+    return scenarios
+
+
+def apply_shock(values, shock, systemic, noise):
+    """Shocked copy of one column for one path (systemic: scalar draw, noise: per-applicant draws)"""
+    if 'scale' in shock:
+        scale = shock['scale']
+        factor = 1 + (scale - 1) * (1 + shock.get('systemic_sd', 0) * systemic)
+        return values * np.maximum(factor * (1 + shock.get('sd', 0) * noise), 0.0)
+    shift = shock['shift'] * (1 + shock.get('systemic_sd', 0) * systemic)
+    return values + shift + shock.get('sd', 0) * noise
+
+
+def _clip(field, values):
+    low, high = FIELD_RANGES[field]
+    if field in COUNT_FIELDS:
+        # Otherwise any positive noise on 0 late payments would cost 10 points
+        values = np.rint(values)
+    return np.clip(values, low, high)
+
+
+def stress_chunk(frame, scenarios, paths, seed, chunk_index, scorecard=SCORECARD):
+    """
+    Run every scenario's paths over one chunk of the book.
+
+    Returns {scenario: {'migration': (ratings, ratings) counts summed over
+    paths, 'score_sum': per-path sum of stressed scores, 'rating_counts':
+    (paths, ratings) applicants per stressed rating}} and the chunk's
+    baseline rating counts and score sum.
+    """
+    factors, rating_bounds, _ = compile_arrays(scorecard)
+    n_ratings = len(scorecard.rating_labels)
+    n = len(frame)
+
+    base_points, base_scores, _ = evaluate_batch(frame, scorecard)
+    base_ranks = np.searchsorted(rating_bounds, base_scores, side='right')
+    columns = {field: numeric_column(frame, field, n) for field in FIELD_RANGES}
+
+    # Categorical points never move under numeric shocks; reuse them on every path
+    fixed = np.zeros(n, dtype=np.int64)
+    numeric = []
+    for column, (field, bounds, points, default_points) in enumerate(factors):
+        if bounds is None:
+            fixed += base_points[:, column]
+        else:
+            numeric.append((field, bounds, points, default_points))
+
+    results = {}
+    # One RNG stream per (chunk, scenario): reproducible for any worker count
+    streams = np.random.SeedSequence([seed, chunk_index]).spawn(len(scenarios))
+    for (name, shocks), stream in zip(scenarios.items(), streams):
+        rng = np.random.default_rng(stream)
+        # Systemic draws depend on the path only, so every chunk agrees on them
+        systemic = np.random.default_rng([seed, sorted(scenarios).index(name)]).standard_normal((paths, len(shocks)))
+        migration = np.zeros(n_ratings * n_ratings, dtype=np.int64)
+        score_sum = np.zeros(paths, dtype=np.float64)
+        rating_counts = np.zeros((paths, n_ratings), dtype=np.int64)
+        for path in range(paths):
+            shocked = dict(columns)
+            for (field, shock), draw in zip(shocks.items(), systemic[path]):
+                shocked[field] = _clip(field, apply_shock(columns[field], shock, draw, rng.standard_normal(n)))
+            risk_score = fixed.copy()
+            for field, bounds, points, default_points in numeric:
+                values = DERIVED_COLUMNS[field](shocked, n) if field in DERIVED_COLUMNS else shocked[field]
+                risk_score += band_points(values, bounds, points, default_points)
+            np.minimum(risk_score, scorecard.max_score, out=risk_score)
+            ranks = np.searchsorted(rating_bounds, risk_score, side='right')
+            migration += np.bincount(base_ranks * n_ratings + ranks, minlength=n_ratings * n_ratings)
+            score_sum[path] = risk_score.sum()
+            rating_counts[path] = np.bincount(ranks, minlength=n_ratings)
+        results[name] = {
+            'migration': migration.reshape(n_ratings, n_ratings),
+            'score_sum': score_sum,
+            'rating_counts': rating_counts
+        }
+    baseline = {'rating_counts': np.bincount(base_ranks, minlength=n_ratings), 'score_sum': float(base_scores.sum())}
+    return results, baseline, n
+
+
+def _run_chunks(chunks, scenarios, paths, seed, workers, scorecard):
+    """Yield stress_chunk results, keeping at most 2 chunks per worker in flight"""
+    if workers <= 1:
+        for index, frame in enumerate(chunks):
+            yield stress_chunk(frame, scenarios, paths, seed, index, scorecard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, frame in enumerate(chunks):
+            pending.append(pool.submit(stress_chunk, frame, scenarios, paths, seed, index, scorecard))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_stress_test(chunks, scenarios=SCENARIOS, paths=1000, seed=0, workers=1, scorecard=SCORECARD):
+    """
+    Stress a book given as an iterable of DataFrame chunks.
+
+    Returns a report dict with the baseline rating mix and, per scenario,
+    the rating-migration matrix (row = baseline rating, column = stressed
+    rating, as a share of the row, averaged over paths) and quantiles across
+    paths of the mean score and of each rating's share of the book.
+    """
+    validate_scenarios(scenarios)
+    labels = list(scorecard.rating_labels)
+    totals = None
+    baseline_counts = np.zeros(len(labels), dtype=np.int64)
+    baseline_sum = 0.0
+    rows = 0
+    for results, baseline, n in _run_chunks(chunks, scenarios, paths, seed, workers, scorecard):
+        rows += n
+        baseline_counts += baseline['rating_counts']
+        baseline_sum += baseline['score_sum']
+        if totals is None:
+            totals = results
+            continue
+        for name, result in results.items():
+            for key, value in result.items():
+                totals[name][key] += value
+
+    report = {
+        'rows': rows,
+        'paths': paths,
+        'seed': seed,
+        'scorecard_version': scorecard.version,
+        'ratings': labels,
+        'baseline': {
+            'mean_score': baseline_sum / rows if rows else 0.0,
+            'rating_share': dict(zip(labels, (baseline_counts / max(rows, 1)).tolist()))
+        },
+        'scenarios': {}
+    }
+    for name, shocks in scenarios.items():
+        total = totals[name] if totals else None
+        if total is None:
+            continue
+        migration = total['migration'].astype(float)
+        row_sums = migration.sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            migration = np.where(row_sums > 0, migration / row_sums, 0.0)
+        mean_scores = total['score_sum'] / rows
+        shares = total['rating_counts'] / rows
+        report['scenarios'][name] = {
+            'shocks': shocks,
+            'migration': migration.round(6).tolist(),
+            'mean_score': {f'p{int(q * 100)}': float(np.quantile(mean_scores, q)) for q in QUANTILES},
+            'rating_share': {
+                label: {f'p{int(q * 100)}': float(np.quantile(shares[:, column], q)) for q in QUANTILES}
+                for column, label in enumerate(labels)
+            }
+        }
+    return report
+
+
+def format_report(report):
+    """Plain-text migration matrices and score quantiles"""
+    labels = report['ratings']
+    width = max(len(label) for label in labels) + 2
+    lines = [f"{report['rows']:,} applicants, {report['paths']:,} paths per scenario, seed {report['seed']}",
+             f"Baseline mean score {report['baseline']['mean_score']:.2f}", '']
+    for name, scenario in report['scenarios'].items():
+        mean = scenario['mean_score']
+        lines.append(f"{name}: mean score p5 {mean['p5']:.2f}, p50 {mean['p50']:.2f}, p95 {mean['p95']:.2f}")
+        lines.append(' ' * width + ''.join(label.rjust(width) for label in labels))
+        for label, row in zip(labels, scenario['migration']):
+            lines.append(label.ljust(width) + ''.join(f'{share:.1%}'.rjust(width) for share in row))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from score_file import read_chunks
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file of applicants')
+    parser.add_argument('--scenarios', help='JSON file of scenarios (default: built-in set)')
+    parser.add_argument('--paths', type=int, default=1000, help='simulated paths per scenario (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=50000, help='rows per chunk (default: 50000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='simulation processes, 1 runs in-process (default: CPU count)')
+    parser.add_argument('--output', help='write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        with open(args.scenarios, encoding='utf-8') as handle:
+            scenarios = json.load(handle)
+
+    start = time.perf_counter()
+    report = run_stress_test(read_chunks(args.input, args.chunk_size), scenarios,
+                             paths=args.paths, seed=args.seed, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(format_report(report))
+    rescored = report['rows'] * report['paths'] * len(report['scenarios'])
+    print(f"{rescored:,} rescorings in {elapsed:.2f}s ({rescored / elapsed if elapsed else 0:,.0f}/sec)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The modules sit next to app.py; the golden fixture helpers live in benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# No scorecard file polling thread during tests
+os.environ.setdefault('CREDIT_RISK_SCORECARD_POLL', '0')
@@ -0,0 +1,77 @@
+"""Async front end: micro-batched results, and a failing record only fails its own request"""
+import asyncio
+import json
+
+import pytest
+
+import async_service
+from scorecard import SCORECARD
+
+GOOD = {'age': 40, 'income': 600000, 'creditRating': 'Good'}
+
+
+async def call(method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await async_service.app({'type': 'http', 'method': method, 'path': path}, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+def run(*payloads):
+    """Post the payloads concurrently, so they share micro-batches, and return (status, body) for each"""
+    async def main():
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(call('POST', '/api/predict', payload) for payload in payloads)), 10)
+        finally:
+            await async_service.get_batcher().stop()
+
+    async_service.batcher = None
+    try:
+        return asyncio.run(main())
+    finally:
+        async_service.batcher = None
+
+
+@pytest.fixture
+def poisoned(monkeypatch):
+    """Scoring raises for any batch holding an applicant aged 99"""
+    evaluate_columns = async_service.evaluate_columns
+
+    def evaluate(columns, scorecard):
+        if 99 in columns['age']:
+            raise RuntimeError('bad record')
+        return evaluate_columns(columns, scorecard)
+
+    monkeypatch.setattr(async_service, 'evaluate_columns', evaluate)
+
+
+def test_scores_match_the_scorecard():
+    payloads = [dict(GOOD, age=age) for age in (20, 30, 45, 62)]
+    responses = run(*payloads)
+    assert [status for status, _ in responses] == [200] * 4
+    assert [body['risk_score'] for _, body in responses] == [SCORECARD.score(payload) for payload in payloads]
+
+
+def test_failing_record_only_fails_its_request(poisoned):
+    responses = run(dict(GOOD, age=30), dict(GOOD, age=99), dict(GOOD, age=45))
+    assert [status for status, _ in responses] == [200, 500, 200]
+    assert responses[1][1] == {'error': 'bad record'}
+    assert responses[0][1]['risk_score'] == SCORECARD.score(dict(GOOD, age=30))
+
+
+def test_failing_single_request_gets_a_response(poisoned):
+    assert run(dict(GOOD, age=99)) == [(500, {'error': 'bad record'})]
+
+
+def test_invalid_input():
+    status, body = run({'age': 'old'})[0]
+    assert status == 400 and body['errors'] == {'age': 'must be a number'}
@@ -0,0 +1,109 @@
+"""Audit log: what is written replays clean, and lost rows are counted"""
+import numpy as np
+import pytest
+
+from audit import AuditLog, read_segment, replay_segment, segment_paths
+from batch_scoring import evaluate_batch
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+pytest.importorskip('pyarrow')
+
+
+def rows(n):
+    rng = np.random.default_rng(0)
+    return [dict(FIELD_DEFAULTS, age=float(age), income=float(income), creditRating=rating)
+            for age, income, rating in zip(rng.integers(18, 100, n), rng.integers(0, 2_000_000, n),
+                                           rng.choice(list(SCORECARD.factors[2]['categories']), n))]
+
+
+def columns(data):
+    return {field: np.array([row[field] for row in data], dtype=object if field == 'creditRating' else float)
+            for field in FIELD_DEFAULTS}
+
+
+def open_log(directory, **options):
+    # The writer thread only flushes when the test calls flush() or close()
+    return AuditLog(str(directory), flush_entries=10 ** 6, flush_interval=3600, **options)
+
+
+def test_write_and_replay(tmp_path):
+    log = open_log(tmp_path, segment_rows=25)
+
+    def record_rows(data):
+        for row in data:
+            score = SCORECARD.score(row)
+            log.record('api_predict', dict(row, loanTenure=5.0), score, SCORECARD.rating(score))
+
+    record_rows(rows(10))
+    batch = columns(rows(40))
+    _, scores, ratings = evaluate_batch(batch)
+    log.record_batch('api_predict_batch', batch, scores, ratings)
+    log.record_batch('api_predict_batch', batch, scores[:0], ratings[:0])
+    # Segments rotate after the write that takes them past segment_rows
+    log.flush()
+    record_rows(rows(5))
+    log.close()
+
+    assert log.stats()['written'] == 55 and log.stats()['dropped'] == 0
+    paths = segment_paths([str(tmp_path)])
+    assert len(paths) == log.segments == 2
+    table = read_segment(paths[0])
+    assert table.num_rows == 50
+    assert table.column('endpoint').to_pylist()[9:11] == ['api_predict', 'api_predict_batch']
+    assert table.column('loanTenure').to_pylist()[9:11] == [5.0, None]
+    reports = [replay_segment(path) for path in paths]
+    assert [report['rows'] for report in reports] == [50, 5]
+    assert all(report['checked'] == report['rows'] and report['mismatches'] == 0 for report in reports)
+
+
+def test_replay_finds_mismatches_and_skips_unknown_versions(tmp_path):
+    log = open_log(tmp_path)
+    batch = columns(rows(20))
+    _, scores, ratings = evaluate_batch(batch)
+    tampered = scores.copy()
+    tampered[3] += 1
+    log.record_batch('api_predict_batch', batch, tampered, ratings)
+    log.record_batch('api_predict_batch', batch, scores, ratings, version='0.9')
+    log.close()
+
+    report = replay_segment(segment_paths([str(tmp_path)])[0], show=5)
+    assert (report['rows'], report['checked'], report['skipped'], report['mismatches']) == (40, 20, 20, 1)
+    assert report['examples'] == [{'row': 3, 'version': SCORECARD.version,
+                                   'recorded': (int(tampered[3]), ratings[3]),
+                                   'replayed': (int(scores[3]), ratings[3])}]
+
+
+def test_write_errors_count_as_dropped(tmp_path, monkeypatch):
+    log = open_log(tmp_path)
+    batch = columns(rows(5))
+    _, scores, ratings = evaluate_batch(batch)
+    log.record_batch('api_predict_batch', batch, scores, ratings)
+    log.flush()
+
+    def broken(entries):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(log, '_to_batch', broken)
+    log.record_batch('api_predict_batch', batch, scores[:3], ratings[:3])
+    log.record('api_predict', dict(FIELD_DEFAULTS), 0, 'Excellent')
+    log.flush()
+    stats = log.stats()
+    assert (stats['written'], stats['dropped'], stats['write_errors']) == (5, 4, 1)
+    assert stats['last_error'] == 'OSError: disk full'
+
+    # The next write opens a fresh segment
+    monkeypatch.undo()
+    log.record_batch('api_predict_batch', batch, scores, ratings)
+    log.close()
+    assert log.stats()['written'] == 10 and log.segments == 2
+    assert all(replay_segment(path)['mismatches'] == 0 for path in segment_paths([str(tmp_path)]))
+
+
+def test_full_queue_drops(tmp_path):
+    log = open_log(tmp_path, max_pending=2)
+    batch = columns(rows(4))
+    _, scores, ratings = evaluate_batch(batch)
+    for _ in range(3):
+        log.record_batch('api_predict_batch', batch, scores, ratings)
+    log.close()
+    assert (log.stats()['written'], log.stats()['dropped']) == (8, 4)
@@ -0,0 +1,85 @@
+"""/api/predict/batch error paths: every record gets a line, and a bad one never stops the stream"""
+import json
+
+import pytest
+
+from app import app
+
+BIG = '1' + '0' * 400
+GOOD = {'age': 40, 'income': 600000, 'creditRating': 'Good'}
+
+
+def post(body, content_type):
+    response = app.test_client().post('/api/predict/batch', data=body, content_type=content_type)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def ndjson(*lines):
+    return post('\n'.join(lines), 'application/x-ndjson')
+
+
+def test_ndjson_bad_lines_are_reported_inline():
+    lines = ndjson(json.dumps(GOOD), '{"age": ', '[1, 2]', '', json.dumps(GOOD))
+    assert [line['index'] for line in lines] == [0, 1, 2, 3]
+    assert 'risk_score' in lines[0] and 'risk_score' in lines[3]
+    assert set(lines[1]) == {'index', 'error'}
+    assert lines[2]['errors'] == {'body': 'must be a JSON object'}
+
+
+@pytest.mark.parametrize('record, errors', [
+    ('{"age": 1e400}', {'age': 'must be between 18 and 100'}),
+    ('{"age": %s}' % BIG, {'age': 'must be between 18 and 100'}),
+    ('{"income": %s}' % BIG, {'income': 'must be a finite number'}),
+    ('{"income": -%s}' % BIG, {'income': 'must be at least 0'}),
+    ('{"loanAmount": "lots"}', {'loanAmount': 'must be a number'}),
+])
+def test_overflow_and_invalid_fields(record, errors):
+    for lines in (ndjson(json.dumps(GOOD), record, json.dumps(GOOD)),
+                  post(f'[{json.dumps(GOOD)}, {record}, {json.dumps(GOOD)}]', 'application/json')):
+        assert [line['index'] for line in lines] == [0, 1, 2]
+        assert lines[1]['errors'] == errors
+        assert lines[0]['risk_score'] == lines[2]['risk_score']
+
+
+def test_derived_dti_needs_tenure():
+    lines = ndjson(json.dumps(dict(GOOD, loanAmount=500000, interestRate=10, deriveDti=True)),
+                   json.dumps(dict(GOOD, loanAmount=500000, interestRate=10, deriveDti=True, loanTenure=5)),
+                   json.dumps(dict(GOOD, deriveDti=True, loanTenure='five')))
+    assert lines[0]['errors'] == {'loanTenure': 'is required to derive debtToIncomeRatio'}
+    assert 'risk_score' in lines[1]
+    assert lines[2]['errors'] == {'loanTenure': 'must be a number'}
+
+
+def test_malformed_array_flushes_then_reports():
+    lines = post(f'[{json.dumps(GOOD)}, {json.dumps(GOOD)}, {{"age": ]', 'application/json')
+    assert [line.get('index') for line in lines] == [0, 1, None]
+    assert 'risk_score' in lines[1]
+    assert set(lines[2]) == {'error'}
+
+
+def test_not_an_array():
+    lines = post(json.dumps(GOOD), 'application/json')
+    assert set(lines[-1]) == {'error'}
+
+
+def test_empty_batch():
+    assert post('[]', 'application/json') == []
+    assert ndjson('') == []
+
+
+def test_scoring_error_is_not_a_malformed_array(monkeypatch):
+    import app as service
+
+    calls = []
+
+    def failing(columns, scorecard):
+        calls.append(len(columns['age']))
+        raise ValueError('scoring failed')
+
+    monkeypatch.setattr(service, 'evaluate_columns', failing)
+    monkeypatch.setattr(service, 'BATCH_CHUNK_SIZE', 2)
+    # The chunk is scored once and the error surfaces instead of being reported as bad input
+    with pytest.raises(ValueError, match='scoring failed'):
+        app.test_client().post('/api/predict/batch', json=[GOOD, GOOD, GOOD]).get_data()
+    assert calls == [2]
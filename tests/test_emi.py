@@ -0,0 +1,78 @@
+"""EMI, DTI and amortization schedules: closed form, the zero-rate limit and edge loans"""
+import numpy as np
+import pytest
+
+from emi import amortization_schedule, debt_to_income, derived_dti, monthly_emi
+
+
+def test_emi_matches_the_closed_form():
+    # ₹10 lakh over 20 years at 8.5%
+    assert monthly_emi(1_000_000, 8.5, 20) == pytest.approx(8678.23, abs=0.005)
+    rate, months = 8.5 / 1200, 240
+    assert monthly_emi(1_000_000, 8.5, 20) == pytest.approx(1_000_000 * rate * (1 + rate) ** months
+                                                            / ((1 + rate) ** months - 1), rel=1e-12)
+
+
+def test_zero_rate_repays_in_equal_parts():
+    assert monthly_emi(120_000, 0, 5) == 2000.0
+    assert np.isfinite(monthly_emi(120_000, 0.0, 5))
+    # A tiny rate is close to the interest-free limit, not a 0/0 blow-up
+    assert monthly_emi(120_000, 1e-9, 5) == pytest.approx(2000.0, rel=1e-6)
+
+
+@pytest.mark.parametrize('principal, rate, tenure', [(0, 8.5, 20), (100_000, 8.5, 0), (-5, 8.5, 20), (0, 0, 0)])
+def test_loans_without_principal_or_term_cost_nothing(principal, rate, tenure):
+    assert monthly_emi(principal, rate, tenure) == 0.0
+
+
+def test_vectorized_matches_scalar_calls():
+    principal = np.array([0, 500_000, 1_000_000, 2_500_000])
+    rate = np.array([8.5, 0.0, 12.0, 30.0])
+    tenure = np.array([[1], [5], [30]])
+    income = 900_000
+    batch = derived_dti(principal, rate, tenure, income)
+    assert batch.shape == (3, 4)
+    for row, years in enumerate(tenure[:, 0]):
+        for column in range(4):
+            assert batch[row, column] == derived_dti(principal[column], rate[column], years, income)
+    assert isinstance(monthly_emi(100_000, 8.5, 5), np.floating)
+
+
+def test_dti_without_income_is_zero():
+    assert debt_to_income(5000, 0) == 0.0
+    assert debt_to_income(5000, -120_000) == 0.0
+    assert debt_to_income(5000, 120_000) == 0.5
+
+
+def test_schedule_amortizes_to_zero():
+    principal = np.array([1_000_000, 240_000, 500_000])
+    rate = np.array([8.5, 0.0, 12.0])
+    tenure = np.array([20, 2, 1])
+    schedule = amortization_schedule(principal, rate, tenure)
+    assert schedule['emi'].shape == (3, 240)
+    months = tenure * 12
+    for loan in range(3):
+        active = slice(0, months[loan])
+        emi = monthly_emi(principal[loan], rate[loan], tenure[loan])
+        np.testing.assert_allclose(schedule['emi'][loan, active], emi)
+        np.testing.assert_allclose(schedule['interest'][loan, active] + schedule['principal'][loan, active], emi)
+        assert schedule['principal'][loan, active].sum() == pytest.approx(principal[loan], rel=1e-9)
+        assert schedule['balance'][loan, months[loan] - 1] == pytest.approx(0, abs=1e-6)
+        assert np.all(np.diff(schedule['balance'][loan, active]) < 0)
+        # Months past the loan's own tenure are empty
+        for part in ('emi', 'interest', 'principal', 'balance'):
+            assert not schedule[part][loan, months[loan]:].any()
+    # Interest is charged on the opening balance: first month of the 8.5% loan
+    assert schedule['interest'][0, 0] == pytest.approx(1_000_000 * 8.5 / 1200)
+
+
+def test_zero_rate_schedule_is_linear():
+    schedule = amortization_schedule(240_000, 0, 2)
+    assert not schedule['interest'].any()
+    np.testing.assert_allclose(schedule['principal'][0], 10_000)
+    np.testing.assert_allclose(schedule['balance'][0], 240_000 - 10_000 * np.arange(1, 25))
+
+
+def test_schedule_of_nothing():
+    schedule = amortization_schedule([0, 100_000], [8.5, 8.5], [0, 0])
+    assert schedule['emi'].shape == (2, 0)
@@ -0,0 +1,181 @@
+"""Every scoring path against the original if/elif ladders (benchmarks/golden.json)"""
+import asyncio
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from common import ROOT
+from golden import legacy_rating, legacy_score, load_golden
+from scorecard import FIELD_DEFAULTS, SCORECARD
+
+ROWS, SCORES, RATINGS = load_golden()
+EXPECTED = list(zip(SCORES, RATINGS))
+
+
+def columns(rows):
+    return {field: np.array([row[field] for row in rows], dtype=object if field == 'creditRating' else float)
+            for field in FIELD_DEFAULTS}
+
+
+def api_rows():
+    """Positions of the golden rows the request schema accepts"""
+    from schema import REQUEST_SCHEMA, ValidationError
+    positions = []
+    for position, row in enumerate(ROWS):
+        try:
+            REQUEST_SCHEMA.validate(row)
+        except ValidationError:
+            continue
+        positions.append(position)
+    return positions
+
+
+def test_fixture_matches_ladders():
+    assert [legacy_score(row) for row in ROWS] == SCORES
+    assert [legacy_rating(score) for score in SCORES] == RATINGS
+    # The edge cases the fixture exists for
+    assert any(isinstance(value, float) and math.isnan(value) for row in ROWS for value in row.values())
+    assert any(value == 0 and math.copysign(1, value) < 0 for row in ROWS for value in row.values()
+               if isinstance(value, float))
+    assert any(row['creditRating'] == 'Unknown' for row in ROWS)
+
+
+@pytest.mark.parametrize('path', ['score', 'evaluate', 'cached'])
+def test_scalar_paths(path):
+    def score(row):
+        if path == 'evaluate':
+            breakdown = SCORECARD.evaluate(row)
+            assert sum(breakdown.points) == breakdown.total
+            return breakdown.score
+        if path == 'cached':
+            return SCORECARD.score_bands(SCORECARD.band_key(row))
+        return SCORECARD.score(row)
+
+    assert [(score(row), SCORECARD.rating(score(row))) for row in ROWS] == EXPECTED
+
+
+def test_batch_paths():
+    from batch_scoring import evaluate_batch, score_batch
+    scores, ratings = score_batch(columns(ROWS))
+    assert list(zip(scores.tolist(), ratings.tolist())) == EXPECTED
+    points, scores, ratings = evaluate_batch(columns(ROWS))
+    assert list(zip(scores.tolist(), ratings.tolist())) == EXPECTED
+    assert (np.minimum(points.sum(axis=1), SCORECARD.max_score) == scores).all()
+
+
+def test_grid_paths():
+    from risk_grid import load_grid
+    grid = load_grid(SCORECARD)
+    assert [(grid.score(row), grid.rating(grid.score(row))) for row in ROWS] == EXPECTED
+    assert [SCORECARD.evaluate(row).points for row in ROWS] == [grid.evaluate(row).points for row in ROWS]
+    for scored in (grid.score_batch(columns(ROWS)), grid.evaluate_batch(columns(ROWS))[1:]):
+        assert list(zip(scored[0].tolist(), scored[1].tolist())) == EXPECTED
+
+
+def test_api_predict():
+    from app import RESULT_CACHE, app
+    client = app.test_client()
+    RESULT_CACHE.clear()
+    positions = api_rows()
+    assert len(positions) > 100
+    # First pass fills the result cache, second is served from it
+    for _ in range(2):
+        results = []
+        for position in positions:
+            body = client.post('/api/predict', json=ROWS[position]).get_json()
+            results.append((body['risk_score'], body['rating']))
+        assert results == [EXPECTED[position] for position in positions]
+
+
+def test_api_predict_batch():
+    from app import app
+    body = '\n'.join(json.dumps(row) for row in ROWS)
+    response = app.test_client().post('/api/predict/batch', data=body, content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['index'] for line in lines] == list(range(len(ROWS)))
+    valid = set(api_rows())
+    for position, line in enumerate(lines):
+        if position in valid:
+            assert (line['risk_score'], line['rating']) == EXPECTED[position]
+        else:
+            assert line['errors']
+
+
+def test_async_service():
+    import async_service
+
+    async def predict(row):
+        messages = [{'type': 'http.request', 'body': json.dumps(row).encode(), 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await async_service.app({'type': 'http', 'method': 'POST', 'path': '/api/predict'}, receive, send)
+        return json.loads(sent[1]['body'])
+
+    async def run(positions):
+        # Concurrent requests, so they are scored in shared micro-batches
+        bodies = await asyncio.gather(*(predict(ROWS[position]) for position in positions))
+        await async_service.get_batcher().stop()
+        return bodies
+
+    positions = api_rows()
+    async_service.batcher = None
+    bodies = asyncio.run(run(positions))
+    async_service.batcher = None
+    assert [(body['risk_score'], body['rating']) for body in bodies] == [EXPECTED[position] for position in positions]
+
+
+def widget_rows(limit=12):
+    """Golden rows the Streamlit widgets can express (integer fields, widget ranges)"""
+    integers = ('age', 'income', 'employmentLength', 'numAccounts', 'latePayments', 'loanAmount', 'savingsBalance')
+    ranges = {'age': (18, 100), 'employmentLength': (0, 50), 'numAccounts': (0, 20), 'latePayments': (0, 20),
+              'interestRate': (0, 30)}
+    chosen = []
+    for row in ROWS:
+        values = [row[field] for field in integers + ('interestRate',)]
+        if not all(math.isfinite(value) for value in values):
+            continue
+        if not all(float(row[field]).is_integer() and row[field] >= 0 for field in integers):
+            continue
+        if not all(low <= row[field] <= high for field, (low, high) in ranges.items()):
+            continue
+        if row['creditRating'] not in ('Excellent', 'Good', 'Average', 'Fair', 'Poor', 'No History'):
+            continue
+        chosen.append(row)
+    step = max(len(chosen) // limit, 1)
+    return chosen[::step][:limit]
+
+
+def test_streamlit_app():
+    from streamlit.testing.v1 import AppTest
+
+    from emi import debt_to_income, monthly_emi
+
+    session = AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py')).run(timeout=30)
+    labels = {option.split(' (')[0]: option for option in session.selectbox[0].options}
+    tenure = 5
+    fields = ('age', 'income', 'debtToIncomeRatio', 'employmentLength', 'numAccounts', 'latePayments',
+              'loanAmount', 'interestRate', 'savingsBalance')
+    for row in widget_rows():
+        for widget, field in zip(session.number_input, fields):
+            if field != 'debtToIncomeRatio':
+                widget.set_value(int(row[field]) if field != 'interestRate' else float(row[field]))
+        session.selectbox[0].set_value(labels[row['creditRating']])
+        session.selectbox[1].set_value(tenure)
+        session.button[0].click()
+        session.run(timeout=30)
+        assert not session.exception
+        # The page scores the DTI it derives from the loan terms
+        emi = float(monthly_emi(row['loanAmount'], row['interestRate'], tenure))
+        expected = legacy_score(dict(row, debtToIncomeRatio=float(debt_to_income(emi, row['income']))))
+        card = next(block.value for block in session.markdown if 'Risk Score:' in block.value)
+        assert f'Risk Score: {expected:.1f}/100' in card
+        assert f'<h2>{legacy_rating(expected)}</h2>' in card
@@ -0,0 +1,64 @@
+"""Prometheus text exposition of counters, histograms and the request middleware"""
+from metrics import Registry, RequestMetrics, StageTimer
+
+
+def test_counter_exposition():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests served', ('path', 'status'))
+    requests.inc(('/api/predict', '200'))
+    requests.inc(('/api/predict', '200'), 2)
+    requests.inc(('/a"b\\c\nd', '400'), 0.5)
+    assert requests.value(('/api/predict', '200')) == 3
+    assert registry.render().splitlines() == [
+        '# HELP requests_total Requests served',
+        '# TYPE requests_total counter',
+        'requests_total{path="/a\\"b\\\\c\\nd",status="400"} 0.5',
+        'requests_total{path="/api/predict",status="200"} 3',
+    ]
+
+
+def test_unlabelled_counter_exposition():
+    registry = Registry()
+    registry.counter('errors_total', 'Errors').inc()
+    assert registry.render() == '# HELP errors_total Errors\n# TYPE errors_total counter\nerrors_total 1\n'
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    seconds = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.5, 0.1))
+    seconds.observe(0.05, ('score',))
+    seconds.observe(0.1, ('score',))
+    seconds.labels('score').observe(0.25)
+    seconds.observe(3.0, ('score',))
+    assert seconds.count(('score',)) == 4
+    assert registry.render().splitlines() == [
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        # Buckets are cumulative, upper bounds inclusive, sorted whatever order they were given in
+        'latency_seconds_bucket{stage="score",le="0.1"} 2',
+        'latency_seconds_bucket{stage="score",le="0.5"} 3',
+        'latency_seconds_bucket{stage="score",le="+Inf"} 4',
+        'latency_seconds_sum{stage="score"} 3.4',
+        'latency_seconds_count{stage="score"} 4',
+    ]
+
+
+def test_stage_timer_and_middleware():
+    registry = Registry()
+    stages = registry.histogram('stage_seconds', 'Stages', ('stage',))
+    timer = StageTimer(stages, ('decode', 'score'))
+    timer.end('score', timer.end('decode', timer.start()))
+    assert stages.count(('decode',)) == stages.count(('score',)) == 1
+
+    requests = registry.counter('requests_total', 'Requests', ('path', 'status'))
+    seconds = registry.histogram('request_seconds', 'Latency', ('path',))
+
+    def wsgi_app(environ, start_response):
+        start_response('404 NOT FOUND', [])
+        return [b'']
+
+    middleware = RequestMetrics(wsgi_app, ['/api/predict'], requests, seconds)
+    middleware({'PATH_INFO': '/api/predict'}, lambda status, headers, exc_info=None: None)
+    middleware({'PATH_INFO': '/no/such/path'}, lambda status, headers, exc_info=None: None)
+    assert requests.value(('/api/predict', '404')) == requests.value(('other', '404')) == 1
+    assert seconds.count(('other',)) == 1
@@ -0,0 +1,90 @@
+"""PD model: fitting recovers a known default curve, calibration, and serving from a saved model"""
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+import pd_model
+from batch_scoring import score_batch
+from common import iter_rows, make_population
+from schema import REQUEST_SCHEMA
+from scorecard import SCORECARD, SCORECARD_DEFINITION, compile_scorecard
+
+ROWS = 20000
+APPLICANT = {'age': 40, 'income': 600000, 'creditRating': 'Good', 'latePayments': 3}
+
+
+@pytest.fixture(scope='module')
+def loans():
+    # Defaults drawn from a known logistic curve in the risk score
+    frame = pd.DataFrame(make_population(ROWS, seed=3))
+    scores, _ = score_batch(frame, SCORECARD)
+    truth = 1 / (1 + np.exp(-(scores - 45) / 6))
+    frame['default'] = (np.random.default_rng(4).random(ROWS) < truth).astype(int)
+    frame['truth'] = truth
+    return frame
+
+
+@pytest.fixture(scope='module')
+def model(loans):
+    return pd_model.fit(lambda: (loans.iloc[start:start + 2500] for start in range(0, ROWS, 2500)), epochs=8)
+
+
+def test_fit_ranks_and_calibrates(loans, model):
+    metrics = model.metrics
+    assert metrics['rows'] == ROWS // 10
+    # The bands carry everything the score does, so the model ranks at least as well
+    assert metrics['auc'] >= metrics['auc_points'] - 0.01 and metrics['auc'] > 0.8
+    base_rate = metrics['default_rate']
+    assert metrics['log_loss'] < -(base_rate * np.log(base_rate) + (1 - base_rate) * np.log(1 - base_rate))
+    assert len(metrics['calibration']) == 10
+    assert sum(row['rows'] for row in metrics['calibration']) == metrics['rows']
+    # Against the true curve (the holdout deciles are too small to be exact), decile by decile
+    predicted = model.predict_batch(loans)
+    deciles = pd.qcut(predicted, 10, labels=False, duplicates='drop')
+    by_decile = pd.DataFrame({'pd': predicted, 'truth': loans['truth']}).groupby(deciles).mean()
+    assert (by_decile['pd'] - by_decile['truth']).abs().max() < 0.05
+
+
+def test_scalar_and_batch_predictions_agree(loans, model):
+    sample = loans.head(200)
+    batch = model.predict_batch(sample)
+    scalar = [model.predict(row) for row in iter_rows({field: sample[field].to_numpy() for field in sample})]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12)
+
+
+def test_saved_model_matches_its_scorecard(model, tmp_path):
+    path = tmp_path / 'pd_model.json'
+    model.save(path)
+    loaded = pd_model.load_model(path)
+    assert loaded.predict(APPLICANT) == model.predict(APPLICANT)
+
+    edited = copy.deepcopy(SCORECARD_DEFINITION)
+    edited['factors'][0]['points'] = [30, 25, 20, 25, 30]
+    with pytest.raises(ValueError, match='different definition of scorecard 1.0'):
+        pd_model.load_model(path, compile_scorecard(edited))
+    edited['version'] = '1.1'
+    with pytest.raises(ValueError, match='fitted on scorecard 1.0, not 1.1'):
+        pd_model.load_model(path, compile_scorecard(edited))
+
+    unversioned = json.loads(path.read_text(encoding='utf-8'))
+    del unversioned['scorecard_fingerprint']
+    path.write_text(json.dumps(unversioned), encoding='utf-8')
+    with pytest.raises(ValueError, match='refit'):
+        pd_model.load_model(path)
+
+
+def test_predictions_are_served_with_pd(model, monkeypatch):
+    monkeypatch.setattr(app, 'PD_MODEL', model)
+    app.RESULT_CACHE.clear()
+    client = app.app.test_client()
+    try:
+        body = client.post('/api/predict', json=APPLICANT).get_json()
+        assert body['pd'] == round(model.predict(REQUEST_SCHEMA.validate(APPLICANT)), 6)
+        lines = client.post('/api/predict/batch', json=[APPLICANT, APPLICANT]).get_data(as_text=True).splitlines()
+        assert [json.loads(line)['pd'] for line in lines] == pytest.approx([body['pd']] * 2, abs=1e-6)
+    finally:
+        app.RESULT_CACHE.clear()
@@ -0,0 +1,102 @@
+"""Incremental rescoring: the index is reused until the inputs or the scorecard change"""
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rescore
+from common import make_population
+from scorecard import SCORECARD, SCORECARD_DEFINITION
+
+ROWS = 500
+
+
+@pytest.fixture
+def portfolio(tmp_path):
+    # Two decimals, so the CSV round trip is exact and rewriting the file changes nothing else
+    frame = pd.DataFrame(make_population(ROWS, seed=1)).round(2)
+    frame.insert(0, 'applicant_id', [f'A{n:05d}' for n in range(ROWS)])
+    paths = {name: str(tmp_path / name) for name in ('portfolio.csv', 'index.npz', 'delta.csv', 'scores.csv')}
+    frame.to_csv(paths['portfolio.csv'], index=False)
+    return frame, paths
+
+
+def run(paths, *options):
+    assert rescore.main([paths['portfolio.csv'], '--index', paths['index.npz'], '--delta', paths['delta.csv'],
+                         '--output', paths['scores.csv'], '--chunk-size', '128', *options]) == 0
+    delta = pd.read_csv(paths['delta.csv'], keep_default_na=False)
+    return delta, pd.read_csv(paths['scores.csv'])
+
+
+def test_first_run_scores_everyone(portfolio):
+    frame, paths = portfolio
+    delta, scores = run(paths)
+    assert scores['rescored'].all()
+    assert scores['risk_score'].tolist() == [SCORECARD.score(row) for row in frame.to_dict('records')]
+    assert (delta['reason'] == 'new').all() and len(delta) == ROWS
+    assert len(rescore.load_index(paths['index.npz'])) == ROWS
+
+
+def test_second_run_reuses_the_index(portfolio):
+    _, paths = portfolio
+    _, first = run(paths)
+    delta, second = run(paths)
+    assert not second['rescored'].any()
+    assert second['risk_score'].tolist() == first['risk_score'].tolist()
+    assert second['rating'].tolist() == first['rating'].tolist()
+    assert delta.empty
+
+
+def test_changed_inputs_rescore_only_those_rows(portfolio):
+    frame, paths = portfolio
+    run(paths)
+    # Move one applicant to a different rating, and touch another without changing theirs
+    moved = frame.index[(frame['creditRating'] == 'Excellent') & (frame['latePayments'] == 0)][0]
+    frame.loc[moved, ['creditRating', 'latePayments', 'income']] = ['Poor', 9, 1000]
+    frame.loc[frame.index[-1], 'age'] += 0.5
+    frame.to_csv(paths['portfolio.csv'], index=False)
+
+    delta, scores = run(paths)
+    assert np.flatnonzero(scores['rescored']).tolist() == sorted({moved, ROWS - 1})
+    assert delta['applicant_id'].tolist() == [frame.loc[moved, 'applicant_id']]
+    assert delta['reason'].tolist() == ['inputs']
+    assert scores.loc[moved, 'risk_score'] == SCORECARD.score(frame.loc[moved].to_dict())
+
+
+def test_full_and_scorecard_change_rescore_everything(portfolio, tmp_path):
+    _, paths = portfolio
+    _, first = run(paths)
+    delta, scores = run(paths, '--full')
+    assert scores['rescored'].all() and delta.empty
+
+    definition = copy.deepcopy(SCORECARD_DEFINITION)
+    definition['version'] = '1.1'
+    definition['ratings']['breakpoints'] = [['<', 10], *definition['ratings']['breakpoints'][1:]]
+    path = tmp_path / 'scorecard.json'
+    path.write_text(json.dumps(definition), encoding='utf-8')
+    delta, scores = run(paths, '--scorecard', str(path))
+    assert scores['rescored'].all()
+    assert scores['risk_score'].tolist() == first['risk_score'].tolist()
+    assert (delta['reason'] == 'scorecard').all()
+    assert delta['applicant_id'].tolist() == first.loc[(first['risk_score'] >= 10) & (first['risk_score'] < 20),
+                                                       'applicant_id'].tolist()
+    assert rescore.load_index(paths['index.npz']).meta['scorecard_version'] == '1.1'
+
+
+def test_every_chunk_must_keep_the_id_kind(portfolio):
+    frame, paths = portfolio
+    frame['applicant_id'] = range(ROWS)
+    frame.to_csv(paths['portfolio.csv'], index=False)
+    run(paths)
+    assert rescore.load_index(paths['index.npz']).meta['id_kind'] == 'int'
+
+    # Integer ids in the first chunks, then one that is not: that chunk would hash as text
+    frame['applicant_id'] = frame['applicant_id'].astype(object)
+    frame.loc[ROWS - 1, 'applicant_id'] = 'A499'
+    frame.to_csv(paths['portfolio.csv'], index=False)
+    before = open(paths['index.npz'], 'rb').read()
+    with pytest.raises(SystemExit, match='int up to row 384 and text after it'):
+        run(paths)
+    assert open(paths['index.npz'], 'rb').read() == before
@@ -0,0 +1,45 @@
+"""Grid lookups and the verification pass for scorecards other than the built-in one"""
+import copy
+
+import numpy as np
+
+from golden import load_golden
+from risk_grid import load_grid, verify
+from scorecard import SCORECARD, SCORECARD_DEFINITION, compile_scorecard
+
+ROWS, _, _ = load_golden()
+
+
+def modified_scorecard():
+    definition = copy.deepcopy(SCORECARD_DEFINITION)
+    definition['version'] = 'test-grid'
+    for factor in definition['factors']:
+        if factor['name'] == 'income':
+            factor['points'] = [30, 20, 10, 4, 0]
+        elif factor['name'] == 'credit_rating':
+            factor['categories']['No History'] = 35
+            factor['default_points'] = 20
+    return compile_scorecard(definition)
+
+
+def test_verify_builtin_grid(tmp_path):
+    assert verify(load_grid(SCORECARD, str(tmp_path))) == 0
+
+
+def test_verify_uses_the_grid_scorecard(tmp_path):
+    scorecard = modified_scorecard()
+    grid = load_grid(scorecard, str(tmp_path))
+    assert verify(grid) == 0
+    scores = [grid.score(row) for row in ROWS]
+    assert scores == [scorecard.score(row) for row in ROWS]
+    # The change is visible, so a check against the built-in scorecard would not pass
+    assert scores != [SCORECARD.score(row) for row in ROWS]
+
+
+def test_corrupted_cell_is_reported(tmp_path):
+    scorecard = modified_scorecard()
+    grid = load_grid(scorecard, str(tmp_path))
+    table = np.array(grid.table)
+    table.reshape(-1)[7] += 1
+    grid.table = table
+    assert verify(grid) == 1
@@ -0,0 +1,86 @@
+"""Request schema error messages, scalar and column-wise"""
+import math
+
+import pytest
+
+from schema import MISSING, REQUEST_SCHEMA, RequestSchema, ValidationError
+from scorecard import FIELD_DEFAULTS
+
+CASES = [
+    ({'age': 'forty'}, 'age', 'must be a number'),
+    ({'age': None}, 'age', 'must be a number'),
+    ({'age': math.nan}, 'age', 'must be a number'),
+    ({'age': 'nan'}, 'age', 'must be a number'),
+    ({'age': 17}, 'age', 'must be between 18 and 100'),
+    ({'age': 10 ** 400}, 'age', 'must be between 18 and 100'),
+    ({'income': -1}, 'income', 'must be at least 0'),
+    ({'income': math.inf}, 'income', 'must be a finite number'),
+    ({'income': 10 ** 400}, 'income', 'must be a finite number'),
+    ({'creditRating': 'Unknown'}, 'creditRating',
+     'must be one of Average, Excellent, Fair, Good, No History, Poor'),
+    ({'creditRating': 5}, 'creditRating', 'must be one of Average, Excellent, Fair, Good, No History, Poor'),
+]
+
+
+@pytest.mark.parametrize('data, field, message', CASES)
+def test_validate_messages(data, field, message):
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate(data)
+    assert raised.value.errors == {field: message}
+
+
+@pytest.mark.parametrize('data, field, message', CASES)
+def test_validate_columns_messages(data, field, message):
+    # The same record in the middle of two valid ones
+    columns = {name: [MISSING, data.get(name, MISSING), MISSING] for name in FIELD_DEFAULTS}
+    _, errors = REQUEST_SCHEMA.validate_columns(columns, 3)
+    assert errors == {1: {field: message}}
+
+
+def test_every_bad_field_is_reported():
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate({'age': 'x', 'income': -5, 'creditRating': 'Bad'})
+    assert set(raised.value.errors) == {'age', 'income', 'creditRating'}
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'text', 3, None])
+def test_body_must_be_an_object(body):
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate(body)
+    assert raised.value.errors == {'body': 'must be a JSON object'}
+
+
+def test_defaults_and_coercion():
+    assert REQUEST_SCHEMA.validate({}) == {field: float(value) if not isinstance(value, str) else value
+                                           for field, value in FIELD_DEFAULTS.items()}
+    assert REQUEST_SCHEMA.validate({'age': '42'})['age'] == 42.0
+
+
+def test_missing_fields_stay_on_the_fast_path():
+    # age defaults to 0, outside its own range: absent it is taken as is, sent as 0 it is rejected
+    schema = RequestSchema()
+    schema._validate_fields = None
+    schema._validate = schema._compile()
+    assert schema.validate({'income': 600000})['age'] == 0.0
+    assert REQUEST_SCHEMA.validate({'income': 600000}) == schema.validate({'income': 600000})
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate({'age': 0})
+    assert raised.value.errors == {'age': 'must be between 18 and 100'}
+
+
+def test_a_default_outside_the_categories_is_only_used_when_absent():
+    schema = RequestSchema(defaults={**FIELD_DEFAULTS, 'creditRating': 'Unknown'})
+    assert schema.validate({})['creditRating'] == 'Unknown'
+    assert schema._validate_fields({})['creditRating'] == 'Unknown'
+    with pytest.raises(ValidationError) as raised:
+        schema.validate({'creditRating': 'Unknown'})
+    assert set(raised.value.errors) == {'creditRating'}
+
+
+def test_tenure_messages():
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate_tenure({})
+    assert raised.value.errors == {'loanTenure': 'is required to derive debtToIncomeRatio'}
+    with pytest.raises(ValidationError) as raised:
+        REQUEST_SCHEMA.validate_tenure({'loanTenure': 'five'})
+    assert raised.value.errors == {'loanTenure': 'must be a number'}
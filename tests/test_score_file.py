@@ -0,0 +1,75 @@
+"""score_file.py: bad cells are reported per row, and the file scores like the API does"""
+import copy
+import json
+
+import pandas as pd
+import pytest
+
+import score_file
+from app import app
+from scorecard import SCORECARD, SCORECARD_DEFINITION
+
+CSV = '''applicant_id,age,income,creditRating,latePayments
+1,40,600000,Good,0
+2,,600000,Good,
+3,abc,600000,Good,1
+4,15,600000,Bogus,2
+5,52,250000,Poor,3
+'''
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'applicants.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return path
+
+
+def run(source, output, *options):
+    assert score_file.main([str(source), str(output), '--workers', '1', '--chunk-size', '2', *options]) == 0
+    return pd.read_parquet(output) if output.suffix == '.parquet' else pd.read_csv(output)
+
+
+def api_scores(records):
+    response = app.test_client().post('/api/predict/batch', json=records)
+    return [json.loads(line).get('risk_score') for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('name', ['scored.csv', 'scored.parquet'])
+def test_bad_cells_are_reported_and_the_rest_score(source, tmp_path, name):
+    scored = run(source, tmp_path / name)
+    assert len(scored) == 5
+    errors = [None if pd.isna(value) else json.loads(value) for value in scored['errors']]
+    assert errors == [None, None, {'age': 'must be a number'},
+                      {'age': 'must be between 18 and 100',
+                       'creditRating': 'must be one of Average, Excellent, Fair, Good, No History, Poor'}, None]
+    assert scored['risk_score'].isna().tolist() == [False, False, True, True, False]
+    assert scored['rating'].isna().tolist() == [False, False, True, True, False]
+
+
+def test_empty_cells_take_the_api_defaults(source, tmp_path):
+    scored = run(source, tmp_path / 'scored.csv')
+    records = [{'age': 40, 'income': 600000, 'creditRating': 'Good', 'latePayments': 0},
+               {'income': 600000, 'creditRating': 'Good'},
+               {'age': 52, 'income': 250000, 'creditRating': 'Poor', 'latePayments': 3}]
+    assert scored['risk_score'].dropna().astype(int).tolist() == api_scores(records)
+    assert scored['risk_score'].dropna().astype(int).tolist() == [SCORECARD.score(record) for record in records]
+    assert scored.loc[1, 'age'] == 0 and scored.loc[1, 'latePayments'] == 0
+
+
+def test_scorecard_comes_from_the_store(source, tmp_path, monkeypatch):
+    default = run(source, tmp_path / 'default.csv')
+    definition = copy.deepcopy(SCORECARD_DEFINITION)
+    definition['version'] = '1.1'
+    definition['factors'][0]['points'] = [30, 25, 20, 25, 30]
+    path = tmp_path / 'scorecard.json'
+    path.write_text(json.dumps(definition), encoding='utf-8')
+
+    monkeypatch.setenv('CREDIT_RISK_SCORECARD', str(path))
+    from_env = run(source, tmp_path / 'env.csv')
+    monkeypatch.delenv('CREDIT_RISK_SCORECARD')
+    from_option = run(source, tmp_path / 'option.csv', '--scorecard', str(path))
+
+    for scored in (from_env, from_option):
+        shift = scored['points_age'] - default['points_age']
+        assert shift.dropna().tolist() == [20, 20, 20]
@@ -0,0 +1,59 @@
+"""Scorecard against the original ladders on the inputs the table has to special-case"""
+import copy
+import math
+
+import numpy as np
+import pytest
+
+from golden import legacy_rating, legacy_score
+from scorecard import DERIVED_INPUTS, FIELD_DEFAULTS, SCORECARD, SCORECARD_DEFINITION, compile_scorecard
+
+BASE = {'age': 40.0, 'income': 600000.0, 'creditRating': 'Good', 'debtToIncomeRatio': 0.3,
+        'employmentLength': 6.0, 'numAccounts': 3.0, 'latePayments': 1.0, 'loanAmount': 600000.0,
+        'interestRate': 10.0, 'savingsBalance': 200000.0}
+NUMERIC = [field for field, value in BASE.items() if not isinstance(value, str)]
+
+CASES = ([pytest.param(dict(BASE, **{field: math.nan}), id=f'{field}-nan') for field in NUMERIC]
+         + [pytest.param(dict(BASE, **{field: -0.0}), id=f'{field}-negative-zero') for field in NUMERIC]
+         + [pytest.param(dict(BASE, creditRating='Unknown'), id='unknown-category'),
+            pytest.param(dict(BASE, income=-0.0, loanAmount=math.nan, savingsBalance=-0.0), id='zero-income'),
+            pytest.param({}, id='empty')])
+
+
+@pytest.mark.parametrize('row', CASES)
+def test_score_matches_ladders(row):
+    expected = legacy_score(row)
+    breakdown = SCORECARD.evaluate(row)
+    assert SCORECARD.score(row) == breakdown.score == expected
+    assert SCORECARD.score_bands(SCORECARD.band_key(row)) == expected
+    assert SCORECARD.rating(expected) == legacy_rating(expected)
+
+
+def test_batch_matches_ladders():
+    from batch_scoring import evaluate_batch
+
+    rows = [dict(FIELD_DEFAULTS, **case.values[0]) for case in CASES]
+    columns = {field: np.array([row[field] for row in rows], dtype=object if field == 'creditRating' else float)
+               for field in FIELD_DEFAULTS}
+    points, scores, ratings = evaluate_batch(columns)
+    assert scores.tolist() == [legacy_score(row) for row in rows]
+    assert ratings.tolist() == [legacy_rating(legacy_score(row)) for row in rows]
+    assert points.tolist() == [list(SCORECARD.evaluate(row).points) for row in rows]
+
+
+def test_unknown_category_scores_as_average():
+    unknown = SCORECARD.evaluate(dict(BASE, creditRating='Unknown'))
+    average = SCORECARD.evaluate(dict(BASE, creditRating='Average'))
+    assert unknown.points == average.points
+
+
+def test_breakdown_follows_the_definition_order():
+    # Categorical and derived factors first, so factor order differs from the scoring groups
+    definition = copy.deepcopy(SCORECARD_DEFINITION)
+    definition['factors'].sort(key=lambda factor: ('categories' not in factor, factor['input'] not in DERIVED_INPUTS))
+    reordered = compile_scorecard(definition)
+    original = SCORECARD.evaluate(BASE).as_dict()
+    breakdown = reordered.evaluate(BASE)
+    assert breakdown.names == tuple(factor['name'] for factor in definition['factors'])
+    assert breakdown.as_dict() == original
+    assert reordered.score(BASE) == breakdown.score == SCORECARD.score(BASE)
@@ -0,0 +1,117 @@
+"""Scorecard hot reload: file reloads, what a swap invalidates, and shadow comparison"""
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app
+from common import ROOT
+from schema import REQUEST_SCHEMA
+from scorecard import SCORECARD, SCORECARD_DEFINITION, compile_scorecard
+from scorecard_store import ScorecardStore
+from shadow import ShadowScorer
+
+APPLICANT = {'age': 40, 'income': 600000, 'creditRating': 'Good'}
+
+
+def definition(version, age_points=None):
+    changed = copy.deepcopy(SCORECARD_DEFINITION)
+    changed['version'] = version
+    if age_points is not None:
+        changed['factors'][0]['points'] = age_points
+    return changed
+
+
+def write(path, content):
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding='utf-8')
+    # Make the change visible to check() even within one mtime tick
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_swaps_in_a_changed_file_and_keeps_a_broken_one_out(tmp_path):
+    path = tmp_path / 'scorecard.json'
+    write(path, definition('1.1'))
+    store = ScorecardStore(str(path))
+    swaps = []
+    store.on_swap(lambda old, new: swaps.append((old.version, new.version)))
+    assert store.current.version == '1.1' and not store.check()
+
+    write(path, definition('1.2'))
+    assert store.check()
+    assert store.current.version == '1.2' and swaps == [('1.1', '1.2')]
+
+    write(path, '{"version": "1.3", "factors": ')
+    assert not store.check()
+    assert store.current.version == '1.2'
+    assert store.status()['failures'] == 1 and store.status()['last_error'].startswith('JSONDecodeError')
+    assert not store.check()
+
+    write(path, definition('1.3'))
+    assert store.reload() and store.status()['last_error'] is None
+    assert swaps == [('1.1', '1.2'), ('1.2', '1.3')]
+
+
+def test_a_swap_clears_cached_predictions():
+    client = app.app.test_client()
+    original = app.SCORECARDS.current
+    assert client.post('/api/predict', json=APPLICANT).get_json()['breakdown']['age'] == 0
+    if not app.RESULT_CACHE.enabled:
+        pytest.skip('result cache is off')
+    assert app.RESULT_CACHE.stats()['size'] > 0
+
+    app.SCORECARDS.swap(compile_scorecard(definition('9.9', [30, 25, 20, 25, 30])))
+    try:
+        assert app.RESULT_CACHE.stats()['size'] == 0
+        assert client.post('/api/predict', json=APPLICANT).get_json()['breakdown']['age'] == 20
+    finally:
+        app.SCORECARDS.swap(original)
+
+
+def test_audit_stats_follow_the_swap(tmp_path):
+    # app.py wires the audit log up at import, so it runs in a process of its own
+    path, swapped = tmp_path / 'scorecard.json', tmp_path / 'next.json'
+    write(path, definition('1.1'))
+    write(swapped, definition('1.2'))
+    script = ('import app, json; from scorecard import load_scorecard; '
+              'versions = [app.AUDIT.stats()["scorecard_version"]]; '
+              f'app.SCORECARDS.swap(load_scorecard({str(swapped)!r})); '
+              'versions.append(app.AUDIT.stats()["scorecard_version"]); print(json.dumps(versions))')
+    env = dict(os.environ, CREDIT_RISK_AUDIT_DIR=str(tmp_path / 'audit'), CREDIT_RISK_SCORECARD=str(path),
+               CREDIT_RISK_SCORECARD_POLL='0')
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True).stdout
+    assert json.loads(output.splitlines()[-1]) == ['1.1', '1.2']
+
+
+def test_shadow_stats_compare_one_pair_of_versions():
+    production = ScorecardStore()
+    candidate = ScorecardStore(default=compile_scorecard(definition('1.1', [30, 25, 20, 25, 30])))
+    # A long flush interval leaves the comparison to this test
+    shadow = ShadowScorer(candidate, production, flush_interval=3600)
+    input_data = REQUEST_SCHEMA.validate(APPLICANT)
+    score = SCORECARD.score(input_data)
+    shadow.submit(SCORECARD, input_data, score, SCORECARD.rating(score))
+    shadow.compare_pending()
+    report = shadow.report()
+    assert (report['production_version'], report['candidate_version']) == ('1.0', '1.1')
+    assert report['compared'] == 1
+    assert report['score_delta']['histogram'] == {'20': 1}
+    assert report['rating_flips']['total'] == int(SCORECARD.rating(score) != SCORECARD.rating(score + 20))
+
+    candidate.swap(compile_scorecard(definition('1.2')))
+    report = shadow.report()
+    assert report['candidate_version'] == '1.2' and report['compared'] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_a_forked_worker_gets_a_fresh_lock():
+    # Held by this process at fork time, as during a reload
+    store = ScorecardStore()
+    with store._lock:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if store._lock.acquire(timeout=5) else 1)
+    assert os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0
@@ -0,0 +1,34 @@
+"""/api/ready: 503 until the single-applicant path is warm, then 200, whatever order tests run in"""
+import time
+
+import app
+from startup import StartupReport
+
+
+def test_ready_before_and_after_warm_up(monkeypatch):
+    # A fresh report, and the background warm-up recorded instead of racing the assertions
+    report = StartupReport(time.perf_counter())
+    report.imported()
+    started = []
+    monkeypatch.setattr(report, 'start_in_background', started.append)
+    monkeypatch.setattr(app, 'STARTUP', report)
+    client = app.app.test_client()
+
+    response = client.get('/api/ready')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False and response.get_json()['batch_ready'] is False
+    assert started == [app.warm_up]
+
+    app.warm_up(batch=False)
+    response = client.get('/api/ready')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['ready'] is True and body['batch_ready'] is False
+    assert set(body['warm_up_seconds']) == {'predict'}
+    assert len(started) == 2
+
+    app.warm_up()
+    body = client.get('/api/ready').get_json()
+    assert body['batch_ready'] is True and set(body['warm_up_seconds']) == {'predict', 'batch'}
+    assert len(started) == 2
+    assert body['scorecard_version'] == app.SCORECARDS.current.version
@@ -0,0 +1,24 @@
+"""Streamlit UI: the breakdown shows the inputs that were scored"""
+import os
+
+import pytest
+
+from common import ROOT
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+
+def assess(**values):
+    session = AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py'), default_timeout=30).run()
+    for label, value in values.items():
+        next(widget for widget in session.number_input if widget.label == label).set_value(value)
+    session.button[0].click().run()
+    assert not session.exception
+    return session
+
+
+def test_breakdown_shows_the_calculated_dti():
+    session = assess(**{'Debt-to-Income Ratio': 0.9, 'Annual Income (₹)': 1200000, 'Loan Amount (₹)': 0})
+    lines = [element.value for element in session.markdown]
+    assert '• DTI Ratio: 0.00' in lines
+    assert '• DTI Ratio: 0.90' not in lines
@@ -0,0 +1,83 @@
+"""Stress tests: seeded reproducibility and the rating-migration matrix"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import evaluate_batch
+from common import make_population
+from scorecard import SCORECARD
+from stress_test import SCENARIOS, apply_shock, run_stress_test, validate_scenarios
+
+BOOK = pd.DataFrame(make_population(3000, seed=3))
+# Counts are whole in a real loan book
+BOOK[['numAccounts', 'latePayments']] = BOOK[['numAccounts', 'latePayments']].round()
+
+
+def chunks(size=1000):
+    return (BOOK.iloc[start:start + size] for start in range(0, len(BOOK), size))
+
+
+def stress(scenarios=SCENARIOS, **options):
+    return run_stress_test(chunks(), scenarios, **dict({'paths': 20, 'seed': 7}, **options))
+
+
+def test_same_seed_same_report():
+    report = stress()
+    assert stress() == report
+    assert stress(workers=2) == report
+    assert stress(seed=8)['scenarios'] != report['scenarios']
+
+
+def test_migration_rows_are_shares():
+    for scenario in stress()['scenarios'].values():
+        migration = np.array(scenario['migration'])
+        assert migration.shape == (len(SCORECARD.rating_labels),) * 2
+        assert np.allclose(migration.sum(axis=1)[migration.sum(axis=1) > 0], 1.0)
+
+
+def test_no_shock_no_migration():
+    scenarios = {'flat': {'income': {'scale': 1.0, 'systemic_sd': 0.0, 'sd': 0.0}},
+                 # Noise that rounds away must not move anyone off 0 late payments
+                 'count_noise': {'latePayments': {'shift': 0.0, 'systemic_sd': 0.0, 'sd': 0.1}}}
+    report = stress(scenarios)
+    baseline = np.array(list(report['baseline']['rating_share'].values()))
+    for scenario in report['scenarios'].values():
+        migration = np.array(scenario['migration'])
+        assert np.array_equal(migration, np.diag((baseline > 0).astype(float)))
+        assert scenario['mean_score']['p50'] == pytest.approx(report['baseline']['mean_score'])
+
+
+def test_deterministic_shock_matches_rescoring():
+    # No randomness: every path is the same shocked book, scored by evaluate_batch
+    scenarios = {'rates': {'interestRate': {'shift': 4.0, 'systemic_sd': 0.0, 'sd': 0.0}},
+                 'late': {'latePayments': {'shift': 1.0, 'systemic_sd': 0.0, 'sd': 0.0}}}
+    report = stress(scenarios, paths=3)
+    labels = list(SCORECARD.rating_labels)
+    _, _, base = evaluate_batch(BOOK)
+    for name, (field, shift, high) in {'rates': ('interestRate', 4.0, 30.0), 'late': ('latePayments', 1.0, 20.0)}.items():
+        shocked = BOOK.copy()
+        shocked[field] = np.clip(shocked[field] + shift, 0, high)
+        _, scores, ratings = evaluate_batch(shocked)
+        expected = np.zeros((len(labels), len(labels)))
+        for before, after in zip(base, ratings):
+            expected[labels.index(before), labels.index(after)] += 1
+        rows = expected.sum(axis=1, keepdims=True)
+        expected = np.where(rows > 0, expected / np.where(rows > 0, rows, 1), 0.0)
+        assert np.allclose(report['scenarios'][name]['migration'], expected, atol=1e-6)
+        assert report['scenarios'][name]['mean_score']['p50'] == pytest.approx(scores.mean())
+
+
+def test_count_fields_stay_whole():
+    import stress_test
+
+    values = np.array([0.0, 0.0, 2.0, 19.0])
+    shocked = stress_test._clip('latePayments', apply_shock(values, {'shift': 0.4, 'sd': 0.5}, 0.0,
+                                                            np.array([-3.0, 0.1, 0.5, 9.0])))
+    assert shocked.tolist() == [0.0, 0.0, 3.0, 20.0]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match='unknown numeric field'):
+        validate_scenarios({'bad': {'height': {'scale': 1.1}}})
+    with pytest.raises(ValueError, match='exactly one'):
+        validate_scenarios({'bad': {'income': {'scale': 1.1, 'shift': 1}}})
@@ -0,0 +1,172 @@
+"""What-if search against a brute-force sweep of every field (and pair of fields) on a fine grid"""
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from app import app, extract_input
+from batch_scoring import score_batch
+from emi import derived_dti
+from schema import TENURE_RANGE
+from scorecard import FIELD_DEFAULTS, FIELD_RANGES, SCORECARD
+from what_if import what_if
+
+CREDIT = next(factor for factor in SCORECARD.factors if 'categories' in factor)
+LABELS = list(SCORECARD.rating_labels)
+APPLICANTS = [
+    {'age': 40, 'income': 400000, 'creditRating': 'Fair', 'debtToIncomeRatio': 0.4, 'employmentLength': 3,
+     'numAccounts': 5, 'latePayments': 1, 'loanAmount': 900000, 'interestRate': 11, 'savingsBalance': 50000},
+    {'age': 23, 'income': 250000, 'creditRating': 'Poor', 'debtToIncomeRatio': 0.55, 'employmentLength': 1,
+     'numAccounts': 8, 'latePayments': 4, 'loanAmount': 1500000, 'interestRate': 16, 'savingsBalance': 10000},
+    {'age': 58, 'income': 1200000, 'creditRating': 'Good', 'debtToIncomeRatio': 0.25, 'employmentLength': 12,
+     'numAccounts': 3, 'latePayments': 0, 'loanAmount': 2000000, 'interestRate': 9.5, 'savingsBalance': 400000},
+    {'age': 31, 'income': 600000, 'creditRating': 'No History', 'debtToIncomeRatio': 0.36, 'employmentLength': 2,
+     'numAccounts': 11, 'latePayments': 2, 'loanAmount': 2500000, 'interestRate': 13, 'savingsBalance': 0},
+]
+TARGETS = [None, 'Poor']
+
+
+def grids(input_data):
+    """Every value the sweep tries per field: whole numbers, a 0.01 interest grid and a 0.001 DTI grid"""
+    derived = 'loanTenure' in input_data
+    values = {
+        'age': np.arange(18, 101),
+        'employmentLength': np.arange(0, 51),
+        'numAccounts': np.arange(0, 21),
+        'latePayments': np.arange(0, 21),
+        'interestRate': np.round(np.arange(0, 3001) * 0.01, 2),
+        'creditRating': np.array(list(CREDIT['categories']), dtype=object),
+    }
+    for field in ('income', 'loanAmount', 'savingsBalance'):
+        values[field] = np.arange(0, 3 * max(input_data[field], 100000) + 1, 500)
+    if derived:
+        values['loanTenure'] = np.arange(TENURE_RANGE[0], TENURE_RANGE[1] + 1)
+    else:
+        values['debtToIncomeRatio'] = np.round(np.arange(0, 1001) * 0.001, 3)
+    return values
+
+
+def cost(field, input_data, values):
+    current = input_data[field]
+    if field == 'creditRating':
+        points = CREDIT['categories']
+        spread = max(points.values()) - min(min(points.values()), CREDIT['default_points'])
+        return np.array([abs(points[value] - points.get(current, CREDIT['default_points'])) / spread
+                         for value in values])
+    low, high = TENURE_RANGE if field == 'loanTenure' else FIELD_RANGES[field]
+    scale = high - low if high is not None else max(abs(current), 1.0)
+    return np.abs(np.asarray(values, dtype=float) - current) / scale
+
+
+def brute_scores(input_data, changes, n):
+    """Scores of n trials, each input_data with the arrays in `changes` applied, DTI rederived when it is derived"""
+    columns = {field: np.full(n, input_data[field], dtype=object if field == 'creditRating' else float)
+               for field in FIELD_DEFAULTS}
+    if 'loanTenure' in input_data:
+        columns['loanTenure'] = np.full(n, input_data['loanTenure'], dtype=float)
+    for field, values in changes.items():
+        columns[field] = np.asarray(values, dtype=object if field == 'creditRating' else float)
+    if 'loanTenure' in columns:
+        columns['debtToIncomeRatio'] = derived_dti(columns['loanAmount'], columns['interestRate'],
+                                                   columns['loanTenure'], columns['income'])
+    return score_batch(columns, SCORECARD)[0]
+
+
+def reaching(result, scores):
+    """Whether each score reaches the result's target rating"""
+    rank = LABELS.index(result['rating'])
+    target = LABELS.index(result['target_rating'])
+    ranks = np.searchsorted(np.asarray(SCORECARD.rating_bounds), scores, side='right')
+    return ranks <= target if target < rank else ranks >= target
+
+
+def cheapest(costs, mask):
+    return float(costs[mask].min()) if mask.any() else None
+
+
+def searches(derive, target):
+    """(input_data, what_if result) per applicant that is not already at the target"""
+    for applicant in APPLICANTS:
+        data = dict(applicant, deriveDti=True, loanTenure=7) if derive else applicant
+        input_data = extract_input(data, scorecard=SCORECARD)
+        result = what_if(input_data, target=target, limit=100)
+        if result['target_rating'] not in (None, result['rating']):
+            yield input_data, result
+
+
+@pytest.mark.parametrize('derive', [False, True], ids=['given-dti', 'derived-dti'])
+@pytest.mark.parametrize('target', TARGETS)
+def test_single_changes_match_brute_force(derive, target):
+    for input_data, result in searches(derive, target):
+        found = {change['field']: change for change in result['changes']}
+        if derive:
+            assert 'debtToIncomeRatio' not in found
+        for change in result['changes']:
+            # Every suggestion scores what it says, rescored independently
+            score = brute_scores(input_data, {change['field']: [change['value']]}, 1)[0]
+            assert score == change['risk_score'] and reaching(result, np.array([score]))[0]
+        for field, values in grids(input_data).items():
+            costs = cost(field, input_data, values)
+            best = cheapest(costs, reaching(result, brute_scores(input_data, {field: values}, len(values))))
+            if best is None:
+                continue
+            # The sweep is an upper bound; on whole-number fields it is exact
+            assert field in found, (field, best)
+            searched = float(cost(field, input_data, [found[field]['value']])[0])
+            assert searched <= best + 1e-12, (field, found[field], best)
+            if values.dtype.kind in 'iO':
+                assert searched == best
+
+
+@pytest.mark.parametrize('derive', [False, True], ids=['given-dti', 'derived-dti'])
+@pytest.mark.parametrize('target', TARGETS)
+def test_pairs_match_brute_force(derive, target):
+    # Fields that feed independent factors, so the cheapest pair is made of moves that each help alone
+    fields = ['age', 'employmentLength', 'numAccounts', 'latePayments', 'creditRating']
+    fields.append('loanTenure' if derive else 'debtToIncomeRatio')
+    for input_data, result in searches(derive, target):
+        pairs = {}
+        for combination in result['combinations']:
+            (first, a), (second, b) = [(change['field'], change['value']) for change in combination['changes']]
+            pairs[frozenset((first, second))] = (
+                float(cost(first, input_data, [a])[0] + cost(second, input_data, [b])[0]), combination)
+            assert brute_scores(input_data, {first: [a], second: [b]}, 1)[0] == combination['risk_score']
+        values = grids(input_data)
+        for first, second in combinations(fields, 2):
+            a, b = (values[first], values[second])
+            alone_a = reaching(result, brute_scores(input_data, {first: a}, len(a)))
+            alone_b = reaching(result, brute_scores(input_data, {second: b}, len(b)))
+            grid_a, grid_b = np.repeat(a, len(b)), np.tile(b, len(a))
+            scores = brute_scores(input_data, {first: grid_a, second: grid_b}, len(grid_a))
+            mask = reaching(result, scores) & ~np.repeat(alone_a, len(b)) & ~np.tile(alone_b, len(a))
+            costs = np.repeat(cost(first, input_data, a), len(b)) + np.tile(cost(second, input_data, b), len(a))
+            best = cheapest(costs, mask)
+            if best is None:
+                continue
+            key = frozenset((first, second))
+            assert key in pairs, (first, second, best)
+            assert pairs[key][0] <= best + 1e-12
+            if a.dtype.kind in 'iO' and b.dtype.kind in 'iO':
+                assert pairs[key][0] == pytest.approx(best, abs=1e-12)
+
+
+def test_derived_dti_follows_the_loan_terms():
+    input_data = extract_input(dict(APPLICANTS[0], deriveDti=True, loanTenure=5), scorecard=SCORECARD)
+    result = what_if(input_data)
+    fields = {change['field'] for change in result['changes']}
+    assert 'debtToIncomeRatio' not in fields
+    assert {'loanTenure', 'loanAmount'} <= fields
+    for combination in result['combinations']:
+        assert 'debtToIncomeRatio' not in {change['field'] for change in combination['changes']}
+
+
+def test_api_option_errors():
+    client = app.test_client()
+    body = client.post('/api/what-if', json=dict(APPLICANTS[0], limit='many', targetRating='Best', age=5)).get_json()
+    assert body['errors'] == {'age': 'must be between 18 and 100', 'limit': 'must be a whole number',
+                              'targetRating': 'must be one of ' + ', '.join(LABELS)}
+    response = client.post('/api/what-if', json=dict(APPLICANTS[0], limit=-1))
+    assert response.status_code == 400 and response.get_json()['errors'] == {'limit': 'must be at least 0'}
+    assert client.post('/api/what-if', json=[1]).get_json()['errors'] == {'body': 'must be a JSON object'}
+    body = client.post('/api/what-if', json=dict(APPLICANTS[0], limit='2')).get_json()
+    assert len(body['combinations']) == 2
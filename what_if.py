@@ -0,0 +1,348 @@
+"""
+What-if sensitivity: the smallest input change that moves an applicant's rating.
+
+Every factor is piecewise-constant, so an input's score can only change where
+it crosses a band breakpoint. Instead of sweeping a grid of values, each
+field is tried only at the breakpoints it can cross (including breakpoints of
+the derived ratios it feeds, e.g. income moves the savings buffer and
+loan-to-income bands too), on either side, so one applicant needs a few
+hundred scorecard evaluations. Categorical fields are tried at every other
+category, and take part in pairs like the numeric fields.
+
+In derived-DTI mode (input_data carries the loanTenure that app.extract_input
+keeps there) debtToIncomeRatio is not an input the applicant controls: it is
+recomputed from EMI ÷ monthly income for every trial, and loan amount,
+interest rate, tenure and income are tried at the values where that ratio
+crosses a DTI breakpoint instead.
+
+    from what_if import what_if
+    what_if(input_data)                      # next better rating
+    what_if(input_data, target='Good')       # a specific rating
+"""
+import math
+from bisect import bisect_right
+from itertools import combinations
+
+from schema import TENURE_RANGE
+from scorecard import FIELD_DEFAULTS, FIELD_RANGES, SCORECARD
+
+# Whole-number fields (years, counts and rupee amounts, as in the Streamlit widgets)
+INTEGER_FIELDS = frozenset(['age', 'income', 'employmentLength', 'numAccounts',
+                            'latePayments', 'loanAmount', 'savingsBalance', 'loanTenure'])
+
+
+def derives_dti(input_data):
+    """Whether input_data is in derived-DTI mode (it carries the loan tenure)"""
+    return 'loanTenure' in input_data
+
+
+def search_ranges(input_data):
+    """Fields the search may change and their ranges: the DTI gives way to the tenure when it is derived"""
+    if not derives_dti(input_data):
+        return FIELD_RANGES
+    ranges = {field: limits for field, limits in FIELD_RANGES.items() if field != 'debtToIncomeRatio'}
+    ranges['loanTenure'] = TENURE_RANGE
+    return ranges
+
+
+def _current(field, input_data):
+    return input_data[field] if field in input_data else FIELD_DEFAULTS[field]
+
+
+# Inputs the derived debt-to-income ratio is computed from
+LOAN_TERMS = frozenset(['loanAmount', 'interestRate', 'loanTenure', 'income'])
+
+
+def _dti(input_data, **changes):
+    """Derived DTI of input_data with `changes` applied; an array of values for one field gives an array"""
+    from emi import derived_dti
+    terms = dict(input_data, **changes)
+    return derived_dti(terms['loanAmount'], terms['interestRate'], terms['loanTenure'], terms['income'])
+
+
+def _savings_for_months(months, input_data):
+    income = input_data.get('income', 0)
+    return months * income / 12 if income > 0 else None
+
+
+def _income_for_months(months, input_data):
+    savings_balance = input_data.get('savingsBalance', 0)
+    return savings_balance * 12 / months if months > 0 and savings_balance > 0 else None
+
+
+def _loan_for_ratio(ratio, input_data):
+    income = input_data.get('income', 0)
+    return ratio * income / 100 if income > 0 else None
+
+
+def _income_for_ratio(ratio, input_data):
+    loan_amount = input_data.get('loanAmount', 0)
+    return loan_amount * 100 / ratio if ratio > 0 and loan_amount > 0 else None
+
+
+def _solve(function, low, high, target, points=64):
+    """
+    The float at which a monotonic, array-in array-out function reaches
+    target (None if it never does in [low, high]). Each step evaluates a grid
+    of points across the bracket in one call and keeps the first cell that
+    crosses, until the bracket is two adjacent floats: the function is short
+    of target at one and has reached it at the other, even where rounding
+    noise makes it wobble at the last few digits.
+    """
+    import numpy as np
+
+    at_low, at_high = function(np.array([low, high], dtype=float)).tolist()
+    if not min(at_low, at_high) <= target <= max(at_low, at_high):
+        return None
+    increasing = at_high >= at_low
+    if at_low == target or (at_high == target and not increasing):
+        return low if at_low == target else high
+    while np.nextafter(low, high) < high:
+        grid = np.linspace(low, high, points)
+        values = function(grid)
+        reached = values >= target if increasing else values < target
+        # grid[0] is short of target and grid[-1] has reached it, so the first crossing is inside
+        first = int(np.argmax(reached[1:])) + 1
+        low, high = float(grid[first - 1]), float(grid[first])
+    return high
+
+
+def _loan_for_dti(ratio, input_data):
+    per_rupee = float(_dti(input_data, loanAmount=1.0))
+    return ratio / per_rupee if per_rupee > 0 else None
+
+
+def _income_for_dti(ratio, input_data):
+    monthly_emi = float(_dti(input_data, income=12.0))
+    return monthly_emi * 12 / ratio if ratio > 0 and monthly_emi > 0 else None
+
+
+def _rate_for_dti(ratio, input_data):
+    return _solve(lambda rate: _dti(input_data, interestRate=rate), *FIELD_RANGES['interestRate'], ratio)
+
+
+def _tenure_for_dti(ratio, input_data):
+    return _solve(lambda tenure: _dti(input_data, loanTenure=tenure), *TENURE_RANGE, ratio)
+
+
+# For each derived input, the raw fields it depends on and the raw value at
+# which the derived input equals a given breakpoint (None if it never does)
+INVERSES = {
+    'savingsMonths': {'savingsBalance': _savings_for_months, 'income': _income_for_months},
+    'loanToIncome': {'loanAmount': _loan_for_ratio, 'income': _income_for_ratio}
+}
+# The same for debtToIncomeRatio when it is derived from the loan terms
+DTI_INVERSES = {
+    'debtToIncomeRatio': {'loanAmount': _loan_for_dti, 'income': _income_for_dti,
+                          'interestRate': _rate_for_dti, 'loanTenure': _tenure_for_dti}
+}
+
+
+def crossings(field, input_data, scorecard=SCORECARD):
+    """Raw values of `field` at which some factor's band changes, plus the field's range limits"""
+    values = [limit for limit in search_ranges(input_data)[field] if limit is not None]
+    inverses = dict(INVERSES, **DTI_INVERSES) if derives_dti(input_data) else INVERSES
+    for factor in scorecard.factors:
+        if 'categories' in factor:
+            continue
+        key = factor['input']
+        if key == field:
+            values.extend(factor['bounds'])
+        elif field in inverses.get(key, ()):
+            invert = inverses[key][field]
+            for bound in factor['bounds']:
+                value = invert(bound, input_data)
+                if value is not None:
+                    values.append(value)
+    return values
+
+
+def candidates(field, input_data, scorecard=SCORECARD):
+    """Values just either side of every crossing, whole where the field is, and within range"""
+    low, high = search_ranges(input_data)[field]
+    current = _current(field, input_data)
+    found = set()
+    for crossing in crossings(field, input_data, scorecard):
+        if not math.isfinite(crossing):
+            continue
+        if field in INTEGER_FIELDS:
+            # Derived crossings can be off by an ulp, so keep a whole number either side
+            above = math.ceil(crossing)
+            nearby = (above - 1, above, math.floor(crossing) + 1)
+        else:
+            nearby = (math.nextafter(crossing, -math.inf), crossing, math.nextafter(crossing, math.inf))
+        for value in nearby:
+            if (low is None or value >= low) and (high is None or value <= high) and value != current:
+                found.add(value)
+    return found
+
+
+def _scale(field, current, ranges=FIELD_RANGES):
+    """Size of a 'whole' change of a field, to compare moves across fields"""
+    low, high = ranges[field]
+    if low is not None and high is not None:
+        return high - low
+    return max(abs(current), 1.0)
+
+
+def category_moves(factor, input_data):
+    """(cost, category) for every other category, costed by the change in points relative to the factor's spread"""
+    key = factor['input']
+    points = factor['categories']
+    current = points.get(_current(key, input_data), factor['default_points'])
+    spread = max(max(points.values()), factor['default_points']) - min(min(points.values()), factor['default_points'])
+    return [(abs(value - current) / (spread or 1), name)
+            for name, value in points.items() if name != _current(key, input_data)]
+
+
+def score_trial(scorecard, input_data):
+    """Score of a trial input, with the DTI recomputed from the loan terms in derived-DTI mode"""
+    if derives_dti(input_data):
+        input_data = dict(input_data, debtToIncomeRatio=float(_dti(input_data)))
+    return scorecard.score(input_data)
+
+
+class _Search:
+    """Scores single- and multi-field moves for one applicant towards a target rating rank"""
+
+    def __init__(self, scorecard, input_data, target_rank, direction):
+        self.scorecard = scorecard
+        self.input_data = input_data
+        self.target_rank = target_rank
+        self.direction = direction
+        self.derived = derives_dti(input_data)
+        # Moves that leave the loan terms alone keep the applicant's own derived DTI
+        self.fixed = dict(input_data, debtToIncomeRatio=float(_dti(input_data))) if self.derived else input_data
+
+    def rank(self, risk_score):
+        return bisect_right(self.scorecard.rating_bounds, risk_score)
+
+    def reaches(self, risk_score):
+        rank = self.rank(risk_score)
+        return rank <= self.target_rank if self.direction < 0 else rank >= self.target_rank
+
+    def score(self, changes):
+        if self.derived and not LOAN_TERMS.isdisjoint(changes):
+            return score_trial(self.scorecard, dict(self.input_data, **changes))
+        trial = dict(self.fixed)
+        trial.update(changes)
+        return self.scorecard.score(trial)
+
+    def scores(self, field, values):
+        """Scores of one field set to each of `values`, with one vectorized DTI pass for a loan term"""
+        if not (self.derived and field in LOAN_TERMS and values):
+            return [self.score({field: value}) for value in values]
+        ratios = _dti(self.input_data, **{field: [float(value) for value in values]}).tolist()
+        score = self.scorecard.score
+        return [score(dict(self.input_data, **{field: value, 'debtToIncomeRatio': ratio}))
+                for value, ratio in zip(values, ratios)]
+
+    def moves(self, field):
+        """(cost, value) of every candidate value of a field, cheapest first"""
+        for factor in self.scorecard.factors:
+            if factor['input'] == field and 'categories' in factor:
+                return sorted(category_moves(factor, self.input_data))
+        ranges = search_ranges(self.input_data)
+        current = _current(field, self.input_data)
+        scale = _scale(field, current, ranges)
+        return sorted((abs(value - current) / scale, value) for value in candidates(field, self.input_data, self.scorecard))
+
+    def frontier(self, field, base_score):
+        """
+        Moves of one field that each improve on every smaller move, as
+        (cost, value, risk_score) sorted by cost. The first one that reaches
+        the target is that field's minimal change.
+        """
+        moves = self.moves(field)
+        frontier = []
+        best = base_score
+        for (cost, value), risk_score in zip(moves, self.scores(field, [value for _, value in moves])):
+            if (risk_score - best) * self.direction > 0:
+                frontier.append((cost, value, risk_score))
+                best = risk_score
+        return frontier
+
+
+def _change(field, current, value):
+    change = {'field': field, 'current': current, 'value': value}
+    if not isinstance(value, str):
+        change['change'] = round(value - current, 10)
+    return change
+
+
+def what_if(input_data, target=None, scorecard=SCORECARD, combine=True, limit=5):
+    """
+    Minimal changes that move one applicant to the `target` rating or beyond.
+
+    target defaults to the next better rating; a worse rating searches the
+    other way. Returns the current score and rating, 'changes' (per field,
+    the smallest single-field change that reaches the target, cheapest
+    first) and, when combine is set, 'combinations': the `limit` cheapest
+    pairs of field moves that reach the target where neither move alone
+    does. Costs compare fields by change relative to the widget range (or to
+    the current value for unbounded amounts), and categories by the change
+    in points relative to the factor's spread. Pairs are built from each
+    field's single-field breakpoints, then rescored together.
+    """
+    base_score = score_trial(scorecard, input_data)
+    rank = bisect_right(scorecard.rating_bounds, base_score)
+    labels = scorecard.rating_labels
+    if target is None:
+        target_rank = rank - 1
+    elif target in labels:
+        target_rank = labels.index(target)
+    else:
+        raise ValueError(f"Unknown target rating '{target}', expected one of {', '.join(labels)}")
+
+    result = {
+        'risk_score': base_score,
+        'rating': labels[rank],
+        'target_rating': labels[target_rank] if target_rank >= 0 else None,
+        'changes': [],
+        'combinations': []
+    }
+    if target_rank < 0 or target_rank == rank:
+        return result
+
+    search = _Search(scorecard, input_data, target_rank, -1 if target_rank < rank else 1)
+    singles = []
+    frontiers = {}
+    fields = list(search_ranges(input_data))
+    fields += [factor['input'] for factor in scorecard.factors if 'categories' in factor]
+    for field in fields:
+        frontier = search.frontier(field, base_score)
+        reaching = [move for move in frontier if search.reaches(move[2])]
+        if reaching:
+            cost, value, risk_score = reaching[0]
+            singles.append((cost, field, value, risk_score))
+        # Only moves that fall short on their own are worth pairing
+        frontiers[field] = [move for move in frontier if not search.reaches(move[2])]
+
+    changes = []
+    for cost, field, value, risk_score in sorted(singles, key=lambda single: single[:2]):
+        change = _change(field, _current(field, input_data), value)
+        change.update(risk_score=risk_score, rating=labels[search.rank(risk_score)])
+        changes.append(change)
+    result['changes'] = changes
+
+    if combine:
+        pairs = []
+        for first, second in combinations(frontiers, 2):
+            best = None
+            for cost_a, value_a, _ in frontiers[first]:
+                for cost_b, value_b, _ in frontiers[second]:
+                    cost = cost_a + cost_b
+                    if best is not None and cost >= best[0]:
+                        continue
+                    risk_score = search.score({first: value_a, second: value_b})
+                    if search.reaches(risk_score):
+                        best = (cost, ((first, value_a), (second, value_b)), risk_score)
+            if best is not None:
+                pairs.append(best)
+        pairs.sort(key=lambda pair: pair[0])
+        result['combinations'] = [{
+            'changes': [_change(field, _current(field, input_data), value) for field, value in moves],
+            'risk_score': risk_score,
+            'rating': labels[search.rank(risk_score)]
+        } for _, moves, risk_score in pairs[:limit]]
+    return result